@@ -12,7 +12,9 @@ CREATE TABLE employee_list(
     register_time DATETIME COMMENT 'Register Time',
     INDEX idx_employee_list_position (position) COMMENT 'Index for Position',
     INDEX idx_employee_list_department (department) COMMENT 'Index for Department',
-    INDEX idx_employee_list_status (status) COMMENT 'Index for Status'
+    INDEX idx_employee_list_status (status) COMMENT 'Index for Status',
+    INDEX idx_employee_list_department_position_status (department, position, status) COMMENT 'Index for multi-filter search (rows of a combination are in ID order)',
+    INDEX idx_employee_list_register_time (register_time) COMMENT 'Index for registration date range search'
 ) COMMENT 'Employee Information for Management';
 
 CREATE TABLE document_approval (
@@ -3,49 +3,12 @@ Simple python flask api mockup
 :build date: 2025-08-14
 :author: Jiwon Jeon
 """
-import logging.config
-
-from flask import Flask
-
-from config import logging_config, set_default_env, set_settings, get_settings
-
-from db.init_pool import set_db_pool
-from views import search_bp, manage_bp
-
-# ============================================================================================
-# Init Logging
-# ============================================================================================
-logging.config.dictConfig(logging_config)
-
-# ============================================================================================
-# Set Config
-# ============================================================================================
-set_default_env()
-set_settings()
-
-# ===========================================================================================
-# Init Variables
-# ============================================================================================
-set_db_pool(get_settings())
+from app_factory import create_app
 
 # ============================================================================================
 # Init Flask
 # ============================================================================================
-app = Flask(__name__)
-
-# ============================================================================================
-# Register Routers
-# ============================================================================================
-app.register_blueprint(search_bp)
-app.register_blueprint(manage_bp)
-
-# ============================================================================================
-# Basic Routes
-# ============================================================================================
-@app.route('/')
-def hello_world():
-    app.logger.info('Hello, World! endpoint was reached')
-    return 'Hello, World!'
+app = create_app()
 
 
 if __name__ == '__main__':
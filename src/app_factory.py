@@ -0,0 +1,97 @@
+"""
+Application factory of the API
+The app is built without waiting for the database. The connection pool is connected in the background,
+and `GET /status/ready` answers 503 until it is ready, so a load balancer can gate the traffic.
+"""
+import time
+IMPORT_START_TIME = time.perf_counter()
+
+import logging
+
+from flask import Flask
+
+from config import set_logging, set_default_env, set_settings, Settings
+
+from db import (start_db_pool, init_request_session, make_storage_backend, set_storage_backend, set_employee_cache,
+                set_group_index, start_group_index, set_name_index, start_name_index,
+                set_headcount_index, start_headcount_index)
+from utils import set_response_cache, set_versions, OrjsonProvider, init_compression, loop_view
+from views import search_bp, manage_bp, data_bp, status_bp
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_START_TIME
+
+
+def create_app(settings: Settings = None, configure_logging: bool = True) -> Flask:
+    """
+    Create the flask app.
+    :param settings: settings of the app (None: load from the environment - APP_ENV_TYPE and dotenv files)
+    :param configure_logging: apply logging_config with the logging mode of the settings (needs ./logs directory)
+    :return: flask app, whose startup time breakdown is in `app.extensions["startup_times"]`
+    """
+    start_time = time.perf_counter()
+
+    # ============================================================================================
+    # Set Config
+    # ============================================================================================
+    if settings is None:
+        set_default_env()
+        settings = set_settings()
+
+    # ============================================================================================
+    # Init Logging
+    # ============================================================================================
+    if configure_logging:
+        set_logging(settings.log)  # sync handlers, or a background writer thread (queue mode)
+    settings_time = time.perf_counter()
+
+    # ===========================================================================================
+    # Init Variables (connected in the background)
+    # ============================================================================================
+    set_storage_backend(make_storage_backend(settings))
+    set_employee_cache(settings)
+    set_response_cache(settings)  # shared by the workers of this host
+    set_versions(settings)  # ETag / Last-Modified of search and data APIs
+    set_group_index(settings)
+    set_name_index(settings)
+    set_headcount_index(settings)
+    if settings.storage.backend == "mysql":
+        start_db_pool(settings)
+    start_group_index(settings)  # loaded once the database is ready
+    start_name_index(settings)
+    start_headcount_index(settings)
+
+    # ============================================================================================
+    # Init Flask
+    # ============================================================================================
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)  # jsonify with orjson
+    init_request_session(app)  # share one connection per request between database functions
+    init_compression(app, settings)  # gzip / deflate by Accept-Encoding
+
+    # ============================================================================================
+    # Register Routers
+    # ============================================================================================
+    app.register_blueprint(search_bp)
+    app.register_blueprint(manage_bp)
+    app.register_blueprint(data_bp)
+    app.register_blueprint(status_bp)
+
+    # ============================================================================================
+    # Basic Routes
+    # ============================================================================================
+    @app.route('/')
+    @loop_view
+    def hello_world():
+        app.logger.info('Hello, World! endpoint was reached')
+        return 'Hello, World!'
+
+    end_time = time.perf_counter()
+    app.extensions["startup_times"] = {
+        "import_ms": round(IMPORT_SECONDS * 1000, 3),
+        "settings_ms": round((settings_time - start_time) * 1000, 3),
+        "app_ms": round((end_time - settings_time) * 1000, 3),
+    }
+    logging.getLogger("app").info(f"App created in {(end_time - start_time) * 1000:.1f} ms "
+                                  f"(imports: {IMPORT_SECONDS * 1000:.1f} ms), storage backend: {settings.storage.backend}")
+
+    return app
@@ -0,0 +1,18 @@
+"""
+Async(ASGI) serving mode of the API
+Run with an ASGI server - `hypercorn asgi:app --bind 0.0.0.0:80`
+The app dispatches the requests of the flask app of create_app on the event loop (views/async_view.py),
+and only their database work waits in a bounded executor (db/async_employee.py).
+"""
+from app_factory import create_app
+from views.async_view import make_async_app
+
+# ============================================================================================
+# Init Quart
+# ============================================================================================
+flask_app = create_app()
+app = make_async_app(flask_app)
+
+
+if __name__ == '__main__':
+    app.run(debug=True, host='0.0.0.0', port=80)
@@ -1,9 +1,12 @@
-from .log import logging_config
+from .log import logging_config, set_logging, get_logging_stats, LogSettings
 from .env import set_default_env, get_env_type, get_dotenv_path, get_env_files
 from .load_main import set_settings, get_settings, Settings
 
 __all__ = [
     "logging_config",
+    "set_logging",
+    "get_logging_stats",
+    "LogSettings",
     "set_default_env",
     "get_env_type",
     "get_dotenv_path",
@@ -0,0 +1,34 @@
+""" Cache Settings """
+
+from pydantic import Field, BaseModel, field_validator
+
+
+# =========================================================================================
+# Employee Cache Setting
+# =========================================================================================
+
+class CacheSettings(BaseModel):
+    # read-through cache of get_employee (per worker process)
+    employee_enabled: bool = Field(default=True, description="Cache employee records read by ID")
+    employee_max_entries: int = Field(default=10000, description="Maximum number of cached employee records")
+    employee_max_bytes: int = Field(default=16 * 1024 * 1024, description="Maximum estimated memory of cached employee records")
+    employee_ttl_seconds: float = Field(default=60, description="Seconds until a cached employee record expires")
+
+    # cache of search responses shared by the worker processes of a host (memory-mapped file)
+    response_enabled: bool = Field(default=True, description="Share search responses between workers (mysql backend only)")
+    response_path: str = Field(default="", description="Path of the memory-mapped file ('': per database in /dev/shm or the temp directory)")
+    response_slots: int = Field(default=2048, description="Number of slots (cached responses) of the file")
+    response_slot_bytes: int = Field(default=32 * 1024, description="Size of a slot. Larger responses are not cached")
+    response_ttl_seconds: float = Field(default=60, description="Seconds until a cached response expires")
+
+    # versions of rows and groups shared by the worker processes of a host, for ETag / Last-Modified
+    versions_enabled: bool = Field(default=True, description="Answer conditional GETs of search and data APIs")
+    versions_path: str = Field(default="", description="Path of the memory-mapped file ('': per database in /dev/shm or the temp directory)")
+    versions_slots: int = Field(default=65536, description="Number of version counters of the file")
+
+    @field_validator("employee_max_entries", "employee_max_bytes", "employee_ttl_seconds",
+                     "response_slots", "response_slot_bytes", "response_ttl_seconds", "versions_slots")
+    def positive(cls, v):
+        if v <= 0:
+            raise ValueError("This field must be positive.")
+        return v
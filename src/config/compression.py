@@ -0,0 +1,26 @@
+""" Compression Settings """
+
+from pydantic import Field, BaseModel, field_validator
+
+
+# =========================================================================================
+# Response Compression Setting
+# =========================================================================================
+
+class CompressionSettings(BaseModel):
+    # gzip / deflate by Accept-Encoding (utils/compression.py)
+    enabled: bool = Field(default=True, description="Compress responses by Accept-Encoding")
+    min_bytes: int = Field(default=1024, description="Responses smaller than this are not compressed (streamed responses are always compressed)")
+    level: int = Field(default=6, description="zlib compression level (1: fastest - 9: smallest)")
+
+    @field_validator("min_bytes")
+    def not_negative(cls, v):
+        if v < 0:
+            raise ValueError("This field must not be negative.")
+        return v
+
+    @field_validator("level")
+    def valid_level(cls, v):
+        if not (1 <= v <= 9):
+            raise ValueError("Level must be between 1 and 9.")
+        return v
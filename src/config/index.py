@@ -0,0 +1,27 @@
+""" Index Settings """
+
+from pydantic import Field, BaseModel, field_validator
+
+
+# =========================================================================================
+# Group, Name & Headcount Index Setting
+# =========================================================================================
+
+class IndexSettings(BaseModel):
+    # in-memory index of employees by position, department and status (per worker process)
+    group_enabled: bool = Field(default=True, description="Serve group searches from the in-memory index (mysql backend only)")
+    group_reconcile_seconds: float = Field(default=300, description="Seconds between reloads of the index from the database")
+
+    # in-memory type-ahead index of employees by first_name, surname and email (per worker process)
+    name_enabled: bool = Field(default=True, description="Serve name searches from the in-memory index")
+    name_reconcile_seconds: float = Field(default=300, description="Seconds between reloads of the index from the database")
+
+    # in-memory headcount counters by department x position x status (per worker process)
+    headcount_enabled: bool = Field(default=True, description="Serve headcounts from in-memory counters")
+    headcount_reconcile_seconds: float = Field(default=300, description="Seconds between reloads of the counters from the database")
+
+    @field_validator("group_reconcile_seconds", "name_reconcile_seconds", "headcount_reconcile_seconds")
+    def positive(cls, v):
+        if v <= 0:
+            raise ValueError("This field must be positive.")
+        return v
@@ -4,6 +4,11 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from config.env import get_env_files
 from config.rdb import RDBSettings
+from config.storage import StorageSettings
+from config.cache import CacheSettings
+from config.index import IndexSettings
+from config.compression import CompressionSettings
+from config.log import LogSettings
 
 
 # ============================================================================================
@@ -20,6 +25,11 @@ class Settings(BaseSettings):
     )
     
     rdb: RDBSettings = RDBSettings()
+    storage: StorageSettings = StorageSettings()
+    cache: CacheSettings = CacheSettings()
+    index: IndexSettings = IndexSettings()
+    compression: CompressionSettings = CompressionSettings()
+    log: LogSettings = LogSettings()
 
 
 # ============================================================================================
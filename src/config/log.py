@@ -1,6 +1,19 @@
 """ Logging Configuration """
 # https://docs.python.org/3/library/logging.config.html
 
+import atexit
+from collections import defaultdict
+from itertools import islice
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+from typing import Dict, List, Literal, Tuple
+
+from pydantic import Field, BaseModel, field_validator
+
+
 logging_config = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -23,6 +36,12 @@ logging_config = {
             'filename': './logs/app.log',
             'formatter': 'verbose',
             'level': 'INFO'
+        },
+        'slow_query_logfile': {
+            'class': 'logging.FileHandler',
+            'filename': './logs/slow_query.log',
+            'formatter': 'verbose',
+            'level': 'INFO'
         }
     },
     'loggers': {
@@ -30,6 +49,226 @@ logging_config = {
             'handlers': ['console', 'logfile'],
             'level': 'DEBUG',
             'propagate': False
+        },
+        'app.slow_query': {
+            'handlers': ['console', 'slow_query_logfile'],
+            'level': 'INFO',
+            'propagate': False
         }
     }
-}
\ No newline at end of file
+}
+
+
+# =========================================================================================
+# Logging Setting
+# =========================================================================================
+
+class LogSettings(BaseModel):
+    # sync: the handlers of logging_config write on the request thread
+    # queue: the request thread only puts the record to a queue, and a background thread formats and writes it
+    mode: Literal["sync", "queue"] = Field(default="queue", description="Logging mode (sync / queue)")
+    queue_size: int = Field(default=10000, description="Records waiting for the writer, more records are dropped")
+    max_arg_chars: int = Field(default=1000, description="Arguments of a message are cut to about this length (queue mode)")
+    max_message_chars: int = Field(default=4000, description="Messages are cut to this length (queue mode)")
+    sample_rate: float = Field(default=1.0, description="Fraction of INFO / DEBUG records written per message (queue mode)")
+    sample_rates: Dict[str, float] = Field(default_factory=dict, description="Rates of some messages (message template: rate)")
+
+    @field_validator("queue_size", "max_arg_chars", "max_message_chars")
+    def positive(cls, v):
+        if v <= 0:
+            raise ValueError("This field must be positive.")
+        return v
+
+    @field_validator("sample_rate")
+    def valid_rate(cls, v):
+        if not (0 < v <= 1):
+            raise ValueError("Rate must be greater than 0 and at most 1.")
+        return v
+
+    @field_validator("sample_rates")
+    def valid_rates(cls, v):
+        if any(not (0 < x <= 1) for x in v.values()):
+            raise ValueError("Rates must be greater than 0 and at most 1.")
+        return v
+
+
+# =========================================================================================
+# Queue Logging
+# =========================================================================================
+
+SAMPLING_MAX_MESSAGES = 10000  # message templates counted by the sampling filter
+SHORTEN_MAX_ITEMS = 10  # items of a list or dict argument which are logged in the queue mode
+
+
+class _Text(str):
+    """ Shortened repr of an argument, which is printed as it is by both %s and %r """
+
+    def __repr__(self):
+        return str(self)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Write one of every 1 / rate INFO / DEBUG records of each message template (ex - "Employee data retrieved: %s").
+    Warnings and errors are always written.
+    """
+
+    def __init__(self, sample_rate: float, sample_rates: Dict[str, float]):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates
+        self._counts: Dict[str, int] = defaultdict(int)
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        key = record.msg if isinstance(record.msg, str) else record.name
+        every = round(1 / self.sample_rates.get(key, self.sample_rate))
+        if every <= 1:
+            return True
+
+        if len(self._counts) >= SAMPLING_MAX_MESSAGES:  # formatted messages (f-strings) are all different
+            self._counts.clear()
+        self._counts[key] += 1
+        if self._counts[key] % every == 1:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler which leaves the formatting of the message to the listener thread.
+    On the calling thread, only the arguments are replaced with shortened reprs (the first items of a list or dict),
+    so a logged result set costs the same at any size, and isn't formatted after it has been changed by the request.
+    A record is dropped instead of blocking when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue, max_arg_chars: int):
+        super().__init__(log_queue)
+        self.max_arg_chars = max_arg_chars
+        self.queued = 0
+        self.dropped = 0
+
+    def _shorten(self, value):
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, (list, tuple)) and len(value) > SHORTEN_MAX_ITEMS:
+            head = repr(value[:SHORTEN_MAX_ITEMS])
+            text = f"{head[:-1]}, ... {len(value)} items{head[-1]}"
+        elif isinstance(value, dict) and len(value) > SHORTEN_MAX_ITEMS:
+            head = repr(dict(islice(value.items(), SHORTEN_MAX_ITEMS)))
+            text = f"{head[:-1]}, ... {len(value)} items{head[-1]}"
+        elif isinstance(value, str):
+            if len(value) <= self.max_arg_chars:
+                return value
+            text = value
+        else:
+            text = repr(value)
+        return _Text(text if len(text) <= self.max_arg_chars else text[:self.max_arg_chars] + "...")
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not isinstance(record.msg, str):  # logger.info(rows)
+            record.msg = self._shorten(record.msg)
+        if isinstance(record.args, tuple):
+            record.args = tuple(self._shorten(x) for x in record.args)
+        elif isinstance(record.args, dict):  # logger.info("%(name)s", {"name": ...})
+            record.args = {key: self._shorten(value) for key, value in record.args.items()}
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class TruncateFilter(logging.Filter):
+    """ Cut the formatted message of a record to max_chars (runs on the listener thread) """
+
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if len(message) > self.max_chars:
+            message = message[:self.max_chars] + f"... ({len(message) - self.max_chars} more characters)"
+        record.msg, record.args = message, None
+        return True
+
+
+# =========================================================================================
+# Global variables for logging
+# =========================================================================================
+
+
+LOG_QUEUES: List[Tuple[LazyQueueHandler, logging.handlers.QueueListener]] = list()
+
+
+def set_logging(settings: LogSettings = None):
+    """
+    Apply logging_config, and in queue mode move the handlers of each logger to a background writer thread
+    (QueueListener), which is stopped (flushed) at exit.
+    :param settings: logging settings (None for the defaults)
+    """
+    settings = settings or LogSettings()
+    stop_log_listeners()
+    logging.config.dictConfig(logging_config)
+    if settings.mode != "queue":
+        return
+
+    truncate_filter = TruncateFilter(settings.max_message_chars)
+    for name in logging_config["loggers"]:
+        logger = logging.getLogger(name)
+        handlers = list(logger.handlers)
+        for handler in handlers:
+            handler.addFilter(truncate_filter)
+            logger.removeHandler(handler)
+
+        queue_handler = LazyQueueHandler(queue.Queue(settings.queue_size), settings.max_arg_chars)
+        queue_handler.addFilter(SamplingFilter(settings.sample_rate, settings.sample_rates))
+        logger.addHandler(queue_handler)
+        listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+        LOG_QUEUES.append((queue_handler, listener))
+
+
+def stop_log_listeners():
+    """ Write the queued records and stop the writer threads """
+    while LOG_QUEUES:
+        _, listener = LOG_QUEUES.pop()
+        if listener._thread is not None:
+            listener.stop()
+
+
+def _restart_log_listeners():
+    """ Start the writer threads again in a forked child with new queues (fork doesn't copy the threads) """
+    for queue_handler, listener in LOG_QUEUES:
+        queue_handler.queue = listener.queue = queue.Queue(listener.queue.maxsize)
+        listener._thread = None
+        listener.start()
+
+
+def get_logging_stats() -> dict:
+    """
+    Get counters of the queue logging of the current process.
+    :return: dictionary of queued, dropped and sampled out records per logger, or {"mode": "sync"}
+    """
+    if not LOG_QUEUES:
+        return {"mode": "sync"}
+    loggers = dict()
+    for name, (queue_handler, _) in zip(logging_config["loggers"], LOG_QUEUES):
+        loggers[name] = {
+            "queued": queue_handler.queued,
+            "dropped": queue_handler.dropped,
+            "sampled_out": sum(x.sampled_out for x in queue_handler.filters if isinstance(x, SamplingFilter)),
+            "waiting": queue_handler.queue.qsize(),
+        }
+    return {"mode": "queue", "loggers": loggers}
+
+
+atexit.register(stop_log_listeners)
+os.register_at_fork(after_in_child=_restart_log_listeners)
@@ -1,8 +1,32 @@
 """ RDB Settings """
 
+from typing import List
+
 from pydantic import Field, BaseModel, field_validator
 
 
+# =========================================================================================
+# RDB Replica Server Setting
+# =========================================================================================
+
+class RDBReplicaSettings(BaseModel):
+    """ Read replica server. User, password, database and pool sizing are same as the primary. """
+    host: str = Field(description="RDB Replica Host")
+    port: int = Field(default=3306, description="RDB Replica Port")
+
+    @field_validator("host")
+    def not_empty(cls, v):
+        if not v:
+            raise ValueError("This field cannot be empty.")
+        return v
+
+    @field_validator("port")
+    def valid_port(cls, v):
+        if not (0 < v < 65536):
+            raise ValueError("Port must be between 1 and 65535.")
+        return v
+
+
 # =========================================================================================
 # RDB Server Setting
 # =========================================================================================
@@ -14,6 +38,20 @@ class RDBSettings(BaseModel):
     password: str = Field(default="", description="RDB Password")
     database: str = Field(default="test", description="RDB Database")
 
+    # connection pool sizing (per worker process)
+    pool_max_connections: int = Field(default=5, description="Maximum number of connections of the pool (0: unlimited)")
+    pool_min_cached: int = Field(default=2, description="Number of idle connections opened when the pool is created")
+    pool_max_cached: int = Field(default=5, description="Maximum number of idle connections in the pool (0: unlimited)")
+    pool_blocking: bool = Field(default=True, description="Wait for a free connection when the pool is exhausted (False: raise an error)")
+
+    # read replicas (ex - APP__RDB__REPLICAS='[{"host": "mysql-replica", "port": 3306}]')
+    replicas: List[RDBReplicaSettings] = Field(default_factory=list, description="Read replica servers")
+    replica_retry_seconds: int = Field(default=30, description="Seconds to skip a replica after a connection failure")
+
+    # slow-query log (logs/slow_query.log)
+    slow_query_threshold_ms: float = Field(default=200, description="Database function calls slower than this are logged (0: disabled)")
+    slow_query_explain_interval_seconds: float = Field(default=60, description="Minimum seconds between EXPLAIN captures of a database function")
+
     @field_validator("host", "user", "password", "database")
     def not_empty(cls, v):
         if not v:
@@ -25,3 +63,15 @@ class RDBSettings(BaseModel):
         if not (0 < v < 65536):
             raise ValueError("Port must be between 1 and 65535.")
         return v
+
+    @field_validator("pool_max_connections", "pool_min_cached", "pool_max_cached")
+    def not_negative(cls, v):
+        if v < 0:
+            raise ValueError("Pool size cannot be negative.")
+        return v
+
+    @field_validator("slow_query_threshold_ms", "slow_query_explain_interval_seconds")
+    def not_negative_time(cls, v):
+        if v < 0:
+            raise ValueError("Time cannot be negative.")
+        return v
@@ -0,0 +1,14 @@
+""" Storage Settings """
+
+from typing import Literal
+
+from pydantic import Field, BaseModel
+
+
+# =========================================================================================
+# Storage Backend Setting
+# =========================================================================================
+
+class StorageSettings(BaseModel):
+    # mysql: RDB server (config/rdb.py), memory: in-process engine (data is lost when the process exits)
+    backend: Literal["mysql", "memory"] = Field(default="mysql", description="Storage backend of employee data")
@@ -1,4 +1,16 @@
-from .init_pool import make_db_pool, set_db_pool, get_db_pool, db_session_auto_close
-from .employee import (create_employee, get_employee, get_employees_by_position, 
-                       get_employees_by_department, inactivate_employee, promote_employee,
-                       transfer_employee, get_employees, get_documents)
\ No newline at end of file
+from .init_pool import (make_db_pool, set_db_pool, start_db_pool, stop_db_pool, get_db_pool, get_pool_stats,
+                        is_db_pool_ready, get_db_pool_state, db_session_auto_close, db_transaction_auto_close,
+                        db_stream_auto_close, init_request_session, has_db_error)
+from .query_log import get_query_stats
+from .employee import EMPLOYEE_COLUMNS
+from .cache import set_employee_cache, get_cache_stats
+from .group_index import set_group_index, get_group_index_stats
+from .name_index import set_name_index, get_name_index_stats
+from .headcount import HEADCOUNT_COLUMNS, set_headcount_index, get_headcount_index_stats
+from .backend import (StorageBackend, MySQLBackend, make_storage_backend, set_storage_backend, get_storage_backend,
+                      start_group_index, start_name_index, search_names, start_headcount_index, get_headcounts,
+                      unit_of_work, create_employee, create_employees, get_employee, get_employees_by_ids,
+                      get_employees_by_position, get_employees_by_department, inactivate_employee, promote_employee,
+                      transfer_employee, inactivate_employees, promote_employees, transfer_employees,
+                      get_employees, get_documents,
+                      get_employees_after, get_documents_after, search_employees, iter_employees)
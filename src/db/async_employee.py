@@ -0,0 +1,95 @@
+""" Async variants of employee operations (of the current storage backend) for the ASGI serving mode """
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from functools import partial, wraps
+import logging
+import os
+
+from db import init_pool
+from db.backend import (get_employee, get_employees_by_ids, get_employees_by_position, get_employees_by_department,
+                        search_employees, get_employees, get_documents, get_employees_after, get_documents_after,
+                        get_headcounts)
+
+
+logger = logging.getLogger("app")
+
+
+# ============================================================================================
+# Global variables for DB executor
+# ============================================================================================
+
+
+DB_EXECUTOR: ThreadPoolExecutor = None
+DB_EXECUTOR_PID: int = None  # PID of the process which created DB_EXECUTOR
+DEFAULT_EXECUTOR_WORKERS = 32  # used when the pool has unlimited connections
+
+
+# ============================================================================================
+# Executor functions
+# ============================================================================================
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Get the bounded executor for blocking database operations of the current process.
+    Workers are as many as the pool connections, so executor threads never wait for the pool.
+    Requests beyond that are queued in the executor without holding a thread.
+    """
+    global DB_EXECUTOR, DB_EXECUTOR_PID
+
+    if DB_EXECUTOR is None or DB_EXECUTOR_PID != os.getpid():
+        settings = init_pool.DB_SETTINGS
+        max_workers = (settings.rdb.pool_max_connections if settings else 0) or DEFAULT_EXECUTOR_WORKERS
+        DB_EXECUTOR = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        DB_EXECUTOR_PID = os.getpid()
+        logger.info(f"[PID:{os.getpid()}] Database executor created (workers: {max_workers})")
+    return DB_EXECUTOR
+
+
+def shutdown_db_executor():
+    """ Shutdown the executor of the current process """
+    global DB_EXECUTOR
+
+    if DB_EXECUTOR is not None:
+        DB_EXECUTOR.shutdown(wait=True)
+        DB_EXECUTOR = None
+
+
+async def run_in_db_executor(func, *args, **kwargs):
+    """
+    Run a blocking database function in the executor without blocking the event loop.
+    It runs in a copy of the current context (like asyncio.to_thread), so it shares the request of the caller -
+    its connection session and database errors (see init_pool.get_request_session).
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_db_executor(), partial(context.run, func, *args, **kwargs))
+
+
+def to_async(func):
+    """ Make an async variant of a database function, which runs in the executor """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_db_executor(func, *args, **kwargs)
+
+    return wrapper
+
+
+# ============================================================================================
+# Async Employee Database Operations
+# ============================================================================================
+
+
+get_employee_async = to_async(get_employee)
+get_employees_by_ids_async = to_async(get_employees_by_ids)
+get_employees_by_position_async = to_async(get_employees_by_position)
+get_employees_by_department_async = to_async(get_employees_by_department)
+search_employees_async = to_async(search_employees)
+get_employees_async = to_async(get_employees)
+get_documents_async = to_async(get_documents)
+get_employees_after_async = to_async(get_employees_after)
+get_documents_after_async = to_async(get_documents_after)
+get_headcounts_async = to_async(get_headcounts)
+
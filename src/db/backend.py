@@ -0,0 +1,463 @@
+"""
+Storage backend interface of employee data.
+`db` exports the functions of this module, which call the backend set by set_storage_backend,
+so views don't depend on which engine stores the data.
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import logging
+import threading
+from typing import Callable, ContextManager, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config import Settings
+from db import employee, group_index, headcount, init_pool, name_index
+from db.cache import get_employee_cache
+from db.group_index import get_group_index
+from db.headcount import HEADCOUNT_COLUMNS, get_headcount_index
+from db.name_index import NAME_INDEX_COLUMNS, get_name_index
+from utils.conditional import employee_version_key, mark_unversioned, written_version_keys
+from utils.shared_cache import get_versions
+
+
+logger = logging.getLogger("app")
+
+
+# ============================================================================================
+# Storage Backend Interface
+# ============================================================================================
+
+
+class StorageBackend(ABC):
+    """
+    Operations on employee and document data.
+    Signatures and return values are same as the functions of db/employee.py.
+    """
+
+    name: str = ""
+    in_process: bool = False  # data is in this process (no employee cache or group index in front of it)
+
+    def is_ready(self) -> bool:
+        """ Check whether the backend can serve requests """
+        return True
+
+    @abstractmethod
+    def unit_of_work(self) -> ContextManager:
+        """ Run the operations in the block atomically (see init_pool.unit_of_work) """
+
+    @abstractmethod
+    def create_employee(self, employee_data: dict) -> int: ...
+
+    @abstractmethod
+    def create_employees(self, employees_data: List[dict]) -> List[int]: ...
+
+    @abstractmethod
+    def get_employee(self, employee_id: int, columns: Optional[Sequence[str]] = None) -> dict: ...
+
+    @abstractmethod
+    def get_employees_by_ids(self, employee_ids: Sequence[int], columns: Optional[Sequence[str]] = None) -> List[dict]: ...
+
+    @abstractmethod
+    def get_employees_by_position(self, position_id: int, columns: Optional[Sequence[str]] = None) -> List[dict]: ...
+
+    @abstractmethod
+    def get_employees_by_department(self, department_id: int, columns: Optional[Sequence[str]] = None) -> List[dict]: ...
+
+    @abstractmethod
+    def inactivate_employee(self, employee_id: int) -> None: ...
+
+    @abstractmethod
+    def promote_employee(self, employee_id: int, new_position: int) -> None: ...
+
+    @abstractmethod
+    def transfer_employee(self, employee_id: int, new_department: int) -> None: ...
+
+    @abstractmethod
+    def inactivate_employees(self, employee_ids: List[int]) -> List[int]: ...
+
+    @abstractmethod
+    def promote_employees(self, employee_ids: List[int], new_position: int) -> List[int]: ...
+
+    @abstractmethod
+    def transfer_employees(self, employee_ids: List[int], new_department: int) -> List[int]: ...
+
+    @abstractmethod
+    def get_employees(self, offset: int, limit: int,
+                      columns: Optional[Sequence[str]] = None) -> Tuple[Tuple[str, ...], List[tuple]]: ...
+
+    @abstractmethod
+    def get_documents(self, offset: int, limit: int) -> Tuple[Tuple[str, ...], List[tuple]]: ...
+
+    @abstractmethod
+    def get_employees_after(self, last_id: int, limit: int,
+                            columns: Optional[Sequence[str]] = None) -> Tuple[Tuple[str, ...], List[tuple]]: ...
+
+    @abstractmethod
+    def get_documents_after(self, last_id: int, limit: int) -> Tuple[Tuple[str, ...], List[tuple]]: ...
+
+    @abstractmethod
+    def search_employees(self, filters: dict, last_id: int, limit: int,
+                         columns: Optional[Sequence[str]] = None) -> Tuple[Tuple[str, ...], List[tuple]]: ...
+
+    @abstractmethod
+    def iter_employees(self, chunk_size: int, columns: Optional[Sequence[str]] = None) -> Iterator[List[dict]]: ...
+
+    @abstractmethod
+    def get_headcounts(self, columns: Sequence[str]) -> Tuple[Tuple[str, ...], List[tuple]]: ...
+
+
+class MySQLBackend(StorageBackend):
+    """ MySQL backend with the connection pool of db/init_pool.py """
+
+    name = "mysql"
+
+    def is_ready(self) -> bool:
+        return init_pool.is_db_pool_ready()
+
+    def unit_of_work(self) -> ContextManager:
+        return init_pool.unit_of_work()
+
+    create_employee = staticmethod(employee.create_employee)
+    create_employees = staticmethod(employee.create_employees)
+    get_employee = staticmethod(employee.get_employee)
+    get_employees_by_ids = staticmethod(employee.get_employees_by_ids)
+    get_employees_by_position = staticmethod(employee.get_employees_by_position)
+    get_employees_by_department = staticmethod(employee.get_employees_by_department)
+    inactivate_employee = staticmethod(employee.inactivate_employee)
+    promote_employee = staticmethod(employee.promote_employee)
+    transfer_employee = staticmethod(employee.transfer_employee)
+    inactivate_employees = staticmethod(employee.inactivate_employees)
+    promote_employees = staticmethod(employee.promote_employees)
+    transfer_employees = staticmethod(employee.transfer_employees)
+    get_employees = staticmethod(employee.get_employees)
+    get_documents = staticmethod(employee.get_documents)
+    get_employees_after = staticmethod(employee.get_employees_after)
+    get_documents_after = staticmethod(employee.get_documents_after)
+    search_employees = staticmethod(employee.search_employees)
+    iter_employees = staticmethod(employee.iter_employees)
+    get_headcounts = staticmethod(employee.get_headcounts)
+
+
+# ============================================================================================
+# Global variables for storage backend
+# ============================================================================================
+
+
+STORAGE_BACKEND: StorageBackend = MySQLBackend()
+
+
+def make_storage_backend(settings: Settings) -> StorageBackend:
+    """ Make the storage backend of the settings (APP__STORAGE__BACKEND) """
+    if settings.storage.backend == "memory":
+        from db.memory_backend import MemoryBackend
+        return MemoryBackend()
+    return MySQLBackend()
+
+
+def set_storage_backend(backend: StorageBackend) -> StorageBackend:
+    """ Set the storage backend of the current process """
+    global STORAGE_BACKEND
+
+    STORAGE_BACKEND = backend
+    logger.info(f"Storage backend: {backend.name}")
+    return STORAGE_BACKEND
+
+
+def get_storage_backend() -> StorageBackend:
+    """ Get the storage backend of the current process """
+    return STORAGE_BACKEND
+
+
+# ============================================================================================
+# Employee Operations of the current backend
+# ============================================================================================
+
+
+# written employee IDs, index updates and version bumps of the unit of work (or the write) of the current thread
+UNIT_OF_WORK_STATE = threading.local()
+
+
+def _invalidate_employees(employee_ids: Iterable[int]):
+    """
+    Invalidate the cached employees, and bump their versions (ETag / Last-Modified).
+    In a unit of work, this is done again after the transaction, because a concurrent read
+    before the commit can cache the old row (or get the new version with the old row).
+    The bumps are kept for the indexes, which follow them once the write is applied. (see SyncedVersions)
+    """
+    employee_ids = list(employee_ids)
+    cache, versions = get_employee_cache(), get_versions()
+    if cache is not None:
+        cache.invalidate(employee_ids)
+    if versions is not None:
+        bumps = versions.bump(written_version_keys(employee_ids))
+        version_bumps = getattr(UNIT_OF_WORK_STATE, "version_bumps", None)
+        if version_bumps is not None:
+            version_bumps.append(bumps)
+
+    written_ids = getattr(UNIT_OF_WORK_STATE, "written_ids", None)
+    if written_ids is not None:
+        written_ids.update(employee_ids)
+
+
+def _write_indexes() -> list:
+    """ In-memory indexes of the current process which follow the writes (group, name and headcount indexes) """
+    indexes = [get_name_index(), get_headcount_index()]
+    if not STORAGE_BACKEND.in_process:  # the in-process backend has the group indexes itself
+        indexes.append(get_group_index())
+    return [x for x in indexes if x is not None]
+
+
+def _sync_indexes(version_bumps: list):
+    """ Make the indexes follow the version bumps of the writes which have been applied to them """
+    for index in _write_indexes():
+        synced_versions = getattr(index, "versions", None)  # indexes which are served with validators
+        if synced_versions is not None and version_bumps:
+            synced_versions.advance(version_bumps)
+
+
+def _update_indexes(update: Callable[[object], None]):
+    """
+    Update the in-memory indexes after a write.
+    In a unit of work, the update runs after the commit (and is dropped on rollback).
+    """
+    indexes = _write_indexes()
+    if not indexes:
+        return
+
+    def update_all():
+        for index in indexes:
+            update(index)
+
+    index_updates = getattr(UNIT_OF_WORK_STATE, "index_updates", None)
+    if index_updates is not None:
+        index_updates.append(update_all)
+    else:
+        update_all()
+        _sync_indexes(getattr(UNIT_OF_WORK_STATE, "version_bumps", None))
+
+
+def _refresh_index(employee_ids: Optional[Sequence[int]]):
+    """ Index update which reads the written employees again """
+    _update_indexes(lambda index: index.refresh(employee_ids or (), STORAGE_BACKEND.get_employee,
+                                                STORAGE_BACKEND.get_employees_after))
+
+
+def _update_index(employee_ids: Optional[Sequence[int]], column: str, value: int):
+    """ Index update which sets a group column of the written employees """
+    _update_indexes(lambda index: index.update(employee_ids or (), column, value))
+
+
+def _dispatch(name: str, written_ids: Callable[[tuple, object], Iterable[int]] = None,
+              index_update: Callable[[tuple, object], None] = None):
+    """
+    Make a function which calls the operation of the current backend.
+    :param name: name of the operation
+    :param written_ids: function of (args, result) which returns the written employee IDs (for write operations)
+    :param index_update: function of (args, result) which updates the group index (for write operations)
+    """
+    def call(*args, **kwargs):
+        if written_ids is not None and getattr(UNIT_OF_WORK_STATE, "written_ids", None) is None:
+            UNIT_OF_WORK_STATE.version_bumps = list()  # bumps of this write (outside a unit of work)
+        result = getattr(STORAGE_BACKEND, name)(*args, **kwargs)
+        if written_ids is not None:
+            _invalidate_employees(written_ids(args, result) or ())
+        if index_update is not None:
+            index_update(args, result)
+        return result
+
+    call.__name__ = call.__qualname__ = name
+    call.__doc__ = getattr(employee, name).__doc__
+    return call
+
+
+@contextmanager
+def unit_of_work() -> Iterator:
+    """
+    Run the operations in the block in one transaction of the current backend.
+    ex)
+        with unit_of_work():
+            promote_employee(employee_id, position_id)
+            transfer_employee(employee_id, department_id)
+    """
+    outermost = getattr(UNIT_OF_WORK_STATE, "written_ids", None) is None
+    if outermost:
+        UNIT_OF_WORK_STATE.written_ids = set()
+        UNIT_OF_WORK_STATE.index_updates = list()
+        UNIT_OF_WORK_STATE.version_bumps = list()
+
+    committed = False
+    try:
+        with STORAGE_BACKEND.unit_of_work() as session:
+            yield session
+        committed = True
+    finally:
+        if outermost:
+            written_ids, UNIT_OF_WORK_STATE.written_ids = UNIT_OF_WORK_STATE.written_ids, None
+            index_updates, UNIT_OF_WORK_STATE.index_updates = UNIT_OF_WORK_STATE.index_updates, None
+            if written_ids:
+                _invalidate_employees(written_ids)
+            version_bumps, UNIT_OF_WORK_STATE.version_bumps = UNIT_OF_WORK_STATE.version_bumps, None
+            if committed:
+                for update in index_updates:
+                    update()
+                _sync_indexes(version_bumps)
+
+
+def _shared_versions(employee_ids: Sequence[int]) -> Optional[dict]:
+    """ Get {id: shared version} of the employees for the employee cache (None without shared versions) """
+    versions = get_versions()
+    if versions is None:
+        return None
+    employee_ids = list(dict.fromkeys(employee_ids))
+    return dict(zip(employee_ids, versions.get_each([employee_version_key(x) for x in employee_ids])))
+
+
+def _load_from_primary(load: Callable) -> Callable:
+    """
+    Make a cache fill read the primary. The invalidation of a write is done at the commit,
+    so a miss right after it could read the old row from a lagging replica and cache it until the TTL.
+    """
+    def wrapper(*args, **kwargs):
+        with init_pool.read_primary():
+            return load(*args, **kwargs)
+    return wrapper
+
+
+def get_employee(employee_id: int, columns: Optional[Sequence[str]] = None) -> dict:
+    """
+    Get an employee record by ID, through the employee cache (misses are read from the primary)
+    :param employee_id: The ID of the employee
+    :param columns: The columns to select (None for all columns)
+    :return: A dictionary containing employee information
+    """
+    cache = get_employee_cache()
+    if cache is None or STORAGE_BACKEND.in_process:
+        return STORAGE_BACKEND.get_employee(employee_id, columns)
+
+    employee._select_columns(columns)  # raise ValueError for invalid columns
+    shared_versions = _shared_versions([employee_id])
+    return cache.get(employee_id, _load_from_primary(STORAGE_BACKEND.get_employee), columns,
+                     shared_versions and shared_versions[employee_id])
+
+
+def get_employees_by_ids(employee_ids: Sequence[int], columns: Optional[Sequence[str]] = None) -> Optional[List[dict]]:
+    """
+    Get employee records by IDs through the employee cache, reading the misses from the primary with chunked
+    `WHERE id IN (...)` queries
+    :param employee_ids: The IDs of the employees
+    :param columns: The columns to select (None for all columns)
+    :return: A list of dictionaries of the found employees in ID order (None on a database error)
+    """
+    cache = get_employee_cache()
+    if cache is None or STORAGE_BACKEND.in_process:
+        return STORAGE_BACKEND.get_employees_by_ids(employee_ids, columns)
+
+    employee._select_columns(columns)  # raise ValueError for invalid columns
+    found = cache.get_many(employee_ids, _load_from_primary(STORAGE_BACKEND.get_employees_by_ids), columns,
+                           _shared_versions(employee_ids))
+    return None if found is None else [found[x] for x in sorted(found)]
+
+
+def _get_group(column: str):
+    """
+    Make a function which gets employees of a group from the group index (no query).
+    The group is read by the indexed query of the backend (on a replica) until the index is loaded,
+    and while another worker has written since.
+    """
+    backend_name = f"get_employees_by_{column}"
+
+    def call(value: int, columns: Optional[Sequence[str]] = None) -> List[dict]:
+        index = get_group_index()
+        if index is None or not index.ready or STORAGE_BACKEND.in_process:
+            return getattr(STORAGE_BACKEND, backend_name)(value, columns)
+        if not index.versions.is_current():  # written by another worker, read from the database until reloaded
+            index.wakeup.set()
+            return getattr(STORAGE_BACKEND, backend_name)(value, columns)
+        return index.get_group(column, value, columns)
+
+    call.__name__ = call.__qualname__ = backend_name
+    call.__doc__ = getattr(employee, backend_name).__doc__
+    return call
+
+
+def start_group_index(settings: Settings) -> Optional[threading.Thread]:
+    """ Load the group index of the current process from the current backend in the background (see db/group_index.py) """
+    return group_index.start_group_index(lambda *args: STORAGE_BACKEND.get_employees_after(*args),
+                                         lambda: STORAGE_BACKEND.is_ready(), settings.index.group_reconcile_seconds)
+
+
+def start_name_index(settings: Settings) -> Optional[threading.Thread]:
+    """ Load the name index of the current process from the current backend in the background (see db/name_index.py) """
+    return name_index.start_name_index(lambda *args: STORAGE_BACKEND.get_employees_after(*args),
+                                       lambda: STORAGE_BACKEND.is_ready(), settings.index.name_reconcile_seconds)
+
+
+def search_names(query: str, limit: int,
+                 include_inactive: bool = False) -> Optional[Tuple[Tuple[str, ...], List[tuple]]]:
+    """
+    Search employees by the words of first_name, surname and email with the name index (type-ahead).
+    :param query: words to search (prefixes, or substrings of the names)
+    :param limit: the maximum number of rows
+    :param include_inactive: include the inactive employees
+    :return: (column names, tuple rows), or None if the name index is disabled or not loaded yet
+    """
+    index = get_name_index()
+    if index is None or not index.ready:
+        return None
+    if not index.versions.is_current():  # written by another worker, served without validators until reloaded
+        index.wakeup.set()
+        mark_unversioned()
+    return NAME_INDEX_COLUMNS, index.search(query, limit, include_inactive)
+
+
+def start_headcount_index(settings: Settings) -> Optional[threading.Thread]:
+    """ Load the headcount index of the current process from the current backend in the background (see db/headcount.py) """
+    return headcount.start_headcount_index(lambda *args: STORAGE_BACKEND.get_employees_after(*args),
+                                           lambda: STORAGE_BACKEND.is_ready(),
+                                           settings.index.headcount_reconcile_seconds)
+
+
+def get_headcounts(columns: Sequence[str] = HEADCOUNT_COLUMNS) -> Optional[Tuple[List[tuple], int]]:
+    """
+    Get the headcounts grouped by department, position and status (or some of them) from the headcount index.
+    They are counted by the backend while another worker has written since the index was synced (until reloaded).
+    :param columns: columns to group by (ex - ("department",))
+    :return: (tuple rows of the column values and the headcount, total headcount),
+             or None if the headcount index is disabled or not loaded yet
+    """
+    index = get_headcount_index()
+    if index is None or not index.ready:
+        return None
+    if not STORAGE_BACKEND.in_process and not index.versions.is_current():
+        index.wakeup.set()
+        counted = STORAGE_BACKEND.get_headcounts(columns)
+        if counted is not None:  # the counters of this worker are served on a database error
+            _, rows = counted
+            return rows, sum(x[-1] for x in rows)
+    return index.get_counts(columns)
+
+
+create_employee = _dispatch("create_employee", lambda args, result: [result] if result else None,
+                            lambda args, result: _refresh_index([result] if result else None))
+create_employees = _dispatch("create_employees", lambda args, result: result,
+                             lambda args, result: _refresh_index(result))
+get_employees_by_position = _get_group("position")
+get_employees_by_department = _get_group("department")
+inactivate_employee = _dispatch("inactivate_employee", lambda args, result: [args[0]],
+                                lambda args, result: _refresh_index([args[0]]))
+promote_employee = _dispatch("promote_employee", lambda args, result: [args[0]],
+                             lambda args, result: _refresh_index([args[0]]))
+transfer_employee = _dispatch("transfer_employee", lambda args, result: [args[0]],
+                              lambda args, result: _refresh_index([args[0]]))
+inactivate_employees = _dispatch("inactivate_employees", lambda args, result: args[0],
+                                 lambda args, result: _update_index(result, "status", 0))
+promote_employees = _dispatch("promote_employees", lambda args, result: args[0],
+                              lambda args, result: _update_index(result, "position", args[1]))
+transfer_employees = _dispatch("transfer_employees", lambda args, result: args[0],
+                               lambda args, result: _update_index(result, "department", args[1]))
+get_employees = _dispatch("get_employees")
+get_documents = _dispatch("get_documents")
+get_employees_after = _dispatch("get_employees_after")
+get_documents_after = _dispatch("get_documents_after")
+search_employees = _dispatch("search_employees")
+iter_employees = _dispatch("iter_employees")
@@ -0,0 +1,224 @@
+"""
+Read-through cache of employee records (per worker process).
+Records are cached by ID with LRU eviction, TTL and a memory bound, and are invalidated by ID
+when the employee is written. (see db/backend.py)
+With shared versions, a record is cached with the version of the employee read before loading it,
+and is only served while the version is the same (not written by another worker since).
+"""
+
+from collections import OrderedDict
+import logging
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import Settings
+
+
+logger = logging.getLogger("app")
+
+
+# ============================================================================================
+# Employee Cache
+# ============================================================================================
+
+
+def _estimate_size(employee_id: int, row: dict) -> int:
+    """ Estimate the memory of a cache entry in bytes (keys of the row are shared strings) """
+    return sys.getsizeof(employee_id) + 64 + sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+
+
+class EmployeeCache:
+    """
+    LRU cache of full employee rows by ID.
+    Missing employees are not cached, because the database functions also return None on errors.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        # id -> (row, expires, size, shared version)
+        self._entries: "OrderedDict[int, Tuple[dict, float, int, Optional[str]]]" = OrderedDict()
+        self._bytes = 0
+        self._version = 0  # bumped by every invalidation, a read which raced with a write is not cached
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale = 0  # entries written by other workers (their shared versions have moved)
+
+    def _lookup(self, employee_id: int, now: float, shared_version: Optional[str]) -> Optional[dict]:
+        """ Get the row of a valid entry, removing an expired or stale one (lock must be held) """
+        entry = self._entries.get(employee_id)
+        if entry is not None and entry[1] > now and entry[3] == shared_version:
+            self._entries.move_to_end(employee_id)
+            self.hits += 1
+            return entry[0]
+        if entry is not None:
+            self._remove(employee_id)
+            if entry[1] > now:
+                self.stale += 1
+            else:
+                self.expirations += 1
+        self.misses += 1
+        return None
+
+    def get(self, employee_id: int, load: Callable[[int], Optional[dict]],
+            columns: Optional[Sequence[str]] = None, shared_version: Optional[str] = None) -> Optional[dict]:
+        """
+        Get an employee row from the cache, or load it on a miss.
+        :param employee_id: The ID of the employee
+        :param load: function which reads the full row of the employee (None if not found)
+        :param columns: The columns to return (None for all columns)
+        :param shared_version: current shared version of the employee (None without shared versions)
+        :return: copy of the row (projected to the columns), or None if not found
+        """
+        now = time.monotonic()
+        with self._lock:
+            row = self._lookup(employee_id, now, shared_version)
+            if row is not None:
+                return self._project(row, columns)
+            version = self._version
+
+        row = load(employee_id)
+
+        with self._lock:
+            if row is not None and version == self._version:  # no write while loading
+                self._put(employee_id, row, now + self.ttl_seconds, shared_version)
+        return self._project(row, columns)
+
+    def get_many(self, employee_ids: Iterable[int], load_many: Callable[[Sequence[int]], Optional[List[dict]]],
+                 columns: Optional[Sequence[str]] = None,
+                 shared_versions: Optional[Dict[int, str]] = None) -> Optional[Dict[int, dict]]:
+        """
+        Get employee rows from the cache, and load all the misses at once.
+        :param employee_ids: The IDs of the employees
+        :param load_many: function which reads the full rows of employees by IDs (None on errors)
+        :param columns: The columns to return (None for all columns)
+        :param shared_versions: {id: current shared version} of the employees (None without shared versions)
+        :return: {id: copy of the row (projected to the columns)} of the found employees, or None if loading failed
+        """
+        now = time.monotonic()
+        shared_versions = shared_versions or dict()
+        found, missing = dict(), list()
+        with self._lock:
+            for employee_id in dict.fromkeys(employee_ids):
+                row = self._lookup(employee_id, now, shared_versions.get(employee_id))
+                if row is not None:
+                    found[employee_id] = self._project(row, columns)
+                else:
+                    missing.append(employee_id)
+            version = self._version
+
+        if not missing:
+            return found
+        rows = load_many(missing)
+        if rows is None:
+            return None
+
+        with self._lock:
+            for row in rows:
+                if version == self._version:  # no write while loading
+                    self._put(row["id"], row, now + self.ttl_seconds, shared_versions.get(row["id"]))
+                found[row["id"]] = self._project(row, columns)
+        return found
+
+    def invalidate(self, employee_ids: Iterable[int]):
+        """ Remove the employees from the cache """
+        with self._lock:
+            self._version += 1
+            for employee_id in employee_ids:
+                if employee_id in self._entries:
+                    self._remove(employee_id)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale": self.stale,
+            }
+
+    @staticmethod
+    def _project(row: Optional[dict], columns: Optional[Sequence[str]]) -> Optional[dict]:
+        if row is None:
+            return None
+        if not columns:
+            return dict(row)
+        return {name: row[name] for name in columns}
+
+    def _put(self, employee_id: int, row: dict, expires: float, shared_version: Optional[str]):
+        if employee_id in self._entries:
+            self._remove(employee_id)
+        size = _estimate_size(employee_id, row)
+        if size > self.max_bytes:
+            return
+        self._entries[employee_id] = (row, expires, size, shared_version)
+        self._bytes += size
+
+        # evict least recently used entries
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, _, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _remove(self, employee_id: int):
+        _, _, size, _ = self._entries.pop(employee_id)
+        self._bytes -= size
+
+
+# ============================================================================================
+# Global variables for employee cache
+# ============================================================================================
+
+
+EMPLOYEE_CACHE: EmployeeCache = None
+
+
+def set_employee_cache(settings: Settings) -> Optional[EmployeeCache]:
+    """ Set the employee cache of the current process (None if disabled by APP__CACHE__EMPLOYEE_ENABLED) """
+    global EMPLOYEE_CACHE
+
+    if settings.cache.employee_enabled:
+        EMPLOYEE_CACHE = EmployeeCache(settings.cache.employee_max_entries, settings.cache.employee_max_bytes,
+                                       settings.cache.employee_ttl_seconds)
+    else:
+        EMPLOYEE_CACHE = None
+    return EMPLOYEE_CACHE
+
+
+def get_employee_cache() -> Optional[EmployeeCache]:
+    return EMPLOYEE_CACHE
+
+
+def get_cache_stats() -> dict:
+    """
+    Get counters of the employee cache of the current process.
+    :return: dictionary of hits, misses, evictions and size, or {"enabled": False}
+    """
+    if EMPLOYEE_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **EMPLOYEE_CACHE.to_dict()}
@@ -1,15 +1,39 @@
 """ Some execution context for employee database operations """
 
 import logging
-from typing import List
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 import pymysql
 
-from db import db_session_auto_close
+from db import db_session_auto_close, db_transaction_auto_close, db_stream_auto_close
 
 
 logger = logging.getLogger("app")
 
+BULK_INSERT_BATCH_SIZE = 200  # max rows per multi-row INSERT statement
+BULK_INSERT_MAX_BYTES = 1024 * 1024  # max encoded size of a multi-row INSERT statement (rows of long descriptions)
+BULK_UPDATE_CHUNK_SIZE = 1000  # ids per `WHERE id IN (...)` statement
+BULK_SELECT_CHUNK_SIZE = 1000  # ids per `WHERE id IN (...)` query of get_employees_by_ids
+
+EMPLOYEE_COLUMNS = ("id", "first_name", "surname", "position", "department", "phone_number", "email",
+                    "birth_date", "status", "description", "register_time")
+SEARCH_FILTER_COLUMNS = ("position", "department", "status")  # equality filters of search_employees
+
+
+def _select_columns(columns: Optional[Sequence[str]]) -> str:
+    """
+    Make column list of SELECT statement for employee_list.
+    :param columns: column names to select (None for all columns)
+    :return: column list for SQL
+    :raise ValueError: if there's a column which is not in employee_list
+    """
+    if not columns:
+        return "*"
+    invalid = set(columns) - set(EMPLOYEE_COLUMNS)
+    if invalid:
+        raise ValueError(f"Invalid columns: {','.join(sorted(invalid))}")
+    return ", ".join(f"`{x}`" for x in columns)
+
 
 # ============================================================================================
 # Employee Database Operations
@@ -31,41 +55,112 @@ def create_employee(employee_data: dict, cursor: pymysql.cursors.DictCursor=None
     return cursor.lastrowid
 
 
-@db_session_auto_close
-def get_employee(employee_id: int, cursor: pymysql.cursors.DictCursor=None) -> dict:
+@db_transaction_auto_close
+def create_employees(employees_data: List[dict], cursor: pymysql.cursors.DictCursor=None) -> List[int]:
+    """
+    Create employee records in one transaction.
+    The IDs of a multi-row INSERT are only consecutive (by auto_increment_increment) when the server allocates
+    them per statement (innodb_autoinc_lock_mode 0 or 1), so the rows are inserted with multi-row INSERTs in that case,
+    and one by one with the ID of each row read back otherwise (innodb_autoinc_lock_mode 2, the default of MySQL 8,
+    where concurrent inserts interleave their IDs).
+    The multi-row INSERTs are built here, one statement per batch of BULK_INSERT_BATCH_SIZE rows and
+    BULK_INSERT_MAX_BYTES at most, because executemany splits a large batch into several statements.
+    :param employees_data: A list of dictionaries containing employee information
+    :param cursor: The database cursor
+    :return: The IDs of the newly created employee records, in the same order as employees_data
+    """
+    query = "INSERT INTO employee_list " \
+    "(first_name, surname, position, department, phone_number, email, birth_date, status, description, register_time) " \
+    "VALUES "
+    values = "(%(first_name)s, %(surname)s, %(position)s, %(department)s, %(phone_number)s, %(email)s, %(birth_date)s, %(status)s, %(description)s, %(register_time)s)"
+
+    cursor.execute("SELECT @@innodb_autoinc_lock_mode AS lock_mode, @@auto_increment_increment AS increment")
+    autoinc = cursor.fetchone()
+
+    employee_ids = list()
+    if autoinc["lock_mode"] not in (0, 1):
+        for employee_data in employees_data:
+            cursor.execute(query + values, employee_data)
+            employee_ids.append(cursor.lastrowid)
+        return employee_ids
+
+    increment = autoinc["increment"]
+
+    def insert(rows: List[str]):
+        # one statement per batch, whose rows get consecutive IDs from LAST_INSERT_ID() (the ID of the first row)
+        cursor.execute(query + ",".join(rows))
+        employee_ids.extend(range(cursor.lastrowid, cursor.lastrowid + len(rows) * increment, increment))
+
+    batch, batch_bytes = list(), len(query)
+    for employee_data in employees_data:
+        row = cursor.mogrify(values, employee_data)
+        row_bytes = len(row.encode("utf-8")) + 1
+        if batch and (len(batch) >= BULK_INSERT_BATCH_SIZE or batch_bytes + row_bytes > BULK_INSERT_MAX_BYTES):
+            insert(batch)
+            batch, batch_bytes = list(), len(query)
+        batch.append(row)
+        batch_bytes += row_bytes
+    if batch:
+        insert(batch)
+    return employee_ids
+
+
+@db_session_auto_close(read_only=True)
+def get_employee(employee_id: int, columns: Optional[Sequence[str]]=None, cursor: pymysql.cursors.DictCursor=None) -> dict:
     """
     Get an employee record by ID
     :param employee_id: The ID of the employee
+    :param columns: The columns to select (None for all columns)
     :param cursor: The database cursor
     :return: A dictionary containing employee information
     """
-    query = "SELECT * FROM employee_list WHERE id = %(employee_id)s"
+    query = f"SELECT {_select_columns(columns)} FROM employee_list WHERE id = %(employee_id)s"
     cursor.execute(query, {"employee_id": employee_id})
     return cursor.fetchone()
 
 
-@db_session_auto_close
-def get_employees_by_position(position_id: int, cursor: pymysql.cursors.DictCursor=None) -> List[dict]:
+@db_session_auto_close(read_only=True)
+def get_employees_by_ids(employee_ids: Sequence[int], columns: Optional[Sequence[str]]=None, cursor: pymysql.cursors.DictCursor=None) -> List[dict]:
+    """
+    Get employee records by IDs with chunked `WHERE id IN (...)` queries
+    :param employee_ids: The IDs of the employees (duplicates are read once)
+    :param columns: The columns to select (None for all columns, include `id` to tell the rows apart)
+    :param cursor: The database cursor
+    :return: A list of dictionaries of the found employees, in ID order
+    """
+    employee_ids = sorted(set(employee_ids))
+    query = f"SELECT {_select_columns(columns)} FROM employee_list WHERE id IN %(employee_ids)s ORDER BY id"
+    rows = list()
+    for i in range(0, len(employee_ids), BULK_SELECT_CHUNK_SIZE):
+        cursor.execute(query, {"employee_ids": tuple(employee_ids[i:i + BULK_SELECT_CHUNK_SIZE])})
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+@db_session_auto_close(read_only=True)
+def get_employees_by_position(position_id: int, columns: Optional[Sequence[str]]=None, cursor: pymysql.cursors.DictCursor=None) -> List[dict]:
     """
     Get a list of employees by position ID
     :param position_id: The ID of the position
+    :param columns: The columns to select (None for all columns)
     :param cursor: The database cursor
     :return: A list of dictionaries containing employee information
     """
-    query = "SELECT * FROM employee_list WHERE position = %(position)s"
+    query = f"SELECT {_select_columns(columns)} FROM employee_list WHERE position = %(position)s"
     cursor.execute(query, {"position": position_id})
     return cursor.fetchall()
 
 
-@db_session_auto_close
-def get_employees_by_department(department_id: int, cursor: pymysql.cursors.DictCursor=None) -> List[dict]:
+@db_session_auto_close(read_only=True)
+def get_employees_by_department(department_id: int, columns: Optional[Sequence[str]]=None, cursor: pymysql.cursors.DictCursor=None) -> List[dict]:
     """
     Get a list of employees by department ID
     :param department_id: The ID of the department
+    :param columns: The columns to select (None for all columns)
     :param cursor: The database cursor
     :return: A list of dictionaries containing employee information
     """
-    query = "SELECT * FROM employee_list WHERE department = %(department)s"
+    query = f"SELECT {_select_columns(columns)} FROM employee_list WHERE department = %(department)s"
     cursor.execute(query, {"department": department_id})
     return cursor.fetchall()
 
@@ -105,25 +200,183 @@ def transfer_employee(employee_id: int, new_department: int, cursor: pymysql.cur
     cursor.execute(query, {"employee_id": employee_id, "new_department": new_department})
 
 
-@db_session_auto_close
-def get_employees(offset: int, limit: int, cursor: pymysql.cursors.DictCursor=None) -> List[dict]:
+def _update_employees_by_ids(set_clause: str, params: dict, employee_ids: List[int],
+                             cursor: pymysql.cursors.DictCursor) -> List[int]:
+    """
+    Update employee records by chunked `WHERE id IN (...)` statements.
+    Rows are locked before the update, so the returned IDs are exactly the updated records.
+    :param set_clause: SET clause of the UPDATE statement
+    :param params: parameters of the SET clause
+    :param employee_ids: The IDs of the employees
+    :param cursor: The database cursor
+    :return: The IDs of the existing (updated) employee records
+    """
+    updated_ids = list()
+    for i in range(0, len(employee_ids), BULK_UPDATE_CHUNK_SIZE):
+        chunk = tuple(employee_ids[i:i + BULK_UPDATE_CHUNK_SIZE])
+        cursor.execute("SELECT id FROM employee_list WHERE id IN %(employee_ids)s FOR UPDATE", {"employee_ids": chunk})
+        found_ids = [row["id"] for row in cursor.fetchall()]
+        if not found_ids:
+            continue
+        query = f"UPDATE employee_list SET {set_clause} WHERE id IN %(employee_ids)s"
+        cursor.execute(query, {**params, "employee_ids": tuple(found_ids)})
+        updated_ids.extend(found_ids)
+    return updated_ids
+
+
+@db_transaction_auto_close
+def inactivate_employees(employee_ids: List[int], cursor: pymysql.cursors.DictCursor=None) -> List[int]:
+    """
+    Inactivate employee records by IDs in one transaction
+    :param employee_ids: The IDs of the employees
+    :param cursor: The database cursor
+    :return: The IDs of the updated employee records
+    """
+    return _update_employees_by_ids("status = 0", {}, employee_ids, cursor)
+
+
+@db_transaction_auto_close
+def promote_employees(employee_ids: List[int], new_position: int, cursor: pymysql.cursors.DictCursor=None) -> List[int]:
+    """
+    Promote employees to a new position in one transaction
+    :param employee_ids: The IDs of the employees
+    :param new_position: The new position ID
+    :param cursor: The database cursor
+    :return: The IDs of the updated employee records
+    """
+    return _update_employees_by_ids("position = %(new_position)s", {"new_position": new_position}, employee_ids, cursor)
+
+
+@db_transaction_auto_close
+def transfer_employees(employee_ids: List[int], new_department: int, cursor: pymysql.cursors.DictCursor=None) -> List[int]:
+    """
+    Transfer employees to a new department in one transaction
+    :param employee_ids: The IDs of the employees
+    :param new_department: The new department ID
+    :param cursor: The database cursor
+    :return: The IDs of the updated employee records
+    """
+    return _update_employees_by_ids("department = %(new_department)s", {"new_department": new_department}, employee_ids, cursor)
+
+
+def _fetch_rows(cursor: pymysql.cursors.Cursor) -> Tuple[Tuple[str, ...], List[tuple]]:
+    """ Fetch all tuple rows with their column names """
+    return tuple(x[0] for x in cursor.description), cursor.fetchall()
+
+
+@db_session_auto_close(read_only=True, cursor_class=pymysql.cursors.Cursor)
+def get_employees(offset: int, limit: int, columns: Optional[Sequence[str]]=None, cursor: pymysql.cursors.Cursor=None) -> Tuple[Tuple[str, ...], List[tuple]]:
     """
     Get Employee's data by pagenation.
     :param offset: The offset of the page
     :param limit: The number of records to return
+    :param columns: The columns to select (None for all columns)
+    :return: (column names, tuple rows) - decode rows with utils.get_row_decoder
     """
-    query = "SELECT * FROM employee_list LIMIT %(offset)s, %(limit)s"
+    query = f"SELECT {_select_columns(columns)} FROM employee_list LIMIT %(offset)s, %(limit)s"
     cursor.execute(query, {"offset": offset, "limit": limit})
-    return cursor.fetchall()
+    return _fetch_rows(cursor)
 
 
-@db_session_auto_close
-def get_documents(offset: int, limit: int, cursor: pymysql.cursors.DictCursor=None) -> List[dict]:
+@db_session_auto_close(read_only=True, cursor_class=pymysql.cursors.Cursor)
+def get_documents(offset: int, limit: int, cursor: pymysql.cursors.Cursor=None) -> Tuple[Tuple[str, ...], List[tuple]]:
     """
     Get Document's data by pagenation.
     :param offset: The offset of the page
     :param limit: The number of records to return
+    :return: (column names, tuple rows) - decode rows with utils.get_row_decoder
     """
     query = "SELECT * FROM document_approval LIMIT %(offset)s, %(limit)s"
     cursor.execute(query, {"offset": offset, "limit": limit})
-    return cursor.fetchall()
\ No newline at end of file
+    return _fetch_rows(cursor)
+
+
+@db_session_auto_close(read_only=True, cursor_class=pymysql.cursors.Cursor)
+def get_employees_after(last_id: int, limit: int, columns: Optional[Sequence[str]]=None, cursor: pymysql.cursors.Cursor=None) -> Tuple[Tuple[str, ...], List[tuple]]:
+    """
+    Get Employee's data by keyset(seek) pagination.
+    Seeks on the primary key, so every page costs the same regardless of its depth.
+    :param last_id: The last employee ID of the previous page (0 for the first page)
+    :param limit: The number of records to return
+    :param columns: The columns to select (None for all columns, `id` is always needed for the next cursor)
+    :return: (column names, tuple rows) - decode rows with utils.get_row_decoder
+    """
+    query = f"SELECT {_select_columns(columns)} FROM employee_list WHERE id > %(last_id)s ORDER BY id LIMIT %(limit)s"
+    cursor.execute(query, {"last_id": last_id, "limit": limit})
+    return _fetch_rows(cursor)
+
+
+@db_session_auto_close(read_only=True, cursor_class=pymysql.cursors.Cursor)
+def search_employees(filters: dict, last_id: int, limit: int, columns: Optional[Sequence[str]]=None, cursor: pymysql.cursors.Cursor=None) -> Tuple[Tuple[str, ...], List[tuple]]:
+    """
+    Search employees by the combination of filters, in ID order by keyset(seek) pagination.
+    Equalities on department, position and status are served by idx_employee_list_department_position_status
+    (ID ordered when all three are given), and the registration range by idx_employee_list_register_time.
+    :param filters: position, department and status codes, registered_from (inclusive) and registered_to (exclusive)
+                    datetimes of register_time - missing or None for no filter
+    :param last_id: The last employee ID of the previous page (0 for the first page)
+    :param limit: The number of records to return
+    :param columns: The columns to select (None for all columns)
+    :return: (column names, tuple rows) - decode rows with utils.get_row_decoder
+    """
+    conditions, params = ["id > %(last_id)s"], {"last_id": last_id, "limit": limit}
+    for name in SEARCH_FILTER_COLUMNS:
+        if filters.get(name) is not None:
+            conditions.append(f"`{name}` = %({name})s")
+            params[name] = filters[name]
+    if filters.get("registered_from") is not None:
+        conditions.append("register_time >= %(registered_from)s")
+        params["registered_from"] = filters["registered_from"]
+    if filters.get("registered_to") is not None:
+        conditions.append("register_time < %(registered_to)s")
+        params["registered_to"] = filters["registered_to"]
+
+    query = f"SELECT {_select_columns(columns)} FROM employee_list WHERE {' AND '.join(conditions)} " \
+            "ORDER BY id LIMIT %(limit)s"
+    cursor.execute(query, params)
+    return _fetch_rows(cursor)
+
+
+@db_session_auto_close(read_only=True, cursor_class=pymysql.cursors.Cursor)
+def get_headcounts(columns: Sequence[str], cursor: pymysql.cursors.Cursor=None) -> Tuple[Tuple[str, ...], List[tuple]]:
+    """
+    Count employees grouped by some of department, position and status
+    (an index-only scan of idx_employee_list_department_position_status).
+    :param columns: The columns to group by (ex - ("department",))
+    :return: (column names, tuple rows of the column values and the headcount, in the order of the values)
+    """
+    group = _select_columns(columns)
+    cursor.execute(f"SELECT {group}, COUNT(*) AS `count` FROM employee_list GROUP BY {group} ORDER BY {group}")
+    return _fetch_rows(cursor)
+
+
+@db_session_auto_close(read_only=True, cursor_class=pymysql.cursors.Cursor)
+def get_documents_after(last_id: int, limit: int, cursor: pymysql.cursors.Cursor=None) -> Tuple[Tuple[str, ...], List[tuple]]:
+    """
+    Get Document's data by keyset(seek) pagination.
+    Seeks on the primary key, so every page costs the same regardless of its depth.
+    :param last_id: The last document ID of the previous page (0 for the first page)
+    :param limit: The number of records to return
+    :return: (column names, tuple rows) - decode rows with utils.get_row_decoder
+    """
+    query = "SELECT * FROM document_approval WHERE id > %(last_id)s ORDER BY id LIMIT %(limit)s"
+    cursor.execute(query, {"last_id": last_id, "limit": limit})
+    return _fetch_rows(cursor)
+
+
+@db_stream_auto_close(read_only=True)
+def iter_employees(chunk_size: int, columns: Optional[Sequence[str]]=None, cursor: pymysql.cursors.SSDictCursor=None) -> Iterator[List[dict]]:
+    """
+    Stream all employee records in chunks with an unbuffered server-side cursor.
+    :param chunk_size: The number of records in each chunk
+    :param columns: The columns to select (None for all columns)
+    :param cursor: The database cursor (unbuffered)
+    :return: An iterator of lists of dictionaries containing employee information
+    """
+    query = f"SELECT {_select_columns(columns)} FROM employee_list ORDER BY id"
+    cursor.execute(query)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
@@ -0,0 +1,319 @@
+"""
+In-memory grouping index of employees by position, department and status (per worker process).
+The index is loaded once from employee_list, updated by the write operations of db/backend.py,
+and reloaded periodically to repair drift (e.g. writes of other clients of the database),
+or as soon as another worker writes (groups are read from the database meanwhile).
+"""
+
+from collections import defaultdict
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from config import Settings
+from db.employee import EMPLOYEE_COLUMNS, _select_columns
+from utils.conditional import GROUP_VERSION_KEYS, SyncedVersions
+
+
+logger = logging.getLogger("app")
+
+GROUP_COLUMNS = ("position", "department", "status")
+GROUP_COLUMN_INDEX = {name: EMPLOYEE_COLUMNS.index(name) for name in GROUP_COLUMNS}
+LOAD_PAGE_SIZE = 5000  # rows per keyset page while loading the index
+RELOAD_MIN_SECONDS = 1.0  # minimum seconds between reloads, even if the index is woken up all the time
+REFRESH_BY_ID_MAX = 16  # refresh more rows than this by keyset pages over their ID range
+
+ReadPage = Callable[[int, int, Sequence[str]], Optional[Tuple[Tuple[str, ...], List[tuple]]]]  # get_employees_after
+ReadRow = Callable[[int], Optional[dict]]  # get_employee
+
+
+def read_rows(employee_ids: Sequence[int], columns: Sequence[str], read_row: ReadRow,
+              read_page: ReadPage) -> Dict[int, tuple]:
+    """
+    Read written employees from the database as tuples of the columns.
+    Few rows are read by ID, and more rows (ex - bulk created) by keyset pages over their ID range.
+    :return: {id: row} of the existing employees
+    """
+    employee_ids = sorted(set(employee_ids))
+    found: Dict[int, tuple] = dict()
+    if not employee_ids:
+        return found
+
+    if len(employee_ids) <= REFRESH_BY_ID_MAX:
+        for employee_id in employee_ids:
+            row = read_row(employee_id)
+            if row is not None:
+                found[employee_id] = tuple(row[name] for name in columns)
+    else:
+        wanted, last_id = set(employee_ids), employee_ids[0] - 1
+        while last_id < employee_ids[-1]:
+            page = read_page(last_id, LOAD_PAGE_SIZE, columns)
+            if not page or not page[1]:
+                break
+            found.update((row[0], tuple(row)) for row in page[1] if row[0] in wanted)
+            last_id = page[1][-1][0]
+    return found
+
+
+# ============================================================================================
+# Group Index
+# ============================================================================================
+
+
+class GroupIndex:
+    """
+    Employee rows (tuples in EMPLOYEE_COLUMNS order) with ID sets per position, department and status,
+    so a group is served without a query. Rows of a group are served in ID order like the primary key order of MySQL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[int, tuple] = dict()
+        self._groups: Dict[str, Dict[int, Set[int]]] = {name: defaultdict(set) for name in GROUP_COLUMNS}
+        self._sorted: Dict[Tuple[str, int], List[int]] = dict()  # (column, value) -> sorted ids, dropped on change
+        self._touched: Optional[Dict[int, Optional[tuple]]] = None  # rows written while loading
+        self.versions = SyncedVersions(GROUP_VERSION_KEYS.values())  # served with the validators of the groups
+        self.wakeup = threading.Event()  # set to reload before the reconcile interval
+
+        self.ready = False
+        self.loads = 0
+        self.failed_loads = 0
+        self.last_load_ms = None
+        self.last_load_time = None
+        self.drifted_rows = 0  # rows which differed from the database at the last load
+        self.hits = 0
+        self.updates = 0
+
+    # ============================================================================================
+    # Storage primitives
+    # ============================================================================================
+
+    @staticmethod
+    def _put(rows: Dict[int, tuple], groups: Dict[str, Dict[int, Set[int]]], employee_id: int,
+             row: Optional[tuple], changed: Set[Tuple[str, int]] = None):
+        """ Replace (or delete with None) a row and update the ID sets """
+        previous = rows.pop(employee_id, None)
+        if previous is not None:
+            for name, position in GROUP_COLUMN_INDEX.items():
+                ids = groups[name][previous[position]]
+                ids.discard(employee_id)
+                if not ids:
+                    del groups[name][previous[position]]
+                if changed is not None:
+                    changed.add((name, previous[position]))
+        if row is None:
+            return
+
+        rows[employee_id] = row
+        for name, position in GROUP_COLUMN_INDEX.items():
+            groups[name][row[position]].add(employee_id)
+            if changed is not None:
+                changed.add((name, row[position]))
+
+    def _apply(self, employee_id: int, row: Optional[tuple]):
+        """ Put a written row to the index (lock must be held) """
+        changed = set()
+        self._put(self._rows, self._groups, employee_id, row, changed)
+        for key in changed:
+            self._sorted.pop(key, None)
+        if self._touched is not None:
+            self._touched[employee_id] = row
+        self.updates += 1
+
+    # ============================================================================================
+    # Load & Reconcile
+    # ============================================================================================
+
+    def load(self, read_page: ReadPage) -> bool:
+        """
+        Load (or reload) the whole index from the database, and swap it with the current one.
+        Rows written while loading keep their written values.
+        :param read_page: function which reads a keyset page of employee rows (get_employees_after)
+        :return: False if a page couldn't be read (the current index is kept)
+        """
+        start_time = time.perf_counter()
+        with self._lock:
+            self._touched = dict()
+        synced = self.versions.start_load()
+
+        rows: Dict[int, tuple] = dict()
+        groups: Dict[str, Dict[int, Set[int]]] = {name: defaultdict(set) for name in GROUP_COLUMNS}
+        last_id = 0
+        while True:
+            page = read_page(last_id, LOAD_PAGE_SIZE, EMPLOYEE_COLUMNS)
+            if page is None:  # database error
+                self.versions.finish_load(None)
+                with self._lock:
+                    self._touched = None
+                    self.failed_loads += 1
+                logger.error("Group index load failed, the current index is kept")
+                return False
+
+            _, page_rows = page
+            for row in page_rows:
+                self._put(rows, groups, row[0], tuple(row))
+            if len(page_rows) < LOAD_PAGE_SIZE:
+                break
+            last_id = page_rows[-1][0]
+
+        with self._lock:
+            for employee_id, row in self._touched.items():
+                if row is not None:
+                    self._put(rows, groups, employee_id, row)
+            drifted_rows = sum(1 for x in rows.keys() | self._rows.keys() if rows.get(x) != self._rows.get(x))
+
+            self._rows, self._groups, self._sorted, self._touched = rows, groups, dict(), None
+            self.versions.finish_load(synced)
+            self.drifted_rows = drifted_rows if self.ready else 0
+            self.ready = True
+            self.loads += 1
+            self.last_load_ms = round((time.perf_counter() - start_time) * 1000, 3)
+            self.last_load_time = time.time()
+
+        if self.drifted_rows:
+            logger.warning(f"Group index reconciled {self.drifted_rows} drifted rows")
+        logger.info(f"Group index loaded: {len(rows)} rows in {self.last_load_ms} ms")
+        return True
+
+    # ============================================================================================
+    # Updates by the write operations
+    # ============================================================================================
+
+    def refresh(self, employee_ids: Sequence[int], read_row: ReadRow, read_page: ReadPage):
+        """
+        Read the written employees from the database and put them to the index.
+        Few rows are read by ID, and more rows (ex - bulk created) by keyset pages over their ID range.
+        """
+        found = read_rows(employee_ids, EMPLOYEE_COLUMNS, read_row, read_page)
+        with self._lock:
+            for employee_id, row in found.items():
+                self._apply(employee_id, row)
+
+    def update(self, employee_ids: Sequence[int], column: str, value: int):
+        """ Set a group column of the written (existing) employees, without reading them again """
+        position = GROUP_COLUMN_INDEX[column]
+        with self._lock:
+            for employee_id in employee_ids:
+                row = self._rows.get(employee_id)
+                if row is not None and row[position] != value:
+                    self._apply(employee_id, row[:position] + (value,) + row[position + 1:])
+
+    # ============================================================================================
+    # Lookups
+    # ============================================================================================
+
+    def get_group(self, column: str, value: int, columns: Optional[Sequence[str]] = None) -> List[dict]:
+        """
+        Get the employees of a group.
+        :param column: position, department or status
+        :param value: value of the column
+        :param columns: The columns to select (None for all columns)
+        :return: A list of dictionaries containing employee information (in ID order)
+        :raise ValueError: if there's a column which is not in employee_list
+        """
+        _select_columns(columns)
+        names = tuple(columns) if columns else EMPLOYEE_COLUMNS
+        positions = [EMPLOYEE_COLUMNS.index(name) for name in names]
+
+        with self._lock:
+            ids = self._sorted.get((column, value))
+            if ids is None:
+                ids = self._sorted[(column, value)] = sorted(self._groups[column].get(value, ()))
+            rows = [self._rows[x] for x in ids]
+            self.hits += 1
+        return [{name: row[position] for name, position in zip(names, positions)} for row in rows]
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "current": self.versions.is_current(),
+                "rows": len(self._rows),
+                "groups": {name: {value: len(ids) for value, ids in sorted(groups.items())}
+                           for name, groups in self._groups.items()},
+                "loads": self.loads,
+                "failed_loads": self.failed_loads,
+                "last_load_ms": self.last_load_ms,
+                "last_load_time": self.last_load_time,
+                "drifted_rows": self.drifted_rows,
+                "hits": self.hits,
+                "updates": self.updates,
+            }
+
+
+# ============================================================================================
+# Global variables for group index
+# ============================================================================================
+
+
+GROUP_INDEX: GroupIndex = None
+
+
+def set_group_index(settings: Settings) -> Optional[GroupIndex]:
+    """
+    Set the (empty) group index of the current process.
+    It is disabled for the memory storage backend, which has the same indexes itself.
+    """
+    global GROUP_INDEX
+
+    if settings.index.group_enabled and settings.storage.backend != "memory":
+        GROUP_INDEX = GroupIndex()
+    else:
+        GROUP_INDEX = None
+    return GROUP_INDEX
+
+
+def start_group_index(read_page: ReadPage, is_ready: Callable[[], bool],
+                      reconcile_seconds: float) -> Optional[threading.Thread]:
+    """
+    Load the group index in a background thread once the storage backend is ready, and reload it periodically.
+    Group searches read the database until the first load is done (and while the index is stale).
+    :param read_page: function which reads a keyset page of employee rows (get_employees_after)
+    :param is_ready: function which checks whether the storage backend is ready
+    :param reconcile_seconds: seconds between reloads
+    :return: the loading thread (None if the index is disabled)
+    """
+    index = GROUP_INDEX
+    if index is None:
+        return None
+    return start_reconcile_thread(index, lambda: GROUP_INDEX is index, read_page, is_ready, reconcile_seconds,
+                                  "group-index-reconcile")
+
+
+def start_reconcile_thread(index, is_current: Callable[[], bool], read_page: ReadPage, is_ready: Callable[[], bool],
+                           reconcile_seconds: float, name: str) -> threading.Thread:
+    """
+    Load an index (which has `load(read_page)` and the `wakeup` event) in a background thread once the storage
+    backend is ready, and reload it periodically (or when it is woken up) while it is the current index of the process.
+    """
+    def reconcile():
+        while is_current():
+            if not is_ready():
+                time.sleep(1)
+                continue
+            try:
+                index.load(read_page)
+            except Exception as e:
+                logger.exception(f"Error in {name}: {e}")
+            time.sleep(RELOAD_MIN_SECONDS)
+            index.wakeup.wait(max(reconcile_seconds - RELOAD_MIN_SECONDS, 0))
+            index.wakeup.clear()
+
+    thread = threading.Thread(target=reconcile, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def get_group_index() -> Optional[GroupIndex]:
+    return GROUP_INDEX
+
+
+def get_group_index_stats() -> dict:
+    """
+    Get size and counters of the group index of the current process.
+    :return: dictionary of rows, group sizes and load counters, or {"enabled": False}
+    """
+    if GROUP_INDEX is None:
+        return {"enabled": False}
+    return {"enabled": True, **GROUP_INDEX.to_dict()}
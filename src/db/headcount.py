@@ -0,0 +1,277 @@
+"""
+In-memory headcount counters by department x position x status (per worker process).
+Every employee is counted in the cell of its (department, position, status), and the cell of each employee ID is
+kept in one byte, so the write operations of db/backend.py move an employee between cells in place.
+The counters are loaded once from employee_list, and reloaded periodically like the group index
+(see db/group_index.py) to repair drift (e.g. writes of other clients of the database),
+or as soon as another worker writes (headcounts are counted by the database meanwhile).
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import Settings
+from db.group_index import LOAD_PAGE_SIZE, ReadPage, ReadRow, read_rows, start_reconcile_thread
+from utils.conditional import EMPLOYEE_LIST_VERSION_KEY, SyncedVersions
+
+
+logger = logging.getLogger("app")
+
+HEADCOUNT_COLUMNS = ("department", "position", "status")
+HEADCOUNT_LOAD_COLUMNS = ("id",) + HEADCOUNT_COLUMNS
+HEADCOUNT_MAX_CELLS = 255  # cells are numbered 1..255 in the byte of an employee (0 is no employee)
+
+Cell = Tuple[int, int, int]  # (department, position, status)
+
+
+# ============================================================================================
+# Headcount Table
+# ============================================================================================
+
+
+class HeadcountTable:
+    """ Counters of the cells, and the cell number of every employee ID (bytearray indexed by ID) """
+
+    def __init__(self):
+        self.cells: List[Optional[Cell]] = [None]  # cell number -> cell
+        self.numbers: Dict[Cell, int] = dict()  # cell -> cell number
+        self.counts: List[int] = [0]  # cell number -> headcount
+        self.employee_cells = bytearray()
+        self.total = 0
+
+    def number(self, cell: Cell) -> int:
+        number = self.numbers.get(cell)
+        if number is None:
+            if len(self.cells) > HEADCOUNT_MAX_CELLS:
+                raise ValueError(f"Too many headcount cells. Maximum is {HEADCOUNT_MAX_CELLS}.")
+            number = self.numbers[cell] = len(self.cells)
+            self.cells.append(cell)
+            self.counts.append(0)
+        return number
+
+    def get(self, employee_id: int) -> Optional[Cell]:
+        """ Get the cell of an employee (None if not counted) """
+        if employee_id >= len(self.employee_cells):
+            return None
+        return self.cells[self.employee_cells[employee_id]]
+
+    def put(self, employee_id: int, cell: Optional[Cell]) -> bool:
+        """
+        Move an employee to a cell (or uncount it with None)
+        :return: True if the counters changed
+        """
+        number = self.number(cell) if cell is not None else 0
+        if employee_id >= len(self.employee_cells):
+            if not number:
+                return False
+            self.employee_cells.extend(bytes(employee_id + 1 - len(self.employee_cells)))
+
+        previous = self.employee_cells[employee_id]
+        if previous == number:
+            return False
+        if previous:
+            self.counts[previous] -= 1
+            self.total -= 1
+        if number:
+            self.counts[number] += 1
+            self.total += 1
+        self.employee_cells[employee_id] = number
+        return True
+
+    def to_counts(self) -> Dict[Cell, int]:
+        """ {cell: headcount} of the cells which have employees """
+        return {cell: count for cell, count in zip(self.cells[1:], self.counts[1:]) if count}
+
+
+# ============================================================================================
+# Headcount Index
+# ============================================================================================
+
+
+class HeadcountIndex:
+    """ Headcount counters which follow the writes, with the table swapped by every reload """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._table = HeadcountTable()
+        self._touched: Optional[Dict[int, Optional[Cell]]] = None  # cells written while loading
+        self.versions = SyncedVersions([EMPLOYEE_LIST_VERSION_KEY])  # moved by the writes of every worker
+        self.wakeup = threading.Event()  # set to reload before the reconcile interval
+
+        self.ready = False
+        self.loads = 0
+        self.failed_loads = 0
+        self.last_load_ms = None
+        self.last_load_time = None
+        self.drifted_count = 0  # sum of the counter differences from the database at the last load
+        self.hits = 0
+        self.updates = 0
+
+    def _apply(self, employee_id: int, cell: Optional[Cell]):
+        """ Move a written employee to its cell (lock must be held) """
+        if self._table.put(employee_id, cell):
+            self.updates += 1
+        if self._touched is not None:
+            self._touched[employee_id] = cell
+
+    # ============================================================================================
+    # Load & Reconcile
+    # ============================================================================================
+
+    def load(self, read_page: ReadPage) -> bool:
+        """
+        Load (or reload) the counters from the database, and swap them with the current ones.
+        Employees written while loading keep their written cells.
+        :param read_page: function which reads a keyset page of employee rows (get_employees_after)
+        :return: False if a page couldn't be read (the current counters are kept)
+        """
+        start_time = time.perf_counter()
+        with self._lock:
+            self._touched = dict()
+        synced = self.versions.start_load()
+
+        table = HeadcountTable()
+        last_id = 0
+        while True:
+            page = read_page(last_id, LOAD_PAGE_SIZE, HEADCOUNT_LOAD_COLUMNS)
+            if page is None:  # database error
+                self.versions.finish_load(None)
+                with self._lock:
+                    self._touched = None
+                    self.failed_loads += 1
+                logger.error("Headcount load failed, the current counters are kept")
+                return False
+
+            _, page_rows = page
+            for row in page_rows:
+                table.put(row[0], tuple(row[1:]))
+            if len(page_rows) < LOAD_PAGE_SIZE:
+                break
+            last_id = page_rows[-1][0]
+
+        with self._lock:
+            for employee_id, cell in self._touched.items():
+                table.put(employee_id, cell)
+            counts, current_counts = table.to_counts(), self._table.to_counts()
+            drifted_count = sum(abs(counts.get(x, 0) - current_counts.get(x, 0))
+                                for x in counts.keys() | current_counts.keys())
+
+            self._table, self._touched = table, None
+            self.versions.finish_load(synced)
+            self.drifted_count = drifted_count if self.ready else 0
+            self.ready = True
+            self.loads += 1
+            self.last_load_ms = round((time.perf_counter() - start_time) * 1000, 3)
+            self.last_load_time = time.time()
+
+        if self.drifted_count:
+            logger.warning(f"Headcount reconciled {self.drifted_count} drifted counts")
+        logger.info(f"Headcount loaded: {table.total} employees in {len(counts)} cells in {self.last_load_ms} ms")
+        return True
+
+    # ============================================================================================
+    # Updates by the write operations
+    # ============================================================================================
+
+    def refresh(self, employee_ids: Sequence[int], read_row: ReadRow, read_page: ReadPage):
+        """ Read the written employees from the database and move them to their cells """
+        found = read_rows(employee_ids, HEADCOUNT_LOAD_COLUMNS, read_row, read_page)
+        with self._lock:
+            for employee_id, row in found.items():
+                self._apply(employee_id, row[1:])
+
+    def update(self, employee_ids: Sequence[int], column: str, value: int):
+        """ Set a column (position, department or status) of the written employees, without reading them again """
+        position = HEADCOUNT_COLUMNS.index(column)
+        with self._lock:
+            for employee_id in employee_ids:
+                cell = self._table.get(employee_id)
+                if cell is not None and cell[position] != value:
+                    self._apply(employee_id, cell[:position] + (value,) + cell[position + 1:])
+
+    # ============================================================================================
+    # Lookups
+    # ============================================================================================
+
+    def get_counts(self, columns: Sequence[str] = HEADCOUNT_COLUMNS) -> Tuple[List[tuple], int]:
+        """
+        Get the headcounts grouped by the columns (the cost depends on the number of cells, not of employees)
+        :param columns: columns of HEADCOUNT_COLUMNS to group by (ex - ("department",) for headcounts per department)
+        :return: (rows of the column values and the headcount in the order of the values, total headcount)
+        """
+        positions = [HEADCOUNT_COLUMNS.index(name) for name in columns]
+        with self._lock:
+            counts, total = self._table.to_counts(), self._table.total
+            self.hits += 1
+
+        grouped: Dict[tuple, int] = dict()
+        for cell, count in counts.items():
+            key = tuple(cell[x] for x in positions)
+            grouped[key] = grouped.get(key, 0) + count
+        return [key + (count,) for key, count in sorted(grouped.items())], total
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "current": self.versions.is_current(),
+                "employees": self._table.total,
+                "cells": len(self._table.to_counts()),
+                "bytes": len(self._table.employee_cells),
+                "loads": self.loads,
+                "failed_loads": self.failed_loads,
+                "last_load_ms": self.last_load_ms,
+                "last_load_time": self.last_load_time,
+                "drifted_count": self.drifted_count,
+                "hits": self.hits,
+                "updates": self.updates,
+            }
+
+
+# ============================================================================================
+# Global variables for headcount index
+# ============================================================================================
+
+
+HEADCOUNT_INDEX: HeadcountIndex = None
+
+
+def set_headcount_index(settings: Settings) -> Optional[HeadcountIndex]:
+    """ Set the (empty) headcount index of the current process (used with every storage backend) """
+    global HEADCOUNT_INDEX
+
+    HEADCOUNT_INDEX = HeadcountIndex() if settings.index.headcount_enabled else None
+    return HEADCOUNT_INDEX
+
+
+def start_headcount_index(read_page: ReadPage, is_ready: Callable[[], bool],
+                          reconcile_seconds: float) -> Optional[threading.Thread]:
+    """
+    Load the headcount index in a background thread once the storage backend is ready, and reload it periodically.
+    Headcount requests answer 503 until the first load is done (and are counted by the database while it is stale).
+    :param read_page: function which reads a keyset page of employee rows (get_employees_after)
+    :param is_ready: function which checks whether the storage backend is ready
+    :param reconcile_seconds: seconds between reloads
+    :return: the loading thread (None if the index is disabled)
+    """
+    index = HEADCOUNT_INDEX
+    if index is None:
+        return None
+    return start_reconcile_thread(index, lambda: HEADCOUNT_INDEX is index, read_page, is_ready, reconcile_seconds,
+                                  "headcount-reconcile")
+
+
+def get_headcount_index() -> Optional[HeadcountIndex]:
+    return HEADCOUNT_INDEX
+
+
+def get_headcount_index_stats() -> dict:
+    """
+    Get size and counters of the headcount index of the current process.
+    :return: dictionary of employees, cells, load and query counters, or {"enabled": False}
+    """
+    if HEADCOUNT_INDEX is None:
+        return {"enabled": False}
+    return {"enabled": True, **HEADCOUNT_INDEX.to_dict()}
@@ -1,13 +1,21 @@
 """ Global variables for RDB connection """
 
+from contextlib import contextmanager
 from functools import wraps
+import itertools
 import logging
 import os
+import threading
 import time
+from typing import Iterator, List, Optional, Tuple
+
 import pymysql
 from dbutils.pooled_db import PooledDB
+from flask import Flask, current_app, g, has_request_context
 
 from config import Settings
+from config.rdb import RDBReplicaSettings
+from db.query_log import QueryRecorder, record_query_time, log_slow_query
 
 
 logger = logging.getLogger("app")
@@ -19,49 +27,164 @@ logger = logging.getLogger("app")
 
 
 DB_POOL: PooledDB = None
+DB_POOL_PID: int = None  # PID of the process which created DB_POOL
+DB_SETTINGS: Settings = None  # settings for re-creating the pool in forked worker processes
+INHERITED_DB_POOLS: list = list()  # pools inherited from the parent process (kept alive, never used or closed)
+DB_REPLICAS: list = list()  # ReplicaPool list for read-only functions
+REPLICA_COUNTER = itertools.count()  # round-robin counter of replicas
+DB_POOL_STATE: dict = {"status": "not_started", "failed_attempts": 0, "error": None, "warmup_ms": None}
+DB_POOL_STOP: threading.Event = None  # stops the connecting thread of the latest start_db_pool
+PRIMARY_READS = threading.local()  # depth of the read_primary blocks of the current thread
+
+
+# ============================================================================================
+# Pool statistics
+# ============================================================================================
+
+
+class PoolStats:
+    """ Connection pool usage counters of the current worker process """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_checkout(self, wait_seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+            self.in_use -= 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "total_wait_ms": round(self.total_wait_seconds * 1000, 3),
+                "avg_wait_ms": round(self.total_wait_seconds * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+POOL_STATS: PoolStats = PoolStats()
+
+
+# ============================================================================================
+# Read replica pool
+# ============================================================================================
+
+
+class ReplicaPool:
+    """
+    Connection pool of a read replica.
+    The pool is connected lazily, and the replica is skipped for a while after a connection failure.
+    """
+
+    def __init__(self, settings: Settings, replica: RDBReplicaSettings):
+        self.settings = settings
+        self.replica = replica
+        self.name = f"{replica.host}:{replica.port}"
+        self.pool: PooledDB = None
+        self.stats = PoolStats()
+        self.unhealthy_until = 0.0
+        self.failures = 0
+
+    def is_available(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def mark_unhealthy(self):
+        self.failures += 1
+        self.unhealthy_until = time.monotonic() + self.settings.rdb.replica_retry_seconds
+
+    def connection(self):
+        if self.pool is None:
+            logger.info(f"[PID:{os.getpid()}] Creating replica connection pool ({self.name}|{self.settings.rdb.database})")
+            self.pool = new_pool(self.settings, self.replica.host, self.replica.port)
+        return self.pool.connection()
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.is_available(),
+            "failures": self.failures,
+            "idle_connections": len(getattr(self.pool, "_idle_cache", [])),
+            **self.stats.to_dict(),
+        }
 
 
 # ============================================================================================
 # util functions
 # ============================================================================================
-def make_db_pool(settings: Settings) -> PooledDB:
-    """ Make database connection pool """
-    connection_set = False
-    for i in range(5):
+def new_pool(settings: Settings, host: str, port: int) -> PooledDB:
+    """ Make a connection pool to the server with the pool settings """
+    return PooledDB(
+        creator=pymysql,
+        maxconnections=settings.rdb.pool_max_connections,
+        mincached=settings.rdb.pool_min_cached,
+        maxcached=settings.rdb.pool_max_cached,
+        blocking=settings.rdb.pool_blocking,
+        maxusage=None,
+        setsession=[],
+        host=host,
+        port=port,
+        user=settings.rdb.user,
+        password=settings.rdb.password,
+        database=settings.rdb.database,
+        charset='utf8mb4',
+        autocommit=True
+    )
+
+
+def make_db_pool(settings: Settings, retries: int = 5, retry_seconds: float = 10,
+                 exit_on_failure: bool = True, stop: threading.Event = None) -> Optional[PooledDB]:
+    """
+    Make database connection pool
+    :param retries: number of attempts (0: retry until connected)
+    :param retry_seconds: seconds to wait between attempts (for loading of mysql container)
+    :param exit_on_failure: exit the process if every attempt failed (else return None)
+    :param stop: event which stops the retries (None is returned)
+    """
+    for attempt in itertools.count(1):
+        if stop is not None and stop.is_set():
+            return None
         try:
             # connect database
             logger.info(f"[PID:{os.getpid()}] Creating database connection pool ({settings.rdb.host}:{settings.rdb.port}|{settings.rdb.database})")
-            DB_POOL = PooledDB(
-                creator=pymysql,
-                maxconnections=5,
-                mincached=2,
-                maxcached=5,
-                blocking=True,
-                maxusage=None,
-                setsession=[],
-                host=settings.rdb.host,
-                port=settings.rdb.port,
-                user=settings.rdb.user,
-                password=settings.rdb.password,
-                database=settings.rdb.database,
-                charset='utf8mb4',
-                autocommit=True
-            )
+            DB_POOL = new_pool(settings, settings.rdb.host, settings.rdb.port)
             logger.info(f"[PID:{os.getpid()}] Database connection pool created successfully ({settings.rdb.host}:{settings.rdb.port}|{settings.rdb.database})")
-            connection_set = True
-            break
+            return DB_POOL
         except Exception as e:
             logger.critical(f"[PID:{os.getpid()}] Failed to create database connection pool: {e}")
+            DB_POOL_STATE["failed_attempts"] += 1
+            DB_POOL_STATE["error"] = str(e)
+            if retries and attempt >= retries:
+                break
 
             # wait for loading of mysql container
-            logger.info(f"[PID:{os.getpid()}] Retrying to connect to the database in 10 seconds...")
-            time.sleep(10)
-        
-    if not connection_set:
+            logger.info(f"[PID:{os.getpid()}] Retrying to connect to the database in {retry_seconds} seconds...")
+            if stop is not None:
+                stop.wait(retry_seconds)
+            else:
+                time.sleep(retry_seconds)
+
+    if exit_on_failure:
         logger.critical(f"[PID:{os.getpid()}] Exiting due to database connection failure.")
         exit(1)
-
-    return DB_POOL
+    return None
 
 
 # ============================================================================================
@@ -69,47 +192,472 @@ def make_db_pool(settings: Settings) -> PooledDB:
 # ============================================================================================
 
 def set_db_pool(settings: Settings) -> PooledDB:
-    """ Set database connection pool """
-    global DB_POOL
+    """
+    Set database connection pool of the current process.
+    If the process is forked later (e.g. uWSGI workers without lazy-apps), each worker
+    re-creates its own pool from the same settings on first use. (see get_db_pool)
+    """
+    start_time = time.perf_counter()
+    DB_POOL_STATE.update(status="connecting", failed_attempts=0, error=None)
+    return install_db_pool(settings, make_db_pool(settings), time.perf_counter() - start_time)
+
 
-    DB_POOL = make_db_pool(settings)
+def install_db_pool(settings: Settings, pool: PooledDB, warmup_seconds: float = None) -> PooledDB:
+    """ Install a connected pool as the database connection pool of the current process """
+    global DB_POOL, DB_POOL_PID, DB_SETTINGS, POOL_STATS, DB_REPLICAS
+
+    DB_SETTINGS = settings
+    POOL_STATS = PoolStats()
+    DB_REPLICAS = [ReplicaPool(settings, replica) for replica in settings.rdb.replicas]
+    DB_POOL_PID = os.getpid()
+    DB_POOL = pool
+    DB_POOL_STATE.update(status="ready", error=None,
+                         warmup_ms=round(warmup_seconds * 1000, 3) if warmup_seconds is not None else None)
 
     return DB_POOL
 
 
+def start_db_pool(settings: Settings, retry_seconds: float = 10) -> threading.Thread:
+    """
+    Connect the database connection pool of the current process in a background thread.
+    The app serves without waiting for the database (see is_db_pool_ready for traffic gating),
+    and the connection is retried until it succeeds instead of exiting the process.
+    The thread of a previous call (ex - an app created again) stops retrying, and so does stop_db_pool.
+    :param retry_seconds: seconds to wait between attempts
+    :return: the connecting thread
+    """
+    global DB_SETTINGS, DB_POOL_STOP
+
+    stop_db_pool()
+    DB_SETTINGS = settings
+    DB_POOL_STATE.update(status="connecting", failed_attempts=0, error=None, warmup_ms=None)
+    stop = DB_POOL_STOP = threading.Event()
+
+    def connect():
+        start_time = time.perf_counter()
+        pool = make_db_pool(settings, retries=0, retry_seconds=retry_seconds, exit_on_failure=False, stop=stop)
+        if pool is not None and not stop.is_set():
+            install_db_pool(settings, pool, time.perf_counter() - start_time)
+
+    thread = threading.Thread(target=connect, name="db-pool-connect", daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_db_pool():
+    """ Stop the connecting thread of start_db_pool (a connected pool is kept) """
+    if DB_POOL_STOP is not None:
+        DB_POOL_STOP.set()
+
+
 # ============================================================================================
 # Getter functions
 # ============================================================================================
 
 def get_db_pool() -> PooledDB:
-    """ Get database connection pool """
+    """
+    Get database connection pool of the current process.
+    Pool sockets must not be shared between processes, so a pool inherited by fork is
+    left untouched and a new pool is created for this process.
+    """
+    if DB_POOL is not None and DB_POOL_PID != os.getpid():
+        logger.info(f"[PID:{os.getpid()}] Forked from PID:{DB_POOL_PID}, creating connection pool for this worker")
+        INHERITED_DB_POOLS.append(DB_POOL)  # keep reference, closing it would close the parent's connections
+        INHERITED_DB_POOLS.extend(replica.pool for replica in DB_REPLICAS if replica.pool is not None)
+        set_db_pool(DB_SETTINGS)
     return DB_POOL
 
 
+def is_db_pool_ready() -> bool:
+    """ Check whether the database connection pool of the current process is connected """
+    return DB_POOL is not None
+
+
+def get_db_pool_state() -> dict:
+    """
+    Get the connection state of the database connection pool.
+    :return: status (not_started, connecting, ready), failed attempts, last error and warmup time of the pool
+    """
+    return dict(DB_POOL_STATE)
+
+
+def get_pool_stats() -> dict:
+    """
+    Get connection pool occupancy and usage counters of the current worker process.
+    :return: dictionary of pool configuration, occupancy and checkout counters
+    """
+    pool = get_db_pool()
+    if pool is None:
+        return {"pid": os.getpid(), "initialized": False}
+
+    return {
+        "pid": os.getpid(),
+        "initialized": True,
+        "max_connections": DB_SETTINGS.rdb.pool_max_connections,
+        "min_cached": DB_SETTINGS.rdb.pool_min_cached,
+        "max_cached": DB_SETTINGS.rdb.pool_max_cached,
+        "open_connections": getattr(pool, "_connections", None),  # connections checked out from the pool
+        "idle_connections": len(getattr(pool, "_idle_cache", [])),
+        **POOL_STATS.to_dict(),
+        "replicas": [replica.to_dict() for replica in DB_REPLICAS],
+    }
+
+
+def pin_primary():
+    """ Send the following reads of the current request to the primary (read-your-writes) """
+    if has_request_context():
+        g.db_primary_pinned = True
+
+
+@contextmanager
+def read_primary() -> Iterator[None]:
+    """
+    Send the reads inside the block to the primary, in or out of a request.
+    (ex - cache fills: a row read from a lagging replica right after a write would be cached until it expires)
+    """
+    PRIMARY_READS.depth = getattr(PRIMARY_READS, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        PRIMARY_READS.depth -= 1
+
+
+def is_primary_pinned() -> bool:
+    """ Check whether the reads must go to the primary (the current request has written, or in read_primary) """
+    if getattr(PRIMARY_READS, "depth", 0):
+        return True
+    return has_request_context() and g.get("db_primary_pinned", False)
+
+
+def mark_db_error():
+    """ Record that a database function of the current request failed (its result is None, not the data) """
+    if has_request_context():
+        g.db_error = True
+
+
+def has_db_error() -> bool:
+    """ Check whether a database function of the current request failed """
+    return has_request_context() and g.get("db_error", False)
+
+
+def checkout_replica_connection() -> Tuple[object, PoolStats]:
+    """
+    Get a connection from the replicas by round-robin, skipping unhealthy replicas.
+    :return: (connection, stats of the replica pool), or (None, None) if no replica is available
+    """
+    for _ in range(len(DB_REPLICAS)):
+        replica = DB_REPLICAS[next(REPLICA_COUNTER) % len(DB_REPLICAS)]
+        if not replica.is_available():
+            continue
+
+        start_time = time.perf_counter()
+        try:
+            db_conn = replica.connection()
+        except Exception as e:
+            logger.warning(f"[PID:{os.getpid()}] Replica {replica.name} is unavailable, skip for {DB_SETTINGS.rdb.replica_retry_seconds} seconds: {e}")
+            replica.mark_unhealthy()
+            continue
+        replica.stats.record_checkout(time.perf_counter() - start_time)
+        return db_conn, replica.stats
+
+    return None, None
+
+
+def checkout_connection(read_only: bool = False) -> Tuple[object, PoolStats]:
+    """
+    Get a connection from the pool with recording wait time.
+    Read-only sessions go to the replicas (falling back to the primary), unless the current
+    request has already written to the primary.
+    :param read_only: whether the session only reads
+    :return: (connection, stats of the pool) - pass both to release_connection
+    """
+    if read_only and DB_REPLICAS and not is_primary_pinned():
+        db_conn, stats = checkout_replica_connection()
+        if db_conn is not None:
+            return db_conn, stats
+    elif not read_only:
+        pin_primary()
+
+    return checkout_primary_connection()
+
+
+def checkout_primary_connection() -> Tuple[object, PoolStats]:
+    """ Get a connection from the primary pool with recording wait time """
+    db_pool = get_db_pool()  # load pre-defined database connection pool
+    if db_pool is None:
+        raise ConnectionError("Database connection pool is not ready")
+
+    start_time = time.perf_counter()
+    db_conn = db_pool.connection()  # get a connection from the pool
+    POOL_STATS.record_checkout(time.perf_counter() - start_time)
+    return db_conn, POOL_STATS
+
+
+def release_connection(db_conn, stats: PoolStats):
+    """ Return a connection to the pool """
+    try:
+        db_conn.close()
+    finally:
+        stats.record_checkin()
+
+
+def record_call(name: str, elapsed: float, recorder: QueryRecorder, db_conn=None):
+    """
+    Record the timing of a database function call, and write it to the slow-query log if it is slow.
+    EXPLAIN plans are captured with the connection at most once per interval for each function,
+    so the capture itself can't overload the database.
+    :param name: name of the database function
+    :param elapsed: elapsed seconds of the call
+    :param recorder: recorder of the executed statements
+    :param db_conn: connection which executed the statements (None: don't capture EXPLAIN plans)
+    """
+    threshold = DB_SETTINGS.rdb.slow_query_threshold_ms / 1000 if DB_SETTINGS else 0
+    explain_interval = DB_SETTINGS.rdb.slow_query_explain_interval_seconds if DB_SETTINGS else 0
+    try:
+        is_slow, capture_explain = record_query_time(name, elapsed, threshold, explain_interval)
+        if is_slow:
+            log_slow_query(name, elapsed, recorder, db_conn if capture_explain else None)
+    except Exception as e:
+        logger.warning(f"Failed to record database function call {name}: {e}")
+
+
+# ============================================================================================
+# Request-scoped session
+# ============================================================================================
+
+
+class RequestSession:
+    """
+    Connections shared by the database functions of one request. (see init_request_session)
+    At most one primary and one replica connection are checked out per request,
+    and they are returned to the pool at the teardown of the request.
+    """
+
+    def __init__(self):
+        self.primary: Tuple[object, PoolStats] = None
+        self.replica: Tuple[object, PoolStats] = None
+        self.transaction_depth = 0
+
+    def in_transaction(self) -> bool:
+        return self.transaction_depth > 0
+
+    def connection(self, read_only: bool = False):
+        """
+        Get the connection of this request for a database function.
+        Reads go to the replica connection unless the request has written or is in a transaction.
+        :param read_only: whether the function only reads
+        """
+        if read_only and not self.in_transaction() and not is_primary_pinned():
+            if self.replica is None and DB_REPLICAS:
+                db_conn, stats = checkout_replica_connection()
+                if db_conn is not None:
+                    self.replica = (db_conn, stats)
+            if self.replica is not None:
+                return self.replica[0]
+        elif not read_only:
+            pin_primary()
+
+        if self.primary is None:
+            self.primary = checkout_primary_connection()
+        return self.primary[0]
+
+    def close(self):
+        """ Return the connections to the pools (an unfinished transaction is rolled back) """
+        if self.primary is not None and self.in_transaction():
+            logger.warning("Unfinished transaction is rolled back at the end of the request")
+            self.primary[0].rollback()
+            self.transaction_depth = 0
+
+        for slot in (self.primary, self.replica):
+            if slot is not None:
+                release_connection(*slot)
+        self.primary, self.replica = None, None
+
+
+def init_request_session(app: Flask):
+    """
+    Share one connection per request between the database functions of the app.
+    Without this, each database function checks out its own connection.
+    """
+    app.extensions["db_request_session"] = True
+    app.teardown_request(close_request_session)
+
+
+def get_request_session() -> Optional[RequestSession]:
+    """ Get the session of the current request, or None outside of a request of an initialized app """
+    if not has_request_context() or not current_app.extensions.get("db_request_session"):
+        return None
+    if "db_session" not in g:
+        g.db_session = RequestSession()
+    return g.db_session
+
+
+def close_request_session(exception: BaseException = None):
+    """ Release the connections of the current request (teardown_request handler) """
+    session = g.pop("db_session", None)
+    if session is not None:
+        session.close()
+
+
+@contextmanager
+def unit_of_work() -> Iterator[RequestSession]:
+    """
+    Run the database functions in the block in one transaction of the request connection.
+    The transaction is committed at the end of the block, and rolled back if the block raises.
+    Inside the block, database functions raise their errors instead of returning None.
+    Nested blocks join the outer transaction.
+    ex)
+        with unit_of_work():
+            promote_employee(employee_id, position_id)
+            transfer_employee(employee_id, department_id)
+    """
+    session = get_request_session()
+    if session is None:
+        raise RuntimeError("Request session is not available. (see init_request_session)")
+
+    db_conn = session.connection()
+    if not session.in_transaction():
+        db_conn.begin()
+    session.transaction_depth += 1
+
+    try:
+        yield session
+    except BaseException:
+        session.transaction_depth -= 1
+        if not session.in_transaction():
+            db_conn.rollback()
+        raise
+    session.transaction_depth -= 1
+    if not session.in_transaction():
+        db_conn.commit()
+
+
 # ==============================================================================================
 # Decorator for DB management
 # ==============================================================================================
 
 
-def db_session_auto_close(func):
+def db_session_auto_close(func=None, *, read_only: bool = False, cursor_class=pymysql.cursors.DictCursor):
     """
     Decorator to manage database sessions for a function.
+    Use `@db_session_auto_close(read_only=True)` for functions which only read, to route them to replicas.
+    Use `cursor_class=pymysql.cursors.Cursor` for tuple rows, which skips making a dictionary per row.
+    Each call is timed, and slow calls are written to the slow-query log. (see record_call)
+    In a request of an app with init_request_session, the connection of the request is used.
     """
+    if func is None:
+        return lambda f: db_session_auto_close(f, read_only=read_only, cursor_class=cursor_class)
+
+    name = f"{func.__module__}.{func.__name__}"
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        db_pool = get_db_pool()  # load pre-defined database connection pool
-        db_conn = db_pool.connection()  # get a connection from the pool
+        session = get_request_session()
+        if session is not None:
+            db_conn, pool_stats = session.connection(read_only), None  # released at the end of the request
+        else:
+            db_conn, pool_stats = checkout_connection(read_only)  # get a connection from the pool
         query_result = None
+        recorder = None
+        succeeded = False
+        start_time = time.perf_counter()
 
         try:
-            with db_conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                query_result = func(*args, **kwargs, cursor=cursor)  # execute the function with the cursor
+            with db_conn.cursor(cursor_class) as cursor:
+                recorder = QueryRecorder(cursor)
+                query_result = func(*args, **kwargs, cursor=recorder)  # execute the function with the cursor
+                succeeded = True
         except Exception as e:
+            if session is not None and session.in_transaction():
+                raise  # roll back the whole unit of work
+            mark_db_error()
             logging.exception(f"Error in database operation: {e}")
         finally:
             cursor.close()
-            db_conn.close()  # ensure the connection is closed
+            if recorder is not None:
+                record_call(name, time.perf_counter() - start_time, recorder, db_conn if succeeded else None)
+            if pool_stats is not None:
+                release_connection(db_conn, pool_stats)  # ensure the connection is closed
         
         return query_result
 
     return wrapper
+
+
+def db_transaction_auto_close(func):
+    """
+    Decorator to manage database sessions for a function which must run in one transaction.
+    The transaction is committed when the function returns, and rolled back if it raises.
+    Each call is timed like db_session_auto_close, and EXPLAIN plans are captured after the commit.
+    Inside unit_of_work, the function joins the transaction of the request instead.
+    """
+    name = f"{func.__module__}.{func.__name__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        session = get_request_session()
+        if session is not None:
+            db_conn, pool_stats = session.connection(), None  # released at the end of the request
+        else:
+            db_conn, pool_stats = checkout_connection()  # get a connection from the pool
+        joined = session is not None and session.in_transaction()  # committed by unit_of_work
+        query_result = None
+        recorder = None
+        succeeded = False
+        start_time = time.perf_counter()
+
+        try:
+            if not joined:
+                db_conn.begin()
+            with db_conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                recorder = QueryRecorder(cursor)
+                query_result = func(*args, **kwargs, cursor=recorder)  # execute the function with the cursor
+            if not joined:
+                db_conn.commit()
+            succeeded = True
+        except Exception as e:
+            if joined:
+                raise  # roll back the whole unit of work
+            db_conn.rollback()
+            query_result = None
+            mark_db_error()
+            logging.exception(f"Error in database transaction: {e}")
+        finally:
+            if recorder is not None:
+                record_call(name, time.perf_counter() - start_time, recorder, db_conn if succeeded else None)
+            if pool_stats is not None:
+                release_connection(db_conn, pool_stats)  # ensure the connection is closed
+
+        return query_result
+
+    return wrapper
+
+
+def db_stream_auto_close(func=None, *, read_only: bool = False):
+    """
+    Decorator to manage database sessions for a generator function.
+    The function gets an unbuffered server-side cursor (SSDictCursor), so rows are read from
+    the server as the generator is consumed and memory stays constant regardless of table size.
+    The connection is returned to the pool when the generator is exhausted or closed.
+    The request session is not used, because the generator may outlive the request context.
+    Unlike the other decorators, a database error is raised from the generator (the rows already yielded can't
+    be taken back), so a streamed response is cut off without its end (ex - the last chunk, the gzip trailer).
+    """
+    if func is None:
+        return lambda f: db_stream_auto_close(f, read_only=read_only)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        db_conn, pool_stats = checkout_connection(read_only)  # get a connection from the pool
+
+        try:
+            with db_conn.cursor(pymysql.cursors.SSDictCursor) as cursor:
+                yield from func(*args, **kwargs, cursor=cursor)  # stream the function results with the cursor
+        except Exception as e:
+            # raised to the consumer, so a streamed response is aborted instead of ending as if it were complete
+            logger.exception(f"Error in database stream operation: {e}")
+            raise
+        finally:
+            release_connection(db_conn, pool_stats)  # ensure the connection is closed
+
+    return wrapper
@@ -0,0 +1,332 @@
+"""
+In-process storage engine with hash indexes.
+For small read-mostly deployments and for benchmarking the HTTP layer without database latency.
+Rows are kept as MySQL returns them (DATETIME columns as datetime), so the response models and the
+row decoders work the same as with the MySQL backend. Data is lost when the process exits.
+"""
+
+from bisect import bisect_right, insort
+from collections import defaultdict
+from contextlib import contextmanager
+import datetime
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from db.backend import StorageBackend
+from db.employee import EMPLOYEE_COLUMNS, BULK_UPDATE_CHUNK_SIZE, SEARCH_FILTER_COLUMNS
+
+
+DOCUMENT_COLUMNS = ("id", "issuer", "assignee", "status", "dayoff_start_date", "dayoff_end_date", "reason",
+                    "created_at", "updated_at")
+EMPLOYEE_INDEXES = ("position", "department", "status")  # hash indexes besides the primary key (id)
+
+
+# ============================================================================================
+# Column Conversion
+# ============================================================================================
+
+
+def _to_datetime(value) -> Optional[datetime.datetime]:
+    """ Convert a value to naive datetime like MySQL DATETIME (UTC for aware datetime, no microseconds) """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    elif type(value) is datetime.date:
+        value = datetime.datetime.combine(value, datetime.time())
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=0)
+
+
+def _to_date(value) -> Optional[datetime.date]:
+    """ Convert a value to date like MySQL DATE """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+def _check_columns(columns: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """
+    Check the columns to select.
+    :raise ValueError: if there's a column which is not in employee_list
+    """
+    if not columns:
+        return EMPLOYEE_COLUMNS
+    invalid = set(columns) - set(EMPLOYEE_COLUMNS)
+    if invalid:
+        raise ValueError(f"Invalid columns: {','.join(sorted(invalid))}")
+    return tuple(columns)
+
+
+# ============================================================================================
+# Memory Backend
+# ============================================================================================
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Employee and document tables in the process memory.
+    Employees have hash indexes on id, position, department and status, so lookups don't scan the table.
+    Every operation holds one lock, and unit_of_work holds it for the whole block with an undo log.
+    """
+
+    name = "memory"
+    in_process = True  # lookups are already in memory, no cache or group index in front of it
+
+    def __init__(self, employees: Iterable[dict] = (), documents: Iterable[dict] = ()):
+        """
+        :param employees: initial employee rows (without id, or with id)
+        :param documents: initial document rows (without id, or with id)
+        """
+        self._lock = threading.RLock()
+        self._employees: Dict[int, dict] = dict()  # id -> row
+        self._employee_ids: List[int] = list()  # sorted ids (primary key order for pagination)
+        self._indexes: Dict[str, Dict[int, Set[int]]] = {name: defaultdict(set) for name in EMPLOYEE_INDEXES}
+        self._documents: Dict[int, dict] = dict()
+        self._next_employee_id = 1
+        self._next_document_id = 1
+        self._undo_log: Optional[List[Tuple[int, Optional[dict]]]] = None  # (id, previous row) in unit_of_work
+
+        for row in employees:
+            self._insert_employee(row)
+        for row in documents:
+            self.insert_document(row)
+
+    # ============================================================================================
+    # Storage primitives
+    # ============================================================================================
+
+    def _put_employee(self, employee_id: int, row: Optional[dict]):
+        """ Replace (or delete with None) an employee row and update the indexes """
+        previous = self._employees.get(employee_id)
+        if self._undo_log is not None:
+            self._undo_log.append((employee_id, previous))
+
+        if previous is not None:
+            for name in EMPLOYEE_INDEXES:
+                ids = self._indexes[name][previous[name]]
+                ids.discard(employee_id)
+                if not ids:
+                    del self._indexes[name][previous[name]]
+        if row is None:
+            del self._employees[employee_id]
+            self._employee_ids.pop(bisect_right(self._employee_ids, employee_id) - 1)
+            return
+
+        if previous is None:
+            if self._employee_ids and employee_id < self._employee_ids[-1]:
+                insort(self._employee_ids, employee_id)
+            else:
+                self._employee_ids.append(employee_id)
+        self._employees[employee_id] = row
+        for name in EMPLOYEE_INDEXES:
+            self._indexes[name][row[name]].add(employee_id)
+
+    def _insert_employee(self, employee_data: dict) -> int:
+        employee_id = employee_data.get("id") or self._next_employee_id
+        if employee_id in self._employees:
+            raise ValueError(f"Duplicate entry '{employee_id}' for key 'PRIMARY'")
+        row = {name: employee_data.get(name) for name in EMPLOYEE_COLUMNS}
+        row.update(id=employee_id, birth_date=_to_datetime(row["birth_date"]),
+                   register_time=_to_datetime(row["register_time"]))
+        for name in ("first_name", "position", "department", "phone_number", "email", "status"):
+            if row[name] is None:
+                raise ValueError(f"Column '{name}' cannot be null")
+
+        self._put_employee(employee_id, row)
+        self._next_employee_id = max(self._next_employee_id, employee_id + 1)
+        return employee_id
+
+    def _update_employee(self, employee_id: int, **values) -> bool:
+        row = self._employees.get(employee_id)
+        if row is None:
+            return False
+        self._put_employee(employee_id, {**row, **values})
+        return True
+
+    def _update_employees(self, employee_ids: List[int], **values) -> List[int]:
+        updated_ids = list()
+        for i in range(0, len(employee_ids), BULK_UPDATE_CHUNK_SIZE):  # same order as the MySQL backend
+            chunk = sorted(set(employee_ids[i:i + BULK_UPDATE_CHUNK_SIZE]))
+            updated_ids.extend(x for x in chunk if self._update_employee(x, **values))
+        return updated_ids
+
+    def _select(self, employee_ids: Iterable[int], columns: Tuple[str, ...]) -> List[dict]:
+        employees = self._employees
+        return [{name: employees[x][name] for name in columns} for x in employee_ids]
+
+    def _select_tuples(self, employee_ids: Iterable[int], columns: Tuple[str, ...]) -> List[tuple]:
+        employees = self._employees
+        return [tuple(employees[x][name] for name in columns) for x in employee_ids]
+
+    def insert_document(self, document_data: dict) -> int:
+        """ Insert a document row (documents have no create API, used for loading data) """
+        with self._lock:
+            document_id = document_data.get("id") or self._next_document_id
+            now = datetime.datetime.now().replace(microsecond=0)
+            row = {name: document_data.get(name) for name in DOCUMENT_COLUMNS}
+            row.update(id=document_id,
+                       dayoff_start_date=_to_date(row["dayoff_start_date"]),
+                       dayoff_end_date=_to_date(row["dayoff_end_date"]),
+                       created_at=_to_datetime(row["created_at"]) or now,
+                       updated_at=_to_datetime(row["updated_at"]) or now)
+            self._documents[document_id] = row
+            self._next_document_id = max(self._next_document_id, document_id + 1)
+            return document_id
+
+    # ============================================================================================
+    # Transactions
+    # ============================================================================================
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator["MemoryBackend"]:
+        """ Hold the lock for the block, and undo its changes if the block raises """
+        with self._lock:
+            if self._undo_log is not None:  # nested blocks join the outer one
+                yield self
+                return
+
+            self._undo_log = list()
+            try:
+                yield self
+            except BaseException:
+                undo_log, self._undo_log = self._undo_log, None
+                for employee_id, previous in reversed(undo_log):
+                    self._put_employee(employee_id, previous)
+                raise
+            self._undo_log = None
+
+    # ============================================================================================
+    # Employee Operations
+    # ============================================================================================
+
+    def create_employee(self, employee_data: dict) -> int:
+        with self._lock:
+            return self._insert_employee(employee_data)
+
+    def create_employees(self, employees_data: List[dict]) -> List[int]:
+        with self.unit_of_work():
+            return [self._insert_employee(x) for x in employees_data]
+
+    def get_employee(self, employee_id: int, columns: Optional[Sequence[str]] = None) -> dict:
+        columns = _check_columns(columns)
+        with self._lock:
+            if employee_id not in self._employees:
+                return None
+            return self._select((employee_id,), columns)[0]
+
+    def get_employees_by_ids(self, employee_ids: Sequence[int], columns: Optional[Sequence[str]] = None) -> List[dict]:
+        columns = _check_columns(columns)
+        with self._lock:
+            return self._select(sorted(x for x in set(employee_ids) if x in self._employees), columns)
+
+    def get_employees_by_position(self, position_id: int, columns: Optional[Sequence[str]] = None) -> List[dict]:
+        columns = _check_columns(columns)
+        with self._lock:
+            return self._select(sorted(self._indexes["position"].get(position_id, ())), columns)
+
+    def get_employees_by_department(self, department_id: int, columns: Optional[Sequence[str]] = None) -> List[dict]:
+        columns = _check_columns(columns)
+        with self._lock:
+            return self._select(sorted(self._indexes["department"].get(department_id, ())), columns)
+
+    def get_employees_by_status(self, status: int, columns: Optional[Sequence[str]] = None) -> List[dict]:
+        columns = _check_columns(columns)
+        with self._lock:
+            return self._select(sorted(self._indexes["status"].get(status, ())), columns)
+
+    def inactivate_employee(self, employee_id: int) -> None:
+        with self._lock:
+            self._update_employee(employee_id, status=0)
+
+    def promote_employee(self, employee_id: int, new_position: int) -> None:
+        with self._lock:
+            self._update_employee(employee_id, position=new_position)
+
+    def transfer_employee(self, employee_id: int, new_department: int) -> None:
+        with self._lock:
+            self._update_employee(employee_id, department=new_department)
+
+    def inactivate_employees(self, employee_ids: List[int]) -> List[int]:
+        with self.unit_of_work():
+            return self._update_employees(employee_ids, status=0)
+
+    def promote_employees(self, employee_ids: List[int], new_position: int) -> List[int]:
+        with self.unit_of_work():
+            return self._update_employees(employee_ids, position=new_position)
+
+    def transfer_employees(self, employee_ids: List[int], new_department: int) -> List[int]:
+        with self.unit_of_work():
+            return self._update_employees(employee_ids, department=new_department)
+
+    def get_employees(self, offset: int, limit: int,
+                      columns: Optional[Sequence[str]] = None) -> Tuple[Tuple[str, ...], List[tuple]]:
+        columns = _check_columns(columns)
+        with self._lock:
+            employee_ids = self._employee_ids[offset:offset + limit]
+            return columns, self._select_tuples(employee_ids, columns)
+
+    def get_documents(self, offset: int, limit: int) -> Tuple[Tuple[str, ...], List[tuple]]:
+        with self._lock:
+            rows = [self._documents[x] for x in sorted(self._documents)[offset:offset + limit]]
+            return DOCUMENT_COLUMNS, [tuple(x[name] for name in DOCUMENT_COLUMNS) for x in rows]
+
+    def get_employees_after(self, last_id: int, limit: int,
+                            columns: Optional[Sequence[str]] = None) -> Tuple[Tuple[str, ...], List[tuple]]:
+        columns = _check_columns(columns)
+        with self._lock:
+            start = bisect_right(self._employee_ids, last_id)
+            employee_ids = self._employee_ids[start:start + limit]
+            return columns, self._select_tuples(employee_ids, columns)
+
+    def get_documents_after(self, last_id: int, limit: int) -> Tuple[Tuple[str, ...], List[tuple]]:
+        with self._lock:
+            document_ids = sorted(x for x in self._documents if x > last_id)[:limit]
+            return DOCUMENT_COLUMNS, [tuple(self._documents[x][name] for name in DOCUMENT_COLUMNS) for x in document_ids]
+
+    def search_employees(self, filters: dict, last_id: int, limit: int,
+                         columns: Optional[Sequence[str]] = None) -> Tuple[Tuple[str, ...], List[tuple]]:
+        columns = _check_columns(columns)
+        registered_from, registered_to = filters.get("registered_from"), filters.get("registered_to")
+        with self._lock:
+            groups = sorted((self._indexes[name].get(filters[name], set()) for name in SEARCH_FILTER_COLUMNS
+                             if filters.get(name) is not None), key=len)
+            if groups:  # intersect the hash indexes from the smallest one
+                candidates = sorted(x for x in groups[0].intersection(*groups[1:]) if x > last_id)
+            else:
+                candidates = self._employee_ids[bisect_right(self._employee_ids, last_id):]
+
+            employee_ids = list()
+            for employee_id in candidates:
+                register_time = self._employees[employee_id]["register_time"]
+                if registered_from is not None and (register_time is None or register_time < registered_from):
+                    continue
+                if registered_to is not None and (register_time is None or register_time >= registered_to):
+                    continue
+                employee_ids.append(employee_id)
+                if len(employee_ids) >= limit:
+                    break
+            return columns, self._select_tuples(employee_ids, columns)
+
+    def get_headcounts(self, columns: Sequence[str]) -> Tuple[Tuple[str, ...], List[tuple]]:
+        columns = _check_columns(columns)
+        counts: Dict[tuple, int] = defaultdict(int)
+        with self._lock:
+            for row in self._employees.values():
+                counts[tuple(row[name] for name in columns)] += 1
+        return columns + ("count",), [key + (count,) for key, count in sorted(counts.items())]
+
+    def iter_employees(self, chunk_size: int, columns: Optional[Sequence[str]] = None) -> Iterator[List[dict]]:
+        columns = _check_columns(columns)
+        with self._lock:
+            employee_ids = list(self._employee_ids)  # snapshot of the ids, rows are read chunk by chunk
+        for i in range(0, len(employee_ids), chunk_size):
+            with self._lock:
+                rows = self._select([x for x in employee_ids[i:i + chunk_size] if x in self._employees], columns)
+            if rows:
+                yield rows
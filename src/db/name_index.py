@@ -0,0 +1,368 @@
+"""
+In-memory type-ahead index of employees by first_name, surname and email (per worker process).
+Words of the names and the lower-cased emails are kept in a sorted list, so a prefix query is a binary search
+and a scan of the first matching words. Name words also have trigram postings for substring queries.
+The index is loaded once from employee_list, updated by the write operations of db/backend.py,
+and reloaded periodically like the group index (see db/group_index.py), or as soon as another worker writes
+(its responses are sent without validators meanwhile).
+"""
+
+from bisect import bisect_left, insort
+from collections import defaultdict
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from config import Settings
+from db.group_index import LOAD_PAGE_SIZE, ReadPage, ReadRow, read_rows, start_reconcile_thread
+from utils.conditional import EMPLOYEE_LIST_VERSION_KEY, SyncedVersions
+
+
+logger = logging.getLogger("app")
+
+NAME_INDEX_COLUMNS = ("id", "first_name", "surname", "email", "position", "department", "status")
+NAME_COLUMN_INDEX = {name: NAME_INDEX_COLUMNS.index(name) for name in NAME_INDEX_COLUMNS}
+SUBSTRING_MIN_LENGTH = 3  # shorter words are matched by prefix only (length of the trigrams)
+WORD_SET_MAX = 50000  # other words of a query matching at most this many IDs are checked by ID sets
+
+
+def _trigrams(word: str) -> Set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def _words(row: tuple) -> Tuple[Set[str], Set[str]]:
+    """ Get (name words, all words) of a row - words of first_name and surname, and the email (lower-cased) """
+    names = set()
+    for value in (row[1], row[2]):
+        if value:
+            names.update(value.lower().split())
+    words = set(names)
+    if row[3]:
+        words.add(row[3].lower())
+    return names, words
+
+
+# ============================================================================================
+# Name Table
+# ============================================================================================
+
+
+class NameTable:
+    """ Rows, sorted words, postings (word -> IDs) and trigrams (trigram -> name words) of the index """
+
+    def __init__(self, rows: Dict[int, tuple] = None):
+        """ Build the table from rows in NAME_INDEX_COLUMNS order """
+        self.rows: Dict[int, tuple] = rows if rows is not None else dict()
+        postings: Dict[str, Set[int]] = defaultdict(set)
+        name_words: Set[str] = set()
+        for employee_id, row in self.rows.items():
+            names, words = _words(row)
+            name_words |= names
+            for word in words:
+                postings[word].add(employee_id)
+
+        self.postings: Dict[str, Set[int]] = dict(postings)
+        self.terms: List[str] = sorted(postings)
+        self.trigrams: Dict[str, Set[str]] = defaultdict(set)
+        for word in name_words:
+            for trigram in _trigrams(word):
+                self.trigrams[trigram].add(word)
+        self._sorted: Dict[str, List[int]] = dict()  # word -> sorted IDs, dropped on change
+
+    def put(self, employee_id: int, row: Optional[tuple]):
+        """ Replace (or delete with None) a row and update the words """
+        previous = self.rows.pop(employee_id, None)
+        if previous is not None:
+            for word in _words(previous)[1]:
+                ids = self.postings[word]
+                ids.discard(employee_id)
+                self._sorted.pop(word, None)
+                if not ids:
+                    del self.postings[word]
+                    del self.terms[bisect_left(self.terms, word)]
+                    for trigram in _trigrams(word):
+                        words = self.trigrams.get(trigram)
+                        if words is not None:
+                            words.discard(word)
+                            if not words:
+                                del self.trigrams[trigram]
+        if row is None:
+            return
+
+        self.rows[employee_id] = row
+        names, words = _words(row)
+        for word in words:
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                insort(self.terms, word)
+            ids.add(employee_id)
+            self._sorted.pop(word, None)
+            if word in names:
+                for trigram in _trigrams(word):
+                    self.trigrams[trigram].add(word)
+
+    def sorted_ids(self, word: str) -> Sequence[int]:
+        ids = self.postings[word]
+        if len(ids) == 1:
+            return tuple(ids)
+        result = self._sorted.get(word)
+        if result is None:
+            result = self._sorted[word] = sorted(ids)
+        return result
+
+    def candidates(self, word: str) -> Iterator[int]:
+        """
+        Generate IDs of the employees who have a word starting with the word (in word and ID order),
+        and then of those who have a name word containing it.
+        """
+        terms = self.terms
+        i = bisect_left(terms, word)
+        while i < len(terms) and terms[i].startswith(word):
+            yield from self.sorted_ids(terms[i])
+            i += 1
+
+        if len(word) >= SUBSTRING_MIN_LENGTH:
+            postings = [self.trigrams.get(x) for x in _trigrams(word)]
+            if all(postings):
+                smallest = min(postings, key=len)
+                for term in sorted(x for x in smallest if word in x and not x.startswith(word)):
+                    yield from self.sorted_ids(term)
+
+    def prefix_count(self, word: str, cap: int) -> int:
+        """ Count the IDs of the words starting with the word (stops counting above the cap) """
+        terms, count = self.terms, 0
+        i = bisect_left(terms, word)
+        while i < len(terms) and terms[i].startswith(word) and count <= cap:
+            count += len(self.postings[terms[i]])
+            i += 1
+        return count
+
+    @staticmethod
+    def matches(row: tuple, word: str) -> bool:
+        """ Check whether a word of the row starts with the word, or a name word contains it """
+        names, words = _words(row)
+        if any(x.startswith(word) for x in words):
+            return True
+        return len(word) >= SUBSTRING_MIN_LENGTH and any(word in x for x in names)
+
+
+# ============================================================================================
+# Name Index
+# ============================================================================================
+
+
+class NameIndex:
+    """ Type-ahead index over first_name, surname and email, with rows of NAME_INDEX_COLUMNS """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._table = NameTable()
+        self._touched: Optional[Dict[int, Optional[tuple]]] = None  # rows written while loading
+        self.versions = SyncedVersions([EMPLOYEE_LIST_VERSION_KEY])  # served with the validators of the list
+        self.wakeup = threading.Event()  # set to reload before the reconcile interval
+
+        self.ready = False
+        self.loads = 0
+        self.failed_loads = 0
+        self.last_load_ms = None
+        self.last_load_time = None
+        self.drifted_rows = 0  # rows which differed from the database at the last load
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.updates = 0
+
+    def _apply(self, employee_id: int, row: Optional[tuple]):
+        """ Put a written row to the index (lock must be held) """
+        self._table.put(employee_id, row)
+        if self._touched is not None:
+            self._touched[employee_id] = row
+        self.updates += 1
+
+    # ============================================================================================
+    # Load & Reconcile
+    # ============================================================================================
+
+    def load(self, read_page: ReadPage) -> bool:
+        """
+        Load (or reload) the whole index from the database, and swap it with the current one.
+        Rows written while loading keep their written values.
+        :param read_page: function which reads a keyset page of employee rows (get_employees_after)
+        :return: False if a page couldn't be read (the current index is kept)
+        """
+        start_time = time.perf_counter()
+        with self._lock:
+            self._touched = dict()
+        synced = self.versions.start_load()
+
+        rows: Dict[int, tuple] = dict()
+        last_id = 0
+        while True:
+            page = read_page(last_id, LOAD_PAGE_SIZE, NAME_INDEX_COLUMNS)
+            if page is None:  # database error
+                self.versions.finish_load(None)
+                with self._lock:
+                    self._touched = None
+                    self.failed_loads += 1
+                logger.error("Name index load failed, the current index is kept")
+                return False
+
+            _, page_rows = page
+            rows.update((row[0], tuple(row)) for row in page_rows)
+            if len(page_rows) < LOAD_PAGE_SIZE:
+                break
+            last_id = page_rows[-1][0]
+        table = NameTable(rows)  # built without the lock, queries are served by the current table meanwhile
+
+        with self._lock:
+            for employee_id, row in self._touched.items():
+                if row is not None:
+                    table.put(employee_id, row)
+            current_rows = self._table.rows
+            drifted_rows = sum(1 for x in rows.keys() | current_rows.keys() if rows.get(x) != current_rows.get(x))
+
+            self._table, self._touched = table, None
+            self.versions.finish_load(synced)
+            self.drifted_rows = drifted_rows if self.ready else 0
+            self.ready = True
+            self.loads += 1
+            self.last_load_ms = round((time.perf_counter() - start_time) * 1000, 3)
+            self.last_load_time = time.time()
+
+        if self.drifted_rows:
+            logger.warning(f"Name index reconciled {self.drifted_rows} drifted rows")
+        logger.info(f"Name index loaded: {len(rows)} rows, {len(table.terms)} words in {self.last_load_ms} ms")
+        return True
+
+    # ============================================================================================
+    # Updates by the write operations
+    # ============================================================================================
+
+    def refresh(self, employee_ids: Sequence[int], read_row: ReadRow, read_page: ReadPage):
+        """ Read the written employees from the database and put them to the index """
+        found = read_rows(employee_ids, NAME_INDEX_COLUMNS, read_row, read_page)
+        with self._lock:
+            for employee_id, row in found.items():
+                self._apply(employee_id, row)
+
+    def update(self, employee_ids: Sequence[int], column: str, value: int):
+        """ Set a column (position, department or status) of the written employees, without reading them again """
+        position = NAME_COLUMN_INDEX[column]
+        with self._lock:
+            for employee_id in employee_ids:
+                row = self._table.rows.get(employee_id)
+                if row is not None and row[position] != value:
+                    self._apply(employee_id, row[:position] + (value,) + row[position + 1:])
+
+    # ============================================================================================
+    # Lookups
+    # ============================================================================================
+
+    def search(self, query: str, limit: int, include_inactive: bool = False) -> List[tuple]:
+        """
+        Get the employees whose words start with every word of the query (or whose name words contain it).
+        Prefix matches come first in word and ID order, and then substring matches of the names.
+        :param query: words to search (case insensitive)
+        :param limit: the maximum number of rows
+        :param include_inactive: include the inactive employees (status 0)
+        :return: rows in NAME_INDEX_COLUMNS order
+        """
+        words = list(dict.fromkeys(query.lower().split()))
+        if not words:
+            return list()
+        status = NAME_COLUMN_INDEX["status"]
+
+        start_time = time.perf_counter()
+        found, seen = list(), set()
+        with self._lock:
+            table = self._table
+            allowed, others = None, list()
+            if len(words) > 1:
+                # the most selective word generates the candidates, and the other words filter them by ID sets
+                counts = {x: table.prefix_count(x, WORD_SET_MAX) for x in words}
+                words.sort(key=lambda x: (counts[x], -len(x)))
+                id_sets = [set(table.candidates(x)) for x in words[1:] if counts[x] <= WORD_SET_MAX]
+                others = [x for x in words[1:] if counts[x] > WORD_SET_MAX]
+                if id_sets:
+                    allowed = set.intersection(*sorted(id_sets, key=len))
+
+            for employee_id in table.candidates(words[0]):
+                if employee_id in seen or (allowed is not None and employee_id not in allowed):
+                    continue
+                seen.add(employee_id)
+                row = table.rows[employee_id]
+                if not include_inactive and row[status] == 0:
+                    continue
+                if all(table.matches(row, x) for x in others):
+                    found.append(row)
+                    if len(found) >= limit:
+                        break
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - start_time
+        return found
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "current": self.versions.is_current(),
+                "rows": len(self._table.rows),
+                "words": len(self._table.terms),
+                "trigrams": len(self._table.trigrams),
+                "loads": self.loads,
+                "failed_loads": self.failed_loads,
+                "last_load_ms": self.last_load_ms,
+                "last_load_time": self.last_load_time,
+                "drifted_rows": self.drifted_rows,
+                "queries": self.queries,
+                "avg_query_us": round(self.query_seconds * 1e6 / self.queries, 3) if self.queries else None,
+                "updates": self.updates,
+            }
+
+
+# ============================================================================================
+# Global variables for name index
+# ============================================================================================
+
+
+NAME_INDEX: NameIndex = None
+
+
+def set_name_index(settings: Settings) -> Optional[NameIndex]:
+    """ Set the (empty) name index of the current process (used with every storage backend) """
+    global NAME_INDEX
+
+    NAME_INDEX = NameIndex() if settings.index.name_enabled else None
+    return NAME_INDEX
+
+
+def start_name_index(read_page: ReadPage, is_ready: Callable[[], bool],
+                     reconcile_seconds: float) -> Optional[threading.Thread]:
+    """
+    Load the name index in a background thread once the storage backend is ready, and reload it periodically.
+    Name searches answer 503 until the first load is done.
+    :param read_page: function which reads a keyset page of employee rows (get_employees_after)
+    :param is_ready: function which checks whether the storage backend is ready
+    :param reconcile_seconds: seconds between reloads
+    :return: the loading thread (None if the index is disabled)
+    """
+    index = NAME_INDEX
+    if index is None:
+        return None
+    return start_reconcile_thread(index, lambda: NAME_INDEX is index, read_page, is_ready, reconcile_seconds,
+                                  "name-index-reconcile")
+
+
+def get_name_index() -> Optional[NameIndex]:
+    return NAME_INDEX
+
+
+def get_name_index_stats() -> dict:
+    """
+    Get size and counters of the name index of the current process.
+    :return: dictionary of rows, words, load and query counters, or {"enabled": False}
+    """
+    if NAME_INDEX is None:
+        return {"enabled": False}
+    return {"enabled": True, **NAME_INDEX.to_dict()}
@@ -0,0 +1,195 @@
+""" Per-function query timing and slow-query log with EXPLAIN plans """
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import pymysql
+
+
+logger = logging.getLogger("app")
+slow_query_logger = logging.getLogger("app.slow_query")
+
+
+# ============================================================================================
+# Global variables for query statistics
+# ============================================================================================
+
+
+MAX_RECORDED_QUERIES = 10  # statements kept per call for the slow-query log
+EXPLAINABLE_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+
+# ============================================================================================
+# Query recorder
+# ============================================================================================
+
+
+class QueryRecorder:
+    """
+    Cursor wrapper which records the executed statements with their bound parameters.
+    Everything else is delegated to the wrapped cursor.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.queries: List[Tuple[str, object]] = list()
+        self.executed = 0
+
+    def _record(self, query: str, args):
+        self.executed += 1
+        if len(self.queries) < MAX_RECORDED_QUERIES:
+            self.queries.append((query, args))
+
+    def execute(self, query: str, args=None):
+        self._record(query, args)
+        return self._cursor.execute(query, args)
+
+    def executemany(self, query: str, args):
+        args = list(args)
+        self._record(query, args[0] if args else None)  # parameters of the first row only
+        return self._cursor.executemany(query, args)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# ============================================================================================
+# Query statistics
+# ============================================================================================
+
+
+class QueryStats:
+    """ Timing counters of one database function in the current worker process """
+
+    def __init__(self):
+        self.calls = 0
+        self.slow_calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.explains = 0
+        self.explains_skipped = 0  # slow calls whose EXPLAIN was rate-limited
+        self.last_explain_time = None
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "slow_calls": self.slow_calls,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "avg_ms": round(self.total_seconds * 1000 / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "explains": self.explains,
+            "explains_skipped": self.explains_skipped,
+        }
+
+
+QUERY_STATS: Dict[str, QueryStats] = dict()
+QUERY_STATS_LOCK = threading.Lock()
+QUERY_STATS_PID: int = os.getpid()
+
+
+def _get_stats(name: str) -> QueryStats:
+    global QUERY_STATS, QUERY_STATS_PID
+
+    if QUERY_STATS_PID != os.getpid():  # counters inherited by fork belong to the parent
+        QUERY_STATS = dict()
+        QUERY_STATS_PID = os.getpid()
+    stats = QUERY_STATS.get(name)
+    if stats is None:
+        stats = QUERY_STATS.setdefault(name, QueryStats())
+    return stats
+
+
+def record_query_time(name: str, elapsed: float, threshold: float, explain_interval: float) -> Tuple[bool, bool]:
+    """
+    Record the elapsed time of a database function call.
+    :param name: name of the database function
+    :param elapsed: elapsed seconds of the call
+    :param threshold: seconds over which the call is slow (0: no slow-query log)
+    :param explain_interval: minimum seconds between EXPLAIN captures of the function
+    :return: (whether the call is slow, whether the EXPLAIN plans of this call should be captured)
+    """
+    with QUERY_STATS_LOCK:
+        stats = _get_stats(name)
+        stats.calls += 1
+        stats.total_seconds += elapsed
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+
+        if not threshold or elapsed < threshold:
+            return False, False
+        stats.slow_calls += 1
+
+        now = time.monotonic()
+        if stats.last_explain_time is not None and now - stats.last_explain_time < explain_interval:
+            stats.explains_skipped += 1
+            return True, False
+        stats.last_explain_time = now
+        stats.explains += 1
+        return True, True
+
+
+def get_query_stats() -> dict:
+    """
+    Get timing counters of the database functions in the current worker process.
+    :return: dictionary of function name to counters
+    """
+    with QUERY_STATS_LOCK:
+        if QUERY_STATS_PID != os.getpid():
+            return dict()
+        return {name: QUERY_STATS[name].to_dict() for name in sorted(QUERY_STATS)}
+
+
+# ============================================================================================
+# Slow-query log
+# ============================================================================================
+
+
+def explain_queries(db_conn, queries: List[Tuple[str, object]]) -> List[dict]:
+    """
+    Capture the EXPLAIN plans of the recorded statements with the same connection.
+    :param db_conn: connection which executed the statements
+    :param queries: list of (query, bound parameters)
+    :return: list of {"query", "plan"}
+    """
+    plans = list()
+    with db_conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        for query, args in queries:
+            if not query.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+                continue
+            try:
+                cursor.execute(f"EXPLAIN {query}", args)
+                plans.append({"query": " ".join(query.split()), "plan": cursor.fetchall()})
+            except Exception as e:
+                plans.append({"query": " ".join(query.split()), "error": str(e)})
+    return plans
+
+
+def log_slow_query(name: str, elapsed: float, recorder: QueryRecorder, db_conn=None):
+    """
+    Write a slow call to the slow-query log.
+    :param name: name of the database function
+    :param elapsed: elapsed seconds of the call
+    :param recorder: recorder of the executed statements
+    :param db_conn: connection for capturing EXPLAIN plans (None: log without plans)
+    """
+    lines = [f"[PID:{os.getpid()}] Slow database function {name}: {elapsed * 1000:.1f} ms, {recorder.executed} statement(s)"]
+    for query, args in recorder.queries:
+        lines.append(f"  query: {' '.join(query.split())} | params: {args!r}")
+
+    if db_conn is not None:
+        try:
+            for plan in explain_queries(db_conn, recorder.queries):
+                lines.append(f"  explain: {plan['query']}")
+                if "error" in plan:
+                    lines.append(f"    error: {plan['error']}")
+                for row in plan.get("plan", []):
+                    lines.append(f"    {row}")
+        except Exception as e:
+            lines.append(f"  explain failed: {e}")
+
+    slow_query_logger.warning("\n".join(lines))
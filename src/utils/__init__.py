@@ -1,2 +1,12 @@
 from .response_form import make_response_form
-from .validation_model import EmployeeSearchResponse, DocumentApprovalResponse
+from .json_provider import OrjsonProvider, make_json_response
+from .response_formats import negotiate_format, format_variant, make_list_response
+from .validation_model import EmployeeSearchResponse, DocumentApprovalResponse, parse_fields, make_partial_model
+from .pagination import encode_cursor, decode_cursor
+from .row_decoder import RowDecoder, get_row_decoder
+from .shared_cache import (set_response_cache, get_response_cache, get_response_cache_stats, set_versions,
+                           get_versions)
+from .conditional import (conditional_get, employee_version_key, mark_unversioned, is_unversioned, SyncedVersions,
+                          GROUP_VERSION_KEYS, EMPLOYEE_LIST_VERSION_KEY)
+from .compression import init_compression, get_compression_stats
+from .async_views import async_variant, loop_view, get_async_variant, is_loop_view
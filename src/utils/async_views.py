@@ -0,0 +1,40 @@
+"""
+Views of the async(ASGI) serving mode (see views/async_view.py).
+The requests are dispatched by the flask app on the event loop, and each view runs
+- as its async variant, which awaits the database functions of db/async_employee.py (read APIs)
+- as it is on the event loop, if it doesn't wait for the database (ex - status APIs, in-memory indexes)
+- in the database executor as a whole otherwise (ex - writes, streamed exports)
+"""
+from typing import Callable, Dict, Optional, Set
+
+
+ASYNC_VIEWS: Dict[Callable, Callable] = dict()  # view function -> its async variant
+LOOP_VIEWS: Set[Callable] = set()  # view functions which don't wait for the database
+
+
+def async_variant(view: Callable):
+    """
+    Decorator to register an async function as the variant of a view in the async mode.
+    It answers conditional GETs with the validators of the view (conditional_get), so keep both
+    thin around the helpers of the request parsing and the response.
+    :param view: view function of a route (ex - search_by_id)
+    """
+    def decorator(func):
+        revalidate = getattr(view, "conditional_get", None)
+        ASYNC_VIEWS[view] = revalidate(func) if revalidate is not None else func
+        return func
+    return decorator
+
+
+def loop_view(view: Callable) -> Callable:
+    """ Decorator to run a view which doesn't wait for the database on the event loop in the async mode """
+    LOOP_VIEWS.add(view)
+    return view
+
+
+def get_async_variant(view: Callable) -> Optional[Callable]:
+    return ASYNC_VIEWS.get(view)
+
+
+def is_loop_view(view: Callable) -> bool:
+    return view in LOOP_VIEWS
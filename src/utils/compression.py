@@ -0,0 +1,160 @@
+"""
+Response compression negotiated by Accept-Encoding (gzip, deflate).
+Responses smaller than the threshold are sent as they are, and streamed responses are compressed chunk by chunk.
+The compression ratio and CPU time are counted per endpoint, for tuning the level and the threshold.
+"""
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional
+import zlib
+
+from flask import Flask, Response, request
+
+from config import Settings
+
+
+# wbits of zlib.compressobj for each content coding
+ENCODINGS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/vnd.columnar+json", "application/msgpack",
+                          "application/x-ndjson", "text/csv", "text/plain", "text/html"}
+
+
+# ============================================================================================
+# Compression Statistics
+# ============================================================================================
+
+
+class CompressionStats:
+    """ Bytes and CPU time of compression per endpoint (per worker process) """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, float]] = dict()
+
+    def record(self, endpoint: str, encoding: Optional[str], bytes_in: int, bytes_out: int, cpu_seconds: float):
+        """
+        Record a response.
+        :param encoding: content coding of the response (None if it was not compressed)
+        """
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {"responses": 0, "compressed": 0, "bytes_in": 0,
+                                                          "bytes_out": 0, "cpu_seconds": 0.0})
+            stats["responses"] += 1
+            if encoding is not None:
+                stats["compressed"] += 1
+                stats["bytes_in"] += bytes_in
+                stats["bytes_out"] += bytes_out
+                stats["cpu_seconds"] += cpu_seconds
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: {
+                    "responses": x["responses"],
+                    "compressed": x["compressed"],
+                    "bytes_in": x["bytes_in"],
+                    "bytes_out": x["bytes_out"],
+                    "ratio": round(x["bytes_out"] / x["bytes_in"], 4) if x["bytes_in"] else None,
+                    "cpu_ms": round(x["cpu_seconds"] * 1000, 3),
+                    "cpu_us_per_kib": round(x["cpu_seconds"] * 1e6 / (x["bytes_in"] / 1024), 3) if x["bytes_in"] else None,
+                }
+                for endpoint, x in sorted(self._endpoints.items())
+            }
+
+
+COMPRESSION_STATS = CompressionStats()
+
+
+def get_compression_stats() -> dict:
+    return COMPRESSION_STATS.to_dict()
+
+
+# ============================================================================================
+# Compression
+# ============================================================================================
+
+
+def negotiate_encoding() -> Optional[str]:
+    """ Choose the content coding of the request's Accept-Encoding (gzip is preferred on equal quality) """
+    accept = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        quality = accept[encoding]  # also matches "*"
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str, level: int, endpoint: str) -> Iterator[bytes]:
+    """ Compress a streamed body chunk by chunk, and record the statistics at the end of the stream """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
+    bytes_in, bytes_out, cpu_seconds = 0, 0, 0.0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            start_time = time.thread_time()
+            compressed = compressor.compress(chunk)
+            cpu_seconds += time.thread_time() - start_time
+            bytes_in += len(chunk)
+            if compressed:
+                bytes_out += len(compressed)
+                yield compressed
+
+        start_time = time.thread_time()
+        compressed = compressor.flush()
+        cpu_seconds += time.thread_time() - start_time
+        bytes_out += len(compressed)
+        yield compressed
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        COMPRESSION_STATS.record(endpoint, encoding, bytes_in, bytes_out, cpu_seconds)
+
+
+def compress_response(response: Response, level: int, min_bytes: int) -> Response:
+    """
+    Compress a response by the Accept-Encoding of the request.
+    :param level: zlib compression level
+    :param min_bytes: responses smaller than this are not compressed
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough \
+            or "Content-Encoding" in response.headers or not (200 <= response.status_code < 300) \
+            or response.status_code == 204:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    endpoint = request.endpoint or request.path
+    encoding = negotiate_encoding()
+
+    if response.is_streamed:
+        if encoding is None:
+            COMPRESSION_STATS.record(endpoint, None, 0, 0, 0.0)
+            return response
+        response.response = _compress_stream(response.response, encoding, level, endpoint)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if encoding is None or len(body) < min_bytes:
+            COMPRESSION_STATS.record(endpoint, None, len(body), len(body), 0.0)
+            return response
+        start_time = time.thread_time()
+        compressor = zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
+        compressed = compressor.compress(body) + compressor.flush()
+        COMPRESSION_STATS.record(endpoint, encoding, len(body), len(compressed), time.thread_time() - start_time)
+        response.set_data(compressed)
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:  # the compressed body is another representation of the same data
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app: Flask, settings: Settings):
+    """ Compress the responses of the app by Accept-Encoding (APP__COMPRESSION__*) """
+    if not settings.compression.enabled:
+        return
+
+    level, min_bytes = settings.compression.level, settings.compression.min_bytes
+    app.after_request(lambda response: compress_response(response, level, min_bytes))
@@ -0,0 +1,174 @@
+"""
+Conditional GETs (ETag / Last-Modified) by versions of rows and groups shared by the workers.
+Writes bump the versions (see db/backend.py), and a request whose validators are current gets `304 Not Modified`
+without running the view (no query, no JSON serialization).
+A response must never be older than its validators, so per-worker data (the employee cache and the in-memory
+indexes) is synced with the shared versions: it is used while they haven't moved by the writes of other workers.
+"""
+from functools import wraps
+import inspect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app, g, has_request_context, request
+from response_codes import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+
+from utils.shared_cache import get_versions
+
+
+# version keys of the employee list, and of the groups of the search APIs
+EMPLOYEE_LIST_VERSION_KEY = "employees"
+GROUP_VERSION_KEYS = {"position": "position", "department": "department"}
+
+
+def employee_version_key(employee_id: int) -> str:
+    return f"employee:{employee_id}"
+
+
+def written_version_keys(employee_ids: Iterable[int]) -> List[str]:
+    """
+    Get the version keys which a write of the employees changes.
+    Groups are versioned per column (not per value), because a write can move an employee out of a group
+    whose value the writer doesn't know.
+    """
+    return [*map(employee_version_key, employee_ids), *GROUP_VERSION_KEYS.values(), EMPLOYEE_LIST_VERSION_KEY]
+
+
+def mark_unversioned():
+    """
+    Send the response of the current request without validators, and don't cache it in the shared response cache.
+    (ex - served by per-worker data which is behind the shared versions, and can't be read from the database)
+    """
+    if has_request_context():
+        g.unversioned = True
+
+
+def is_unversioned() -> bool:
+    return has_request_context() and g.get("unversioned", False)
+
+
+class SyncedVersions:
+    """
+    Shared versions which per-worker data (ex - an in-memory index) is synced with.
+    The data is current while the versions haven't moved since the sync, except by the writes applied to it.
+    Without shared versions (disabled), the data is always current.
+    """
+
+    def __init__(self, keys: Sequence[str]):
+        self.keys = tuple(keys)
+        self._lock = threading.Lock()
+        self._synced: Optional[List[str]] = None
+        self._loading: Optional[list] = None  # bumps applied to the data while it is loaded
+
+    def start_load(self) -> Optional[List[str]]:
+        """
+        Read the versions before the data is read from the database, and record the bumps applied meanwhile.
+        :return: versions to pass to finish_load
+        """
+        with self._lock:
+            self._loading = list()
+        versions = get_versions()
+        return None if versions is None else versions.get_each(self.keys)
+
+    def finish_load(self, synced: Optional[List[str]]):
+        """ Sync with the versions read by start_load (None if the load failed) """
+        with self._lock:
+            loading, self._loading = self._loading, None
+            if synced is not None:
+                self._synced = self._follow(synced, loading or ())
+
+    def advance(self, bumps: Sequence[Dict[str, Tuple[str, str]]]):
+        """
+        Follow the version bumps of the writes which have been applied to the data, in the order of the bumps.
+        A bump from other than the synced version means a write of another worker in between, so it isn't followed.
+        :param bumps: results of SharedVersions.bump
+        """
+        with self._lock:
+            if self._loading is not None:
+                self._loading.extend(bumps)
+            if self._synced is not None:
+                self._synced = self._follow(self._synced, bumps)
+
+    def is_current(self) -> bool:
+        """ Check whether no other worker has written the data since the sync """
+        versions = get_versions()
+        if versions is None:
+            return True
+        with self._lock:
+            synced = self._synced
+        return synced is not None and versions.get_each(self.keys) == synced
+
+    def _follow(self, synced: List[str], bumps: Iterable[Dict[str, Tuple[str, str]]]) -> List[str]:
+        synced = list(synced)
+        for bump in bumps:
+            for i, key in enumerate(self.keys):
+                if key in bump and bump[key][0] == synced[i]:
+                    synced[i] = bump[key][1]
+        return synced
+
+
+def conditional_get(version_keys: Callable[..., Sequence[str]], variant: Optional[Callable[[], str]] = None):
+    """
+    Decorator to answer conditional GETs of a view (or of its async variant) with ETag and Last-Modified.
+    The validators are read before the view, so a write while it runs only makes the next request get the full response.
+    Last-Modified has whole seconds, so it is sent (and If-Modified-Since is answered) only once the second of the last
+    write has passed. Until then a write in the same second would keep it, and only the ETag tells them apart.
+    Responses with a database error (ex - an empty group) get no validators.
+    :param version_keys: function of the view arguments, which returns the version keys of the response
+    :param variant: function which returns the representation of the request (ex - format_variant), added to the ETag
+    """
+    from db.init_pool import has_db_error  # db imports utils
+
+    def read_validators(args, kwargs) -> Optional[Tuple[str, Optional[str], bool]]:
+        """ :return: (ETag, Last-Modified if settled, whether the client has them), or None if not conditional """
+        versions = get_versions()
+        if versions is None or request.method != "GET":
+            return None
+
+        etag, last_modified = versions.get(version_keys(*args, **kwargs))
+        settled = time.time() >= int(last_modified) + 1  # no more writes in the second of Last-Modified
+        suffix = variant() if variant is not None else ""
+        if suffix:
+            etag = f"{etag}-{suffix}"
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)  # weak if the response was compressed
+        else:
+            not_modified = settled and request.if_modified_since is not None and \
+                int(last_modified) <= request.if_modified_since.timestamp()
+        return etag, last_modified if settled else None, not_modified
+
+    def set_validators(result, validators):
+        """ Make the response of the view result (None if not modified) with the validators """
+        etag, last_modified, _ = validators
+        if result is None:
+            response = current_app.response_class(status=HTTP_304_NOT_MODIFIED.status_code)
+        else:
+            response = current_app.make_response(result)
+            if response.status_code != HTTP_200_OK.status_code or is_unversioned() or has_db_error():
+                return response
+
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        return response
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                validators = read_validators(args, kwargs)
+                if validators is None:
+                    return await func(*args, **kwargs)
+                return set_validators(None if validators[2] else await func(*args, **kwargs), validators)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                validators = read_validators(args, kwargs)
+                if validators is None:
+                    return func(*args, **kwargs)
+                return set_validators(None if validators[2] else func(*args, **kwargs), validators)
+
+        wrapper.conditional_get = decorator  # for the async variant of the view (see utils/async_views.py)
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+"""
+Fast JSON encoding of API responses with orjson.
+`OrjsonProvider` replaces the JSON provider of the app (jsonify, dictionaries returned by views) with the same output
+as the default provider of Flask: sorted keys, and dates in HTTP date format.
+`make_json_response` writes the `{"response", "status"}` form of make_response_form straight to bytes.
+"""
+from typing import Tuple
+
+from flask import Response, current_app
+from flask.json.provider import DefaultJSONProvider
+import orjson
+from response_codes import HTTP_200_OK, HTTP_SUCCESS
+
+from utils.response_form import make_response_form
+
+
+# datetime, date and time are passed to DefaultJSONProvider.default, which formats them like Flask (HTTP date)
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def dumps_bytes(obj, sort_keys: bool = True, indent: bool = False) -> bytes:
+    """
+    Serialize an object to JSON bytes.
+    :param obj: object to serialize
+    :param sort_keys: sort the keys of dictionaries (like Flask)
+    :param indent: indent by 2 spaces (else compact)
+    """
+    option = ORJSON_OPTIONS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """ JSON provider which serializes with orjson (parsing is same as the default provider) """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj, kwargs.get("sort_keys", self.sort_keys), bool(kwargs.get("indent"))).decode()
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(dumps_bytes(obj, self.sort_keys, indent) + b"\n", mimetype=self.mimetype)
+
+
+def make_json_response(data=None, http_status=HTTP_200_OK, description: str = '') -> Tuple[Response, int]:
+    """
+    Make API response of make_response_form as JSON, without building the response dictionary.
+    Same body as `jsonify(make_response_form(...)[0])` in compact form.
+    :param data: return data from API process
+    :param http_status: (response_codes) HTTP status code
+    :return: (response, http_status_code)
+    """
+    code = http_status.status_code
+    if code in HTTP_SUCCESS:
+        body = b'{"response":' + dumps_bytes(data) + b',"status":' + str(code).encode() + b'}\n'
+    else:
+        body = dumps_bytes(make_response_form(data, http_status, description)[0]) + b"\n"
+    return current_app.response_class(body, mimetype="application/json"), code
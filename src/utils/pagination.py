@@ -0,0 +1,38 @@
+"""
+Functions for keyset(seek) pagination.
+The cursor is an opaque token for clients, which carries the last primary key of the previous page.
+"""
+import base64
+import json
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Make an opaque cursor from the last primary key of a page.
+    :param last_id: the last primary key of the current page
+    :return: url-safe cursor string
+    """
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Get the last primary key from an opaque cursor.
+    Empty cursor means the first page.
+    :param cursor: cursor string made by encode_cursor
+    :return: the last primary key of the previous page
+    :raise ValueError: if the cursor is not valid
+    """
+    if not cursor:
+        return 0
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["id"]
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    if not isinstance(last_id, int) or last_id < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return last_id
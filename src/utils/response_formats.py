@@ -0,0 +1,128 @@
+"""
+Alternative response formats of the list APIs, negotiated by `?format=` or the Accept header.
+- json: rows as dictionaries (default, same as make_json_response)
+- columnar: JSON with one key per column and parallel arrays of values, so key names are not repeated per row
+- msgpack: MessagePack of the same form as json
+- csv: a header line and the rows (the other fields of the response, like next_cursor, are sent as X-* headers)
+Error responses are always JSON.
+"""
+import csv
+import io
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from flask import Response, current_app, request
+from flask.json.provider import DefaultJSONProvider
+import msgpack
+from response_codes import HTTP_200_OK
+
+from utils.json_provider import dumps_bytes, make_json_response
+
+
+RESPONSE_MIMETYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.columnar+json",
+    "msgpack": "application/msgpack",
+    "csv": "text/csv",
+}
+ACCEPT_MIMETYPES = {**{mimetype: name for name, mimetype in RESPONSE_MIMETYPES.items()},
+                    "application/x-msgpack": "msgpack"}
+
+
+# ============================================================================================
+# Negotiation
+# ============================================================================================
+
+
+def negotiate_format() -> str:
+    """
+    Get the response format of the request: `?format=`, else the best match of the Accept header, else json.
+    :raise ValueError: if `?format=` is not a known format
+    """
+    name = request.args.get("format")
+    if name is not None:
+        name = name.lower()
+        if name not in RESPONSE_MIMETYPES:
+            raise ValueError(f"Invalid format. Expected one of: {', '.join(RESPONSE_MIMETYPES)}.")
+        return name
+
+    mimetype = request.accept_mimetypes.best_match(ACCEPT_MIMETYPES, default="application/json")
+    return ACCEPT_MIMETYPES[mimetype]
+
+
+def format_variant() -> str:
+    """ ETag suffix of the response format (conditional_get), empty for json and invalid formats """
+    try:
+        name = negotiate_format()
+    except ValueError:
+        return ""
+    return "" if name == "json" else name
+
+
+# ============================================================================================
+# Encoders
+# ============================================================================================
+
+
+def _values_getter(columns: Sequence[str]):
+    """ Get the values of the columns from a dictionary row as a tuple """
+    if len(columns) == 1:  # itemgetter with one key doesn't return a tuple
+        column = columns[0]
+        return lambda row: (row[column],)
+    return itemgetter(*columns)
+
+
+def to_columnar(rows: List[dict], columns: Sequence[str]) -> Dict[str, list]:
+    """ Transpose dictionary rows to {column: [values]} """
+    if not rows:
+        return {name: [] for name in columns}
+    return {name: list(values) for name, values in zip(columns, zip(*map(_values_getter(columns), rows)))}
+
+
+def _header_name(key: str) -> str:
+    """ next_cursor -> X-Next-Cursor """
+    return "X-" + "-".join(word.capitalize() for word in key.split("_"))
+
+
+def _encode_csv(rows: List[dict], columns: Sequence[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    if columns:
+        writer.writerows(map(_values_getter(columns), rows))
+    return buffer.getvalue().encode("utf-8")
+
+
+def make_list_response(rows: List[dict], columns: Optional[Sequence[str]] = None, list_key: Optional[str] = None,
+                       extra: Optional[dict] = None, response_format: str = "json") -> Tuple[Response, int]:
+    """
+    Make a successful API response of a list of rows in the response format.
+    :param rows: dictionary rows
+    :param columns: columns of the rows (None: keys of the first row)
+    :param list_key: key of the rows in the response data (None: the data is the rows itself)
+    :param extra: other fields of the response data (ex - next_cursor)
+    :param response_format: name of RESPONSE_MIMETYPES (negotiate_format)
+    :return: (response, http_status_code)
+    """
+    if columns is None:
+        columns = tuple(rows[0].keys()) if rows else ()
+    extra = extra or dict()
+
+    if response_format == "csv":
+        response = current_app.response_class(_encode_csv(rows, columns), mimetype=RESPONSE_MIMETYPES["csv"])
+        for key, value in extra.items():
+            if value is not None:
+                response.headers[_header_name(key)] = dumps_bytes(value).decode().strip('"')
+    else:
+        values = to_columnar(rows, columns) if response_format == "columnar" else rows
+        data = values if list_key is None else {list_key: values, **extra}
+        if response_format == "msgpack":
+            body = msgpack.packb({"response": data, "status": HTTP_200_OK.status_code},
+                                 default=DefaultJSONProvider.default)
+            response = current_app.response_class(body, mimetype=RESPONSE_MIMETYPES["msgpack"])
+        else:
+            response, _ = make_json_response(data=data)
+            response.mimetype = RESPONSE_MIMETYPES[response_format]
+
+    response.vary.add("Accept")
+    return response, HTTP_200_OK.status_code
@@ -0,0 +1,208 @@
+"""
+Fast read-side decoders for database rows.
+Rows from the database are trusted values, so instead of validating every row with the pydantic
+response models, each column is converted by a precompiled converter (lookup tables, date formatting).
+The output is the same as `ResponseModel(**row).model_dump()`. (see test/row_decoder_test.py)
+"""
+import datetime
+from functools import lru_cache
+from operator import itemgetter
+from typing import Callable, Dict, List, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+from utils.validation_model import EmployeeSearchResponse, DocumentApprovalResponse
+
+
+# ==============================================================================================
+# Column Converters
+# ==============================================================================================
+
+
+def _int(v) -> int:
+    if type(v) is int:
+        return v
+    raise ValueError(f"Invalid integer: {v!r}")
+
+
+def _str(v) -> str:
+    if type(v) is str:
+        return v
+    raise ValueError(f"Invalid string: {v!r}")
+
+
+def _lookup(table: Dict[int, str], normalize: Callable[[str], str] = None, keep_input: bool = True) -> Callable:
+    """
+    Make a converter from the code of the database to its name.
+    :param table: code to name table
+    :param normalize: normalize string input before checking the names (ex - str.lower)
+    :param keep_input: return the string input as it is (else return the normalized value)
+    """
+    names = frozenset(table.values())
+
+    def convert(v) -> str:
+        try:
+            return table[v]
+        except (KeyError, TypeError):
+            pass
+        if isinstance(v, str):
+            normalized = normalize(v) if normalize else v
+            if normalized in names:
+                return v if keep_input else normalized
+        raise ValueError(f"Invalid value: {v!r}")
+
+    return convert
+
+
+def _date_formatter(fmt: str, date_only: bool = False) -> Callable:
+    """
+    Make a converter from date/datetime to string.
+    isoformat() is used for naive datetime as a faster equivalent of strftime (years 1000-9999 of MySQL DATETIME).
+    :param fmt: strftime format, "%Y-%m-%d" or "%Y-%m-%d %H:%M:%S" (also used for checking string input)
+    :param date_only: fmt has date part only
+    """
+    def convert(v) -> str:
+        if type(v) is datetime.datetime and v.tzinfo is None and v.year >= 1000:
+            return v.isoformat()[:10] if date_only else v.isoformat(" ", "seconds")
+        if type(v) is datetime.date and date_only and v.year >= 1000:
+            return v.isoformat()
+        if isinstance(v, (datetime.datetime, datetime.date)):
+            return v.strftime(fmt)
+        if isinstance(v, str):
+            datetime.datetime.strptime(v, fmt)  # raise ValueError if not valid
+            return v
+        raise ValueError(f"Invalid date: {v!r}")
+
+    return convert
+
+
+def _datetime_formatter(fmt: str, check_fmt: str) -> Callable:
+    """ Make a converter from datetime to string, which checks string input with the other format """
+    format_datetime = _date_formatter(fmt)
+
+    def convert(v) -> str:
+        if isinstance(v, str):
+            datetime.datetime.strptime(v, check_fmt)  # raise ValueError if not valid
+            return v
+        return format_datetime(v)
+
+    return convert
+
+
+def _nullable(convert: Callable) -> Callable:
+    """ Make a converter of a nullable column (NULL to None) """
+    def convert_nullable(v):
+        return None if v is None else convert(v)
+
+    return convert_nullable
+
+
+_format_date = _date_formatter("%Y-%m-%d", date_only=True)
+_format_datetime = _date_formatter("%Y-%m-%d %H:%M:%S")
+
+
+EMPLOYEE_CONVERTERS = {
+    "id": _int,
+    "first_name": _str,
+    "surname": _str,
+    "position": _lookup({0: "Employee", 1: "Manager", 2: "Director"}),
+    "department": _lookup({0: "hr", 1: "it", 2: "sales"}, normalize=str.lower),
+    "phone_number": _str,
+    "email": _str,
+    "birth_date": _nullable(_format_date),
+    "status": _lookup({0: "inactive", 1: "active"}, normalize=str.lower),
+    "description": _str,
+    "register_time": _nullable(_format_datetime),
+}
+
+DOCUMENT_CONVERTERS = {
+    "id": _int,
+    "issuer": _int,
+    "assignee": _int,
+    "status": _lookup({0: "Pending", 1: "Approved", 2: "Rejected"}, normalize=str.capitalize, keep_input=False),
+    "dayoff_start_date": _format_date,
+    "dayoff_end_date": _format_date,
+    "reason": _str,
+    "created_at": _datetime_formatter("%Y-%m-%d %H:%M:%S", check_fmt="%Y-%m-%d"),
+    "updated_at": _datetime_formatter("%Y-%m-%d %H:%M:%S", check_fmt="%Y-%m-%d"),
+}
+
+MODEL_CONVERTERS = {
+    EmployeeSearchResponse: EMPLOYEE_CONVERTERS,
+    DocumentApprovalResponse: DOCUMENT_CONVERTERS,
+}
+
+
+# ==============================================================================================
+# Row Decoder
+# ==============================================================================================
+
+
+class RowDecoder:
+    """ Decoder of tuple rows with fixed columns to the dictionaries of a response model """
+
+    def __init__(self, model: Type[BaseModel], columns: Sequence[str], fields: Sequence[str] = None):
+        """
+        :param model: response model which the output should be same with
+        :param columns: column names of the tuple rows (cursor.description)
+        :param fields: fields to output in the order of the model (None for all fields)
+        :raise ValueError: if a required field is not in the columns
+        """
+        converters = MODEL_CONVERTERS[model]
+        fields = fields or tuple(model.model_fields.keys())
+        self.columns = tuple(columns)
+
+        self.names: List[str] = list()
+        self.converters: List[Callable] = list()
+        indexes: List[int] = list()
+        self.defaults: Dict[str, object] = dict()
+        for name in fields:
+            if name in columns:
+                self.names.append(name)
+                self.converters.append(converters[name])
+                indexes.append(columns.index(name))
+            elif not model.model_fields[name].is_required():
+                self.defaults[name] = model.model_fields[name].default
+            else:
+                raise ValueError(f"Column is missing for the required field: {name}")
+
+        if len(indexes) > 1:
+            self.getter = itemgetter(*indexes)
+            self.dict_getter = itemgetter(*self.names)
+        else:  # itemgetter with one index doesn't return a tuple
+            self.getter = lambda row: tuple(row[i] for i in indexes)
+            self.dict_getter = lambda row: tuple(row[name] for name in self.names)
+        self.order = list(fields)
+
+    def decode(self, row: tuple) -> dict:
+        """ Decode a tuple row """
+        values = dict(zip(self.names, [convert(v) for convert, v in zip(self.converters, self.getter(row))]))
+        if self.defaults:
+            values.update(self.defaults)
+            values = {name: values[name] for name in self.order}
+        return values
+
+    def decode_all(self, rows: Sequence[tuple]) -> List[dict]:
+        """ Decode tuple rows """
+        names, converters, getter = self.names, self.converters, self.getter
+        if self.defaults:
+            return [self.decode(row) for row in rows]
+        return [dict(zip(names, [convert(v) for convert, v in zip(converters, getter(row))])) for row in rows]
+
+    def decode_dicts(self, rows: Sequence[dict]) -> List[dict]:
+        """ Decode dictionary rows (ex - rows of DictCursor) """
+        names, converters, getter = self.names, self.converters, self.dict_getter
+        if self.defaults:
+            return [self.decode(tuple(row[name] for name in self.columns)) for row in rows]
+        return [dict(zip(names, [convert(v) for convert, v in zip(converters, getter(row))])) for row in rows]
+
+
+@lru_cache(maxsize=256)
+def get_row_decoder(model: Type[BaseModel], columns: Tuple[str, ...], fields: Tuple[str, ...] = None) -> RowDecoder:
+    """
+    Get a cached decoder for the model and the columns.
+    :param model: response model (EmployeeSearchResponse, DocumentApprovalResponse)
+    :param columns: column names of the tuple rows
+    :param fields: fields to output (None for all fields)
+    """
+    return RowDecoder(model, columns, fields)
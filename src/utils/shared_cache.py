@@ -0,0 +1,364 @@
+"""
+Cache of serialized responses and data versions shared by the worker processes of a host.
+They are stored in memory-mapped files of fixed size, so the memory doesn't grow with the number of workers,
+and a write in any worker invalidates the responses of all workers by bumping the version counter in the file.
+"""
+
+from abc import ABC, abstractmethod
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import Settings
+
+
+logger = logging.getLogger("app")
+
+MAGIC = b"EMPRESP1"
+# magic, version, hits, misses, stores, evictions, slot count, slot size
+HEADER = struct.Struct("<8sQQQQQII")
+# key digest, version, expire time (epoch seconds), value length
+SLOT_HEADER = struct.Struct("<16sQdI")
+EMPTY_DIGEST = bytes(16)
+
+VERSIONS_MAGIC = b"EMPVERS1"
+# magic, generation (random per file), creation time, slot count
+VERSIONS_HEADER = struct.Struct("<8sQdI4x")
+# version, modified time (epoch seconds)
+VERSION_SLOT = struct.Struct("<Qd")
+
+
+# ============================================================================================
+# Shared Response Cache
+# ============================================================================================
+
+
+def default_cache_path(settings: Settings, name: str = "responses") -> str:
+    """
+    Path of a shared file in shared memory (/dev/shm) if the host has it, else in the temp directory.
+    The file name has a hash of the database, so instances of a host which use other databases don't share it.
+    """
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    rdb = settings.rdb
+    database = f"{settings.storage.backend}://{rdb.host}:{rdb.port}/{rdb.database}"
+    digest = hashlib.blake2b(database.encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(directory, f"python-flask-api-simple.{digest}.{name}")
+
+
+class SharedFile(ABC):
+    """
+    Memory-mapped file shared by the worker processes of a host.
+    Threads of a process are serialized by a lock, processes by flock on the file.
+    """
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self._lock = threading.Lock()
+        self._fd, self._map = self._open()
+
+    @abstractmethod
+    def _is_initialized(self, mapped: mmap.mmap) -> bool:
+        """ Check whether the header of the file is of this geometry """
+
+    @abstractmethod
+    def _initialize(self, mapped: mmap.mmap):
+        """ Write the header of a new (zero-filled) file """
+
+    def _open(self) -> Tuple[int, mmap.mmap]:
+        """ Open (or create) the file and map it. A file of other geometry is replaced, not resized under its users """
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            stat = os.fstat(fd)
+            try:
+                replaced = os.stat(self.path).st_ino != stat.st_ino  # by another process while waiting for the lock
+            except FileNotFoundError:
+                replaced = True
+            if not replaced and stat.st_size not in (0, self.size):
+                os.unlink(self.path)
+                replaced = True
+            if replaced:
+                os.close(fd)  # releases the lock
+                continue
+
+            try:
+                if stat.st_size == 0:
+                    os.ftruncate(fd, self.size)
+                mapped = mmap.mmap(fd, self.size)
+                if not self._is_initialized(mapped):
+                    if stat.st_size:  # a new file is already zero-filled (and its pages aren't allocated until used)
+                        for offset in range(0, self.size, mmap.PAGESIZE):
+                            mapped[offset:offset + mmap.PAGESIZE] = bytes(min(mmap.PAGESIZE, self.size - offset))
+                    self._initialize(mapped)
+            except OSError:
+                os.close(fd)
+                raise
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            return fd, mapped
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+class SharedResponseCache(SharedFile):
+    """
+    Direct-mapped hash table of responses in a memory-mapped file.
+    A key is stored in the slot of its hash, replacing the previous response of the slot.
+    An entry is valid while its version is the version of the file and it isn't expired.
+    """
+
+    def __init__(self, path: str, slots: int, slot_bytes: int, ttl_seconds: float):
+        if slot_bytes <= SLOT_HEADER.size:
+            raise ValueError(f"slot_bytes must be larger than {SLOT_HEADER.size}")
+
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.ttl_seconds = ttl_seconds
+        super().__init__(path, HEADER.size + slots * slot_bytes)
+
+    def _is_initialized(self, mapped: mmap.mmap) -> bool:
+        magic, *_, slot_count, slot_size = HEADER.unpack_from(mapped, 0)
+        return (magic, slot_count, slot_size) == (MAGIC, self.slots, self.slot_bytes)
+
+    def _initialize(self, mapped: mmap.mmap):
+        HEADER.pack_into(mapped, 0, MAGIC, 0, 0, 0, 0, 0, self.slots, self.slot_bytes)
+
+    def _slot(self, key: str) -> Tuple[bytes, int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        return digest, HEADER.size + int.from_bytes(digest[:8], "little") % self.slots * self.slot_bytes
+
+    def _add_counter(self, index: int, value: int = 1):
+        # index of the counter in HEADER (1: version, 2: hits, 3: misses, 4: stores, 5: evictions)
+        offset = 8 + (index - 1) * 8
+        count, = struct.unpack_from("<Q", self._map, offset)
+        struct.pack_into("<Q", self._map, offset, count + value)
+
+    @property
+    def version(self) -> int:
+        return struct.unpack_from("<Q", self._map, 8)[0]
+
+    def get(self, key: str) -> Tuple[Optional[bytes], int]:
+        """
+        Get a response.
+        :param key: key of the response (ex - path and query string of the request)
+        :return: (response or None, version), pass the version to `put` when the response is made on a miss
+        """
+        digest, offset = self._slot(key)
+        with self._locked():
+            version = self.version
+            slot_digest, slot_version, expires, length = SLOT_HEADER.unpack_from(self._map, offset)
+            if slot_digest == digest and slot_version == version and expires > time.time():
+                self._add_counter(2)
+                start = offset + SLOT_HEADER.size
+                return self._map[start:start + length], version
+            self._add_counter(3)
+            return None, version
+
+    def put(self, key: str, value: bytes, version: int) -> bool:
+        """
+        Store a response, unless the data was written after `get` (the version of the file has changed).
+        :param key: key of the response
+        :param value: serialized response
+        :param version: version returned by `get` before the response was made
+        :return: True if it is stored
+        """
+        if len(value) > self.slot_bytes - SLOT_HEADER.size:
+            return False
+
+        digest, offset = self._slot(key)
+        with self._locked():
+            if version != self.version:
+                return False
+            slot_digest, slot_version, expires, _ = SLOT_HEADER.unpack_from(self._map, offset)
+            if slot_digest not in (EMPTY_DIGEST, digest) and slot_version == version and expires > time.time():
+                self._add_counter(5)
+            SLOT_HEADER.pack_into(self._map, offset, digest, version, time.time() + self.ttl_seconds, len(value))
+            start = offset + SLOT_HEADER.size
+            self._map[start:start + len(value)] = value
+            self._add_counter(4)
+            return True
+
+    def bump_version(self) -> int:
+        """ Invalidate all cached responses (of every worker) """
+        with self._locked():
+            self._add_counter(1)
+            return self.version
+
+    def to_dict(self) -> dict:
+        with self._locked():
+            _, version, hits, misses, stores, evictions, _, _ = HEADER.unpack_from(self._map, 0)
+        lookups = hits + misses
+        return {
+            "path": self.path,
+            "bytes": self.size,
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "version": version,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "stores": stores,
+            "evictions": evictions,
+        }
+
+
+
+# ============================================================================================
+# Shared Versions
+# ============================================================================================
+
+
+class SharedVersions(SharedFile):
+    """
+    Version counters of data (ex - a row or a group of rows) in a memory-mapped file, for ETag and Last-Modified.
+    A key is counted in the slot of its hash. Keys sharing a slot are bumped together, which only costs
+    an extra full response, never a stale 304.
+    The generation of the file is in the ETag, so a re-created file doesn't repeat old ETags.
+    """
+
+    def __init__(self, path: str, slots: int):
+        self.slots = slots
+        super().__init__(path, VERSIONS_HEADER.size + slots * VERSION_SLOT.size)
+
+    def _is_initialized(self, mapped: mmap.mmap) -> bool:
+        magic, _, _, slot_count = VERSIONS_HEADER.unpack_from(mapped, 0)
+        return (magic, slot_count) == (VERSIONS_MAGIC, self.slots)
+
+    def _initialize(self, mapped: mmap.mmap):
+        generation = int.from_bytes(os.urandom(8), "little")
+        VERSIONS_HEADER.pack_into(mapped, 0, VERSIONS_MAGIC, generation, time.time(), self.slots)
+
+    def _offset(self, key: str) -> int:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return VERSIONS_HEADER.size + int.from_bytes(digest, "little") % self.slots * VERSION_SLOT.size
+
+    def get(self, keys: Sequence[str]) -> Tuple[str, float]:
+        """
+        Get the validators of data.
+        :param keys: version keys of the data (ex - ["employee:1"])
+        :return: (ETag value, Last-Modified time in epoch seconds)
+        """
+        with self._locked():
+            _, generation, created, _ = VERSIONS_HEADER.unpack_from(self._map, 0)
+            slots = [VERSION_SLOT.unpack_from(self._map, self._offset(key)) for key in keys]
+        etag = f"{generation:x}-" + "-".join(str(version) for version, _ in slots)
+        return etag, max([created, *(modified for _, modified in slots)])
+
+    def get_each(self, keys: Sequence[str]) -> List[str]:
+        """
+        Get the version of each key (ex - the versions which per-worker data is synced with, see SyncedVersions)
+        :param keys: version keys of the data
+        :return: versions in the order of the keys, with the generation of the file (ex - "3fa2c1-12")
+        """
+        with self._locked():
+            _, generation, _, _ = VERSIONS_HEADER.unpack_from(self._map, 0)
+            slots = [VERSION_SLOT.unpack_from(self._map, self._offset(key)) for key in keys]
+        return [f"{generation:x}-{version}" for version, _ in slots]
+
+    def bump(self, keys: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        Bump the versions of written data
+        :return: {key: (version before, version after)} in the format of get_each
+        """
+        now = time.time()
+        bumped: Dict[int, Tuple[str, str]] = dict()
+        offsets = {key: self._offset(key) for key in keys}
+        with self._locked():
+            _, generation, _, _ = VERSIONS_HEADER.unpack_from(self._map, 0)
+            for offset in set(offsets.values()):
+                version, _ = VERSION_SLOT.unpack_from(self._map, offset)
+                VERSION_SLOT.pack_into(self._map, offset, version + 1, now)
+                bumped[offset] = (f"{generation:x}-{version}", f"{generation:x}-{version + 1}")
+        return {key: bumped[offset] for key, offset in offsets.items()}
+
+
+# ============================================================================================
+# Global variables for shared response cache
+# ============================================================================================
+
+
+RESPONSE_CACHE: SharedResponseCache = None
+
+
+def set_response_cache(settings: Settings) -> Optional[SharedResponseCache]:
+    """
+    Open the shared response cache of the settings (APP__CACHE__RESPONSE_*) in the current process.
+    It is disabled for the memory storage backend, whose data is not shared by the workers.
+    """
+    global RESPONSE_CACHE
+
+    if RESPONSE_CACHE is not None:
+        RESPONSE_CACHE.close()
+        RESPONSE_CACHE = None
+
+    if settings.cache.response_enabled and settings.storage.backend != "memory":
+        path = settings.cache.response_path or default_cache_path(settings)
+        try:
+            RESPONSE_CACHE = SharedResponseCache(path, settings.cache.response_slots,
+                                                 settings.cache.response_slot_bytes, settings.cache.response_ttl_seconds)
+        except OSError as e:
+            logger.error(f"Shared response cache is disabled, can't open {path}: {e}")
+    return RESPONSE_CACHE
+
+
+def get_response_cache() -> Optional[SharedResponseCache]:
+    return RESPONSE_CACHE
+
+
+def get_response_cache_stats() -> dict:
+    """
+    Get counters of the shared response cache (sum of all workers).
+    :return: dictionary of hits, misses, stores and evictions, or {"enabled": False}
+    """
+    if RESPONSE_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **RESPONSE_CACHE.to_dict()}
+
+
+# ============================================================================================
+# Global variables for shared versions
+# ============================================================================================
+
+
+VERSIONS: SharedVersions = None
+
+
+def set_versions(settings: Settings) -> Optional[SharedVersions]:
+    """ Open the shared data versions of the settings (APP__CACHE__VERSIONS_*) in the current process """
+    global VERSIONS
+
+    if VERSIONS is not None:
+        VERSIONS.close()
+        VERSIONS = None
+
+    if settings.cache.versions_enabled:
+        path = settings.cache.versions_path or default_cache_path(settings, "versions")
+        try:
+            VERSIONS = SharedVersions(path, settings.cache.versions_slots)
+        except OSError as e:
+            logger.error(f"ETag / Last-Modified are disabled, can't open {path}: {e}")
+    return VERSIONS
+
+
+def get_versions() -> Optional[SharedVersions]:
+    return VERSIONS
@@ -3,10 +3,11 @@
 # ==============================================================================================
 
 import datetime
+from functools import lru_cache
 import logging
-from typing import Optional
+from typing import Optional, Tuple, Type
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, create_model, field_validator
 
 
 logger = logging.getLogger("app")
@@ -62,7 +63,9 @@ class EmployeeSearchResponse(BaseModel):
         raise ValueError("Invalid status")
 
     @field_validator("birth_date", mode="before")
-    def set_birth_date(cls, v) -> str:
+    def set_birth_date(cls, v) -> Optional[str]:
+        if v is None:  # NULL column
+            return None
         try:
             # 1) make datetime to string
             if isinstance(v, datetime.datetime) or isinstance(v, datetime.date):
@@ -79,7 +82,9 @@ class EmployeeSearchResponse(BaseModel):
         raise ValueError("Invalid birth date")
 
     @field_validator("register_time", mode="before")
-    def set_register_time(cls, v) -> str:
+    def set_register_time(cls, v) -> Optional[str]:
+        if v is None:  # NULL column
+            return None
         try:
             if isinstance(v, datetime.datetime) or isinstance(v, datetime.date):
                 return v.strftime("%Y-%m-%d %H:%M:%S")
@@ -161,3 +166,48 @@ class DocumentApprovalResponse(BaseModel):
         except Exception as e:
             logger.exception("Not valid datetime")
         raise ValueError("Invalid datetime")
+
+
+# ==============================================================================================
+# Field Projection
+# ==============================================================================================
+
+
+def parse_fields(value: Optional[str], model: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse `?fields=` query parameter with the fields of the model as an allow-list.
+    :param value: comma separated field names (ex - "id,first_name,department")
+    :param model: response model
+    :return: field names in the order of the model, or None for all fields
+    :raise ValueError: if there's a field which is not in the model
+    """
+    if not value:
+        return None
+
+    requested = {x.strip() for x in value.split(",") if x.strip()}
+    invalid = requested - set(model.model_fields.keys())
+    if invalid:
+        raise ValueError(f"Invalid fields: {','.join(sorted(invalid))}")
+    return tuple(x for x in model.model_fields.keys() if x in requested)
+
+
+@lru_cache(maxsize=256)
+def make_partial_model(model: Type[BaseModel], fields: Optional[Tuple[str, ...]]) -> Type[BaseModel]:
+    """
+    Make a response model which only has the given fields, with the validators of the model.
+    :param model: response model
+    :param fields: field names of the new model (None for the model itself)
+    :return: projected response model
+    """
+    if fields is None:
+        return model
+
+    field_definitions = {name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+
+    validators = dict()
+    for name, decorator in model.__pydantic_decorators__.field_validators.items():
+        target_fields = [x for x in decorator.info.fields if x in fields]
+        if target_fields:
+            validators[name] = field_validator(*target_fields, mode=decorator.info.mode)(decorator.func.__func__)
+
+    return create_model(f"{model.__name__}[{','.join(fields)}]", __validators__=validators, **field_definitions)
@@ -1,2 +1,4 @@
 from .search_view import search_bp
-from .manage_view import manage_bp
\ No newline at end of file
+from .manage_view import manage_bp
+from .data_view import data_bp
+from .status_view import status_bp
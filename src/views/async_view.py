@@ -0,0 +1,150 @@
+"""
+Async(ASGI) serving of the flask app (see asgi.py)
+Requests are dispatched by the same flask app as the sync(WSGI) mode on the event loop - routes, before/after request
+hooks (the shared response cache, compression) and teardowns are shared - and only the database work waits in the
+bounded database executor (db/async_employee.py). Each view runs (see utils/async_views.py)
+- as its async variant, which awaits the async database functions (read APIs)
+- on the event loop, if it doesn't wait for the database (status APIs, the name index), like cached responses and 304s
+- in the database executor otherwise (writes, and streamed exports chunk by chunk)
+"""
+from flask import Flask, Response, g, request, request_started
+from quart import Quart, request as async_request
+from werkzeug.datastructures import Headers
+from werkzeug.test import EnvironBuilder
+
+from db.async_employee import get_db_executor, shutdown_db_executor, run_in_db_executor
+from db.init_pool import close_request_session
+from utils import get_async_variant, is_loop_view
+
+ASYNC_METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+END_OF_BODY = object()  # sentinel of the streamed body chunks
+
+
+# ============================================================================================
+# Request dispatching
+# ============================================================================================
+
+
+async def dispatch_request(flask_app: Flask):
+    """ Flask.dispatch_request of the async mode, which awaits the async variant of the view if it has one """
+    rule = request.url_rule
+    if request.routing_exception is not None or \
+            (getattr(rule, "provide_automatic_options", False) and request.method == "OPTIONS"):
+        return flask_app.dispatch_request()  # error or OPTIONS response
+
+    view = flask_app.view_functions[rule.endpoint]
+    async_view = get_async_variant(view)
+    if async_view is not None:
+        return await async_view(**request.view_args)
+    if is_loop_view(view):
+        return flask_app.dispatch_request()
+    return await run_in_db_executor(flask_app.dispatch_request)
+
+
+async def full_dispatch_request(flask_app: Flask) -> Response:
+    """ Flask.full_dispatch_request of the async mode: before and after request hooks run on the event loop """
+    try:
+        request_started.send(flask_app, _async_wrapper=flask_app.ensure_sync)
+        response = flask_app.preprocess_request()  # ex - responses of the shared response cache
+        if response is None:
+            response = await dispatch_request(flask_app)
+    except Exception as e:
+        response = flask_app.handle_user_exception(e)
+    return flask_app.finalize_request(response)
+
+
+async def handle_request(flask_app: Flask, environ: dict):
+    """
+    Handle a request by the flask app like Flask.wsgi_app.
+    :return: status code, headers, and the body chunks (list) or the streamed body iterator
+    """
+    ctx = flask_app.request_context(environ)
+    error = None
+    try:
+        try:
+            ctx.push()
+            response = await full_dispatch_request(flask_app)
+        except Exception as e:
+            error = e
+            response = flask_app.handle_exception(e)
+        if "db_session" in g:  # release the connections of the request without blocking the event loop
+            await run_in_db_executor(close_request_session)
+
+        streamed = response.is_streamed
+        headers, app_iter = response.get_wsgi_headers(environ), response.get_app_iter(environ)
+        if streamed:
+            return response.status_code, headers, app_iter
+        try:
+            return response.status_code, headers, list(app_iter)
+        finally:
+            app_iter.close()
+    finally:
+        if error is not None and flask_app.should_ignore_error(error):
+            error = None
+        ctx.pop(error)
+
+
+# ============================================================================================
+# ASGI app
+# ============================================================================================
+
+
+def make_environ(body: bytes) -> dict:
+    """ Make the WSGI environ of the current quart request for the flask app """
+    scope = async_request.scope
+    builder = EnvironBuilder(
+        path=scope.get("raw_path", b"").decode("latin-1") or scope["path"], method=scope["method"],
+        base_url=f"{scope.get('scheme', 'http')}://{async_request.host}{scope.get('root_path', '')}",
+        query_string=scope["query_string"].decode("latin-1"), headers=async_request.headers, data=body,
+        environ_overrides={"REMOTE_ADDR": async_request.remote_addr or "",
+                           "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}"})
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def make_async_app(flask_app: Flask) -> Quart:
+    """
+    Make the ASGI app which dispatches the requests of the flask app on the event loop.
+    :param flask_app: app of create_app (or any flask app)
+    :return: quart app
+    """
+    app = Quart(__name__)
+    app.config["MAX_CONTENT_LENGTH"] = flask_app.config["MAX_CONTENT_LENGTH"]  # checked by the flask app
+    app.config["RESPONSE_TIMEOUT"] = None  # exports are streamed as long as they take
+    app.config["BODY_TIMEOUT"] = None
+
+    @app.before_serving
+    async def start_db_executor():
+        get_db_executor()
+
+    @app.after_serving
+    async def stop_db_executor():
+        shutdown_db_executor()
+
+    @app.route("/", defaults={"path": ""}, methods=ASYNC_METHODS)
+    @app.route("/<path:path>", methods=ASYNC_METHODS)
+    async def serve_flask(path: str):
+        environ = make_environ(await async_request.get_data(cache=False))
+        status, headers, body = await handle_request(flask_app, environ)
+        if isinstance(body, list):
+            response = app.response_class(b"".join(body), status=status)
+            response.headers = Headers(headers)  # Content-Length of HEAD responses is kept
+            return response
+
+        async def stream():
+            iterator = iter(body)
+            try:
+                while True:
+                    chunk = await run_in_db_executor(next, iterator, END_OF_BODY)
+                    if chunk is END_OF_BODY:
+                        break
+                    if chunk:
+                        yield chunk
+            finally:
+                await run_in_db_executor(body.close)
+
+        return app.response_class(stream(), status=status, headers=Headers(headers))
+
+    return app
@@ -1,63 +1,285 @@
 """ APIs which shows employee data """
 
+import csv
+import io
+import json
 import logging
+from typing import Iterator, List, Optional, Tuple, Type
 
-from flask import Blueprint, jsonify
-from response_codes import HTTP_200_OK, HTTP_500_INTERNAL_SERVER_ERROR
+from flask import Blueprint, Response, jsonify, request
+from pydantic import BaseModel
+from response_codes import HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR, HTTP_503_SERVICE_UNAVAILABLE
 
-from db import get_employees, get_documents
-from utils import make_response_form, EmployeeSearchResponse, DocumentApprovalResponse
+from db import (HEADCOUNT_COLUMNS, get_employees, get_documents, get_employees_after, get_documents_after, iter_employees,
+                get_headcounts)
+from db.async_employee import (get_employees_async, get_documents_async, get_employees_after_async,
+                               get_documents_after_async, get_headcounts_async)
+from utils import (make_json_response, EmployeeSearchResponse, DocumentApprovalResponse, encode_cursor, decode_cursor,
+                   parse_fields, make_partial_model, get_row_decoder, conditional_get, EMPLOYEE_LIST_VERSION_KEY,
+                   negotiate_format, format_variant, make_list_response, async_variant)
 
 
 data_bp = Blueprint('data', __name__, url_prefix='/data')
 logger = logging.getLogger("app")
 
+PAGE_LIMIT = 10  # rows per page of the list APIs
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+# ==============================================================================================
+# Export Encoders
+# ==============================================================================================
+
+
+def _encode_ndjson_chunk(rows: List[dict], response_model: Type[BaseModel]) -> str:
+    """ Encode a chunk of employee rows to NDJSON lines """
+    return "".join(json.dumps(response_model(**x).model_dump(), ensure_ascii=False) + "\n" for x in rows)
+
+
+def _encode_csv_chunk(rows: List[dict], response_model: Type[BaseModel], header: bool = False) -> str:
+    """ Encode a chunk of employee rows to CSV lines """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(response_model.model_fields.keys()))
+    if header:
+        writer.writeheader()
+    writer.writerows(response_model(**x).model_dump() for x in rows)
+    return buffer.getvalue()
+
+
+def _generate_employee_export(export_format: str, fields: Optional[Tuple[str, ...]]) -> Iterator[str]:
+    """ Generate the employee export body chunk by chunk """
+    response_model = make_partial_model(EmployeeSearchResponse, fields)
+    if export_format == "csv":
+        yield _encode_csv_chunk([], response_model, header=True)
+
+    for rows in iter_employees(EXPORT_CHUNK_SIZE, fields):
+        if export_format == "csv":
+            yield _encode_csv_chunk(rows, response_model)
+        else:
+            yield _encode_ndjson_chunk(rows, response_model)
+
+
+# ==============================================================================================
+# Requests and responses of the APIs (shared by the views and their async variants)
+# ==============================================================================================
+
+
+def _parse_page(offset: Optional[int]) -> Optional[int]:
+    """
+    Parse the page of get_employee_list and get_document_list.
+    Without offset (or with `?cursor=`), keyset pagination is used.
+    :return: the last ID of the cursor for keyset pagination, or None for the offset
+    """
+    if offset is not None and "cursor" not in request.args:
+        return None
+    try:
+        return decode_cursor(request.args.get("cursor", ""))
+    except ValueError as e:
+        logger.info(f"Invalid cursor: {e}")
+        raise ValueError("Invalid cursor")
+
+
+def _make_page(response_model: Type[BaseModel], result: Tuple[Tuple[str, ...], List[tuple]], list_key: Optional[str],
+               keyset: bool, fields: Optional[Tuple[str, ...]] = None, response_format: str = "json", extra: dict = None):
+    """
+    Make the response of a page of rows.
+    Keyset pages are read with one more row to know whether the next page exists, and get `next_cursor`.
+    """
+    column_names, rows = result
+    if keyset:
+        show_next_button = len(rows) > PAGE_LIMIT
+        rows = rows[:PAGE_LIMIT]
+        next_cursor = encode_cursor(rows[-1][column_names.index("id")]) if show_next_button else None
+        extra = {"next_cursor": next_cursor, "show_next_button": show_next_button}
+
+    decoder = get_row_decoder(response_model, column_names, fields)
+    return make_list_response(decoder.decode_all(rows), decoder.order, list_key, extra, response_format)
+
+
+def _make_employee_page(result: Tuple[Tuple[str, ...], List[tuple]], keyset: bool, fields: Optional[Tuple[str, ...]],
+                        response_format: str):
+    """ Make the response of get_employee_list (the data is the rows itself for the offset pagination) """
+    return _make_page(EmployeeSearchResponse, result, "employees" if keyset else None, keyset, fields, response_format)
+
+
+def _make_document_page(result: Tuple[Tuple[str, ...], List[tuple]], keyset: bool, offset: Optional[int],
+                        response_format: str):
+    """ Make the response of get_document_list """
+    extra = None if keyset else {"offset": offset, "show_next_button": len(result[1]) == PAGE_LIMIT}
+    return _make_page(DocumentApprovalResponse, result, "documents", keyset, response_format=response_format, extra=extra)
+
+
+def _with_id(fields: Optional[Tuple[str, ...]]) -> Optional[Tuple[str, ...]]:
+    """ Columns to read for the fields, with `id` which is needed for the next cursor """
+    return fields if not fields or "id" in fields else ("id",) + fields
+
+
+def _parse_headcount_query() -> Tuple[Tuple[str, ...], str]:
+    """
+    Parse the request of get_headcount
+    :return: (columns to group by, response format)
+    """
+    by = tuple(x.strip() for x in request.args.get("by", ",".join(HEADCOUNT_COLUMNS)).split(",") if x.strip())
+    if not by or any(x not in HEADCOUNT_COLUMNS for x in by) or len(set(by)) < len(by):
+        raise ValueError(f"Invalid by. Expected comma separated columns of: {', '.join(HEADCOUNT_COLUMNS)}.")
+    return by, negotiate_format()
+
+
+def _make_headcount_response(result: Optional[Tuple[List[tuple], int]], by: Tuple[str, ...], response_format: str):
+    """ Make the response of get_headcount """
+    if result is None:
+        return make_json_response(http_status=HTTP_503_SERVICE_UNAVAILABLE, description="Headcount is not loaded")
+
+    rows, total = result
+    decoder = get_row_decoder(EmployeeSearchResponse, by, by)
+    headcount = [{**group, "count": row[-1]} for group, row in zip(decoder.decode_all([x[:-1] for x in rows]), rows)]
+    return make_list_response(headcount, [*decoder.order, "count"], "headcount", {"total": total}, response_format)
+
 
 # ==============================================================================================
 # APIs
 # ==============================================================================================
 
 
+@data_bp.route("/employee", defaults={"offset": None}, methods=["GET"])
 @data_bp.route("/employee/<int:offset>", methods=["GET"])
-def get_employee_list(offset: int):
+@conditional_get(lambda offset: [EMPLOYEE_LIST_VERSION_KEY], variant=format_variant)
+def get_employee_list(offset: Optional[int]):
     """
     Get a list of employees with pagination.
+    Without offset (or with `?cursor=`), keyset pagination is used and `next_cursor` is returned.
     :param offset: offset of the page
+    :query fields: comma separated fields to return (ex - id,first_name,department)
+    :query format: json (default), columnar, msgpack or csv (or by the Accept header)
     """
-    limit = 10
+    try:
+        fields = parse_fields(request.args.get("fields"), EmployeeSearchResponse)
+        response_format = negotiate_format()
+        last_id = _parse_page(offset)
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
 
     try:
-        # get employee list
-        employees = get_employees(offset, limit)
+        if last_id is None:
+            result = get_employees(offset, PAGE_LIMIT, fields)
+        else:  # keyset(seek) pagination
+            result = get_employees_after(last_id, PAGE_LIMIT + 1, _with_id(fields))
+        return _make_employee_page(result, last_id is not None, fields, response_format)
+    except Exception as e:
+        logger.error(f"Error fetching employee list: {e}")
+        return make_json_response(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # make data return format
-        v_employees = list(map(lambda x: EmployeeSearchResponse(**x).model_dump(), employees))
 
-        # return validated data
-        return make_response_form(data=v_employees, http_status=HTTP_200_OK)
+@async_variant(get_employee_list)
+async def get_employee_list_async(offset: Optional[int]):
+    try:
+        fields = parse_fields(request.args.get("fields"), EmployeeSearchResponse)
+        response_format = negotiate_format()
+        last_id = _parse_page(offset)
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    try:
+        if last_id is None:
+            result = await get_employees_async(offset, PAGE_LIMIT, fields)
+        else:
+            result = await get_employees_after_async(last_id, PAGE_LIMIT + 1, _with_id(fields))
+        return _make_employee_page(result, last_id is not None, fields, response_format)
     except Exception as e:
         logger.error(f"Error fetching employee list: {e}")
-        return make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+        return make_json_response(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@data_bp.route("/documents", defaults={"offset": None}, methods=["GET"])
 @data_bp.route("/documents/<int:offset>", methods=["GET"])
-def get_document_list(offset: int):
+def get_document_list(offset: Optional[int]):
     """
     Get a list of documents with pagination.
+    Without offset (or with `?cursor=`), keyset pagination is used and `next_cursor` is returned.
     :param offset: offset of the page
+    :query format: json (default), columnar, msgpack or csv (or by the Accept header)
     """
-    limit = 10
+    try:
+        response_format = negotiate_format()
+        last_id = _parse_page(offset)
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
 
     try:
-        # get document list
-        documents = get_documents(offset, limit)
+        if last_id is None:
+            result = get_documents(offset, PAGE_LIMIT)
+        else:  # keyset(seek) pagination
+            result = get_documents_after(last_id, PAGE_LIMIT + 1)
+        return _make_document_page(result, last_id is not None, offset, response_format)
+    except Exception as e:
+        logger.error(f"Error fetching document list: {e}")
+        return make_json_response(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+
 
-        # make data return format
-        v_documents = list(map(lambda x: DocumentApprovalResponse(**x).model_dump(), documents))
-        ret_dict = {"documents": v_documents, "offset": offset, "show_next_button": len(v_documents) == limit}
+@async_variant(get_document_list)
+async def get_document_list_async(offset: Optional[int]):
+    try:
+        response_format = negotiate_format()
+        last_id = _parse_page(offset)
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
 
-        # return validated data
-        return make_response_form(data=ret_dict, http_status=HTTP_200_OK)
+    try:
+        if last_id is None:
+            result = await get_documents_async(offset, PAGE_LIMIT)
+        else:
+            result = await get_documents_after_async(last_id, PAGE_LIMIT + 1)
+        return _make_document_page(result, last_id is not None, offset, response_format)
     except Exception as e:
         logger.error(f"Error fetching document list: {e}")
-        return make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+        return make_json_response(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@data_bp.route("/employee/export", methods=["GET"])
+def export_employee_list():
+    """
+    Export all employees as a streaming response.
+    Rows are read with a server-side cursor and sent in chunks, so memory stays constant.
+    :query format: ndjson (default) or csv
+    :query fields: comma separated fields to return (ex - id,first_name,department)
+    """
+    export_format = request.args.get("format", "ndjson").lower()
+    if export_format not in EXPORT_MIMETYPES:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description="Invalid format. Expected one of: ndjson, csv.")
+
+    try:
+        fields = parse_fields(request.args.get("fields"), EmployeeSearchResponse)
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    logger.info(f"Employee export request received (format: {export_format})")
+    headers = {"Content-Disposition": f"attachment; filename=employee_list.{export_format}"}
+    return Response(_generate_employee_export(export_format, fields), mimetype=EXPORT_MIMETYPES[export_format], headers=headers)
+
+
+@data_bp.route("/headcount", methods=["GET"])
+def get_headcount():
+    """
+    Get the headcounts by department x position x status from the in-memory counters
+    (counted by the database while another worker has written since they were synced).
+    :query by: comma separated columns to group by (department, position, status, default all of them)
+    :query format: json (default), columnar, msgpack or csv (or by the Accept header)
+    :return: A response with the headcount of each group and the total headcount
+    """
+    try:
+        by, response_format = _parse_headcount_query()
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    return _make_headcount_response(get_headcounts(by), by, response_format)
+
+
+@async_variant(get_headcount)
+async def get_headcount_async():
+    try:
+        by, response_format = _parse_headcount_query()
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    return _make_headcount_response(await get_headcounts_async(by), by, response_format)
@@ -1,21 +1,26 @@
 """ APIs for manage employee """
 
 from datetime import datetime, timezone
+import json
 import logging
 import re
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
 from flask import Blueprint, jsonify, request
-from pydantic import BaseModel, field_validator
-from response_codes import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR, HTTP_204_NO_CONTENT
+from pydantic import BaseModel, ValidationError, field_validator
+from response_codes import (HTTP_200_OK, HTTP_201_CREATED, HTTP_207_MULTI_STATUS, HTTP_400_BAD_REQUEST,
+                            HTTP_404_NOT_FOUND, HTTP_413_PAYLOAD_TOO_LARGE, HTTP_500_INTERNAL_SERVER_ERROR, HTTP_204_NO_CONTENT)
 
-from db import create_employee, inactivate_employee, promote_employee, transfer_employee
+from db import (create_employee, create_employees, get_employee, inactivate_employee, promote_employee, transfer_employee,
+                inactivate_employees, promote_employees, transfer_employees, unit_of_work)
 from utils.response_form import make_response_form
+from utils.shared_cache import get_response_cache
 
 
 manage_bp = Blueprint('manage', __name__, url_prefix='/manage')
 logger = logging.getLogger("app")
 
+BULK_MAX_ITEMS = 10000
 
 
 # ============================================================================================
@@ -102,6 +107,107 @@ def is_valid_department(department: str) -> Tuple[bool, int]:
     valid_departments = {"hr": 0, "it": 1, "sales": 2}
     return department.lower() in valid_departments.keys(), valid_departments.get(department.lower(), -1)
 
+
+def make_employee_data(request_data: CreateEmployeeRequest, description: str = "") -> dict:
+    """
+    Make a row of employee_list from the validated request
+    :param request_data: validated employee creation request
+    :param description: description of the employee
+    :return: employee data for create_employee(s)
+    """
+    return {
+        "first_name": request_data.first_name,
+        "surname": request_data.surname,
+        "position": request_data.position,
+        "department": request_data.department,
+        "phone_number": request_data.phone_number,
+        "email": request_data.email,
+        "birth_date": request_data.birth_date,
+        "status": 1,  # Assuming status is always active for new employees
+        "description": description,
+        "register_time": datetime.now(timezone.utc).isoformat()  # Current time in ISO format
+    }
+
+
+def parse_bulk_body() -> List:
+    """
+    Parse the body of bulk requests.
+    Accepts a JSON array, or NDJSON (one JSON object per line) with `application/x-ndjson` content type.
+    :return: list of items
+    :raise ValueError: if the body is not a valid JSON array or NDJSON
+    """
+    if request.mimetype == "application/x-ndjson":
+        try:
+            return [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid NDJSON body: {e}")
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ValueError("Body must be a JSON array")
+    return items
+
+
+def parse_bulk_ids() -> List[int]:
+    """
+    Parse employee IDs of bulk update requests (JSON array or NDJSON of IDs).
+    Duplicated IDs are removed with keeping the order.
+    :return: list of employee IDs
+    :raise ValueError: if the body is not a list of non-negative integers
+    """
+    employee_ids = parse_bulk_body()
+    if not all(isinstance(x, int) and not isinstance(x, bool) and x >= 0 for x in employee_ids):
+        raise ValueError("Body must be a list of employee IDs (non-negative integers)")
+    return list(dict.fromkeys(employee_ids))
+
+
+def bulk_update_response(update_func: Callable, *args) -> Tuple[dict, int]:
+    """
+    Run bulk update function with employee IDs of the request body, and make response.
+    :param update_func: bulk update function of the db module (first argument is employee IDs)
+    :param args: other arguments of update_func
+    :return: (response_dict, http_status_code) - updated and not found IDs
+    """
+    try:
+        employee_ids = parse_bulk_ids()
+    except ValueError as e:
+        logger.info(f"Validation error occurred: {e}")
+        return make_response_form(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    if len(employee_ids) > BULK_MAX_ITEMS:
+        return make_response_form(http_status=HTTP_413_PAYLOAD_TOO_LARGE,
+                                  description=f"Too many items. Maximum is {BULK_MAX_ITEMS}.")
+
+    updated_ids = update_func(employee_ids, *args) if employee_ids else list()
+    if updated_ids is None:
+        logger.info(f"Failed to update employees: {len(employee_ids)} items")
+        return make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+
+    updated_set = set(updated_ids)
+    not_found_ids = [x for x in employee_ids if x not in updated_set]
+    logger.info(f"Employees updated: {len(updated_ids)} updated, {len(not_found_ids)} not found")
+    return make_response_form(data={"updated": sorted(updated_ids), "not_found": not_found_ids})
+
+
+def format_validation_error(e: Exception) -> str:
+    """ Make short error message for an item of bulk requests """
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+# ============================================================================================
+# Invalidation of the response cache shared by the workers (utils/shared_cache.py)
+# ============================================================================================
+
+
+@manage_bp.teardown_request
+def invalidate_cached_responses(exception: BaseException = None):
+    """ Invalidate the cached search responses of every worker after a write request (even if it failed midway) """
+    cache = get_response_cache()
+    if cache is not None:
+        cache.bump_version()
+
+
 # ============================================================================================
 # APIs
 # ============================================================================================
@@ -140,26 +246,15 @@ def create_employee_route():
     try:
         # Here you would typically get the employee data from the request
         # For demonstration, we will just use a mock employee data
-        employee_data = {
-            "first_name": request_data.first_name,
-            "surname": request_data.surname,
-            "position": request_data.position,
-            "department": request_data.department,
-            "phone_number": request_data.phone_number,
-            "email": request_data.email,
-            "birth_date": request_data.birth_date,
-            "status": 1,  # Assuming status is always active for new employees
-            "description": request.form.get("description", ""),
-            "register_time": datetime.now(timezone.utc).isoformat()  # Current time in ISO format
-        }
+        employee_data = make_employee_data(request_data, request.form.get("description", ""))
 
         # Call the create_employee function from the db module
         employee_id = create_employee(employee_data)
         if employee_id:
-            logger.info(f"Employee created successfully: (employee id: {employee_id}) {employee_data}")
+            logger.info("Employee created successfully: (employee id: %s) %s", employee_id, employee_data)
             resp, http_code = make_response_form(http_status=HTTP_201_CREATED)
         else:
-            logger.info(f"Failed to create employee: {employee_data}")
+            logger.info("Failed to create employee: %s", employee_data)
             resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
         return jsonify(resp), http_code
 
@@ -169,6 +264,66 @@ def create_employee_route():
         return jsonify(resp), http_code
 
 
+@manage_bp.route("/create/bulk", methods=["POST"])
+def create_employees_route():
+    """
+    Route to create many employees at once.
+    Body is a JSON array of employees, or NDJSON with `application/x-ndjson` content type.
+    Every item is validated, and valid items are inserted in one transaction.
+    :return: per-item results (`id` or `error`) in the order of the request body
+    """
+    logger.info("Bulk create employee request received")
+
+    try:
+        items = parse_bulk_body()
+    except ValueError as e:
+        logger.info(f"Validation error occurred: {e}")
+        resp, http_code = make_response_form(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+        return jsonify(resp), http_code
+
+    if len(items) > BULK_MAX_ITEMS:
+        resp, http_code = make_response_form(http_status=HTTP_413_PAYLOAD_TOO_LARGE,
+                                             description=f"Too many items. Maximum is {BULK_MAX_ITEMS}.")
+        return jsonify(resp), http_code
+
+    # validate every item
+    results = list()
+    valid_indexes, employees_data = list(), list()
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Item must be a JSON object")
+            request_data = CreateEmployeeRequest(**item)
+        except Exception as e:
+            results.append({"index": index, "error": format_validation_error(e)})
+            continue
+        results.append({"index": index, "id": None})
+        valid_indexes.append(index)
+        employees_data.append(make_employee_data(request_data, item.get("description", "")))
+
+    try:
+        if employees_data:
+            employee_ids = create_employees(employees_data)
+            if employee_ids is None:
+                logger.info(f"Failed to create employees: {len(employees_data)} items")
+                resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+                return jsonify(resp), http_code
+            for index, employee_id in zip(valid_indexes, employee_ids):
+                results[index]["id"] = employee_id
+
+        failed = len(items) - len(employees_data)
+        logger.info(f"Employees created: {len(employees_data)} created, {failed} failed")
+        ret_dict = {"created": len(employees_data), "failed": failed, "results": results}
+        resp, http_code = make_response_form(data=ret_dict,
+                                             http_status=HTTP_207_MULTI_STATUS if failed else HTTP_201_CREATED)
+        return jsonify(resp), http_code
+
+    except Exception as e:
+        logger.exception(f"Error occurred: {e}")
+        resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+        return jsonify(resp), http_code
+
+
 @manage_bp.route("/inactivate/<int:employee_id>", methods=["POST"])
 def inactivate_employee_route(employee_id: int):
     """
@@ -191,6 +346,24 @@ def inactivate_employee_route(employee_id: int):
         return jsonify(resp), http_code
 
 
+@manage_bp.route("/inactivate/bulk", methods=["POST"])
+def inactivate_employees_route():
+    """
+    Route to inactivate many employees in one transaction.
+    Body is a JSON array of employee IDs.
+    """
+    logger.info("Bulk inactivate employee request received")
+
+    try:
+        resp, http_code = bulk_update_response(inactivate_employees)
+        return jsonify(resp), http_code
+
+    except Exception as e:
+        logger.exception(f"Error occurred: {e}")
+        resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+        return jsonify(resp), http_code
+
+
 @manage_bp.route("/position/<int:employee_id>/<string:new_position>", methods=["POST"])
 def promote_employee_route(employee_id: int, new_position: str):
     """
@@ -220,6 +393,31 @@ def promote_employee_route(employee_id: int, new_position: str):
         return jsonify(resp), http_code
 
 
+@manage_bp.route("/position/bulk/<string:new_position>", methods=["POST"])
+def promote_employees_route(new_position: str):
+    """
+    Route to promote many employees to a new position in one transaction.
+    Body is a JSON array of employee IDs.
+    :param new_position: The new position to assign to the employees
+    """
+    logger.info(f"Bulk promote employee request received to position: {new_position}")
+
+    # check valid position
+    valid_position, position_id = is_valid_position(new_position)
+    if not valid_position:
+        resp, http_code = make_response_form(http_status=HTTP_400_BAD_REQUEST, description="Invalid position")
+        return jsonify(resp), http_code
+
+    try:
+        resp, http_code = bulk_update_response(promote_employees, position_id)
+        return jsonify(resp), http_code
+
+    except Exception as e:
+        logger.exception(f"Error occurred: {e}")
+        resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+        return jsonify(resp), http_code
+
+
 @manage_bp.route("/department/<int:employee_id>/<string:new_department>", methods=["POST"])
 def department_transfer_route(employee_id: int, new_department: str):
     """
@@ -247,3 +445,69 @@ def department_transfer_route(employee_id: int, new_department: str):
         logger.exception(f"Error occurred: {e}")
         resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
         return jsonify(resp), http_code
+
+
+@manage_bp.route("/department/bulk/<string:new_department>", methods=["POST"])
+def department_transfer_bulk_route(new_department: str):
+    """
+    Route to transfer many employees to a new department in one transaction.
+    Body is a JSON array of employee IDs.
+    :param new_department: The Name of the new department
+    """
+    logger.info(f"Bulk transfer employee request received to department: {new_department}")
+
+    # check valid department
+    valid_department, department_id = is_valid_department(new_department)
+    if not valid_department:
+        resp, http_code = make_response_form(http_status=HTTP_400_BAD_REQUEST, description="Invalid department")
+        return jsonify(resp), http_code
+
+    try:
+        resp, http_code = bulk_update_response(transfer_employees, department_id)
+        return jsonify(resp), http_code
+
+    except Exception as e:
+        logger.exception(f"Error occurred: {e}")
+        resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+        return jsonify(resp), http_code
+
+
+@manage_bp.route("/reassign/<int:employee_id>/<string:new_position>/<string:new_department>", methods=["POST"])
+def reassign_employee_route(employee_id: int, new_position: str, new_department: str):
+    """
+    Route to change the position and the department of an employee at once.
+    Both changes are made in one transaction of the request connection, so neither is applied if one fails.
+    :param employee_id: The ID of the employee to reassign
+    :param new_position: The new position to assign to the employee
+    :param new_department: The Name of the new department
+    """
+    logger.info(f"Reassign employee request received for ID: {employee_id} to position: {new_position}, department: {new_department}")
+
+    # check valid position and department
+    valid_position, position_id = is_valid_position(new_position)
+    if not valid_position:
+        resp, http_code = make_response_form(http_status=HTTP_400_BAD_REQUEST, description="Invalid position")
+        return jsonify(resp), http_code
+
+    valid_department, department_id = is_valid_department(new_department)
+    if not valid_department:
+        resp, http_code = make_response_form(http_status=HTTP_400_BAD_REQUEST, description="Invalid department")
+        return jsonify(resp), http_code
+
+    try:
+        with unit_of_work():
+            if not get_employee(employee_id, ("id",)):
+                resp, http_code = make_response_form(http_status=HTTP_404_NOT_FOUND, description="Employee not found")
+                return jsonify(resp), http_code
+            promote_employee(employee_id, position_id)
+            transfer_employee(employee_id, department_id)
+
+        logger.info(f"Employee reassigned successfully: {employee_id} to position: {new_position}(id: {position_id}), "
+                    f"department: {new_department}(id: {department_id})")
+        resp, http_code = make_response_form(http_status=HTTP_200_OK)
+        return jsonify(resp), http_code
+
+    except Exception as e:
+        logger.exception(f"Error occurred: {e}")
+        resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+        return jsonify(resp), http_code
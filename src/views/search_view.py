@@ -1,17 +1,250 @@
 """ APIs for Search """
 
+import datetime
 import logging
+from typing import Dict, List, Optional, Tuple
 
-from flask import Blueprint, jsonify
-from response_codes import HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+from flask import Blueprint, current_app, g, request
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from response_codes import (HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_413_PAYLOAD_TOO_LARGE,
+                            HTTP_500_INTERNAL_SERVER_ERROR, HTTP_503_SERVICE_UNAVAILABLE)
 
-from db import get_employee, get_employees_by_position, get_employees_by_department
-from utils import make_response_form, EmployeeSearchResponse
+from db import (EMPLOYEE_COLUMNS, get_employee, get_employees_by_ids, get_employees_by_position, get_employees_by_department,
+                search_employees, search_names, has_db_error)
+from db.async_employee import (get_employee_async, get_employees_by_ids_async, get_employees_by_position_async,
+                               get_employees_by_department_async, search_employees_async)
+from utils import (make_json_response, EmployeeSearchResponse, parse_fields, make_partial_model, get_row_decoder,
+                   get_response_cache, conditional_get, employee_version_key, GROUP_VERSION_KEYS, negotiate_format,
+                   format_variant, make_list_response, encode_cursor, decode_cursor, EMPLOYEE_LIST_VERSION_KEY,
+                   is_unversioned, async_variant, loop_view)
 
 
 search_bp = Blueprint('search', __name__, url_prefix='/search')
 logger = logging.getLogger("app")
 
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100  # hard limit of rows per page of the multi-filter search
+NAME_SEARCH_DEFAULT_LIMIT = 10
+NAME_SEARCH_MAX_LIMIT = 50
+IDS_SEARCH_MAX_ITEMS = 10000  # IDs per batch lookup (read with `WHERE id IN (...)` queries of 1000 IDs)
+
+
+# ============================================================================================
+# Pydantic classes & methods for query validation
+# ============================================================================================
+
+
+def _code_validator(name: str, codes: Dict[str, int]):
+    """ Make a validator which accepts a code (0, 1, ...) or its name (case insensitive) """
+    def validate(cls, value):
+        if value is None or value == "":
+            return None
+        if isinstance(value, str) and value.isdigit():
+            value = int(value)
+        if isinstance(value, str) and value.lower() in codes:
+            return codes[value.lower()]
+        if isinstance(value, int) and value in codes.values():
+            return value
+        raise ValueError(f"Invalid {name}. Expected one of: {', '.join(f'{v} ({k})' for k, v in codes.items())}.")
+    return field_validator(name, mode="before")(validate)
+
+
+def _start_of_day(date: Optional[datetime.date]) -> Optional[datetime.datetime]:
+    return datetime.datetime.combine(date, datetime.time()) if date else None
+
+
+class SearchEmployeesQuery(BaseModel):
+    position: Optional[int] = None
+    department: Optional[int] = None
+    status: Optional[int] = None
+    registered_from: Optional[datetime.date] = None
+    registered_to: Optional[datetime.date] = None
+    limit: int = Field(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT)
+
+    validate_position = _code_validator("position", {"employee": 0, "manager": 1, "director": 2})
+    validate_department = _code_validator("department", {"hr": 0, "it": 1, "sales": 2})
+    validate_status = _code_validator("status", {"inactive": 0, "active": 1})
+
+    @field_validator("registered_from", "registered_to", mode="before")
+    def validate_date(cls, value):
+        return value or None
+
+    def filters(self) -> dict:
+        """ Filters of search_employees (registered_to is inclusive, so its next day is the exclusive bound) """
+        registered_to = self.registered_to + datetime.timedelta(days=1) if self.registered_to else None
+        return {
+            "position": self.position,
+            "department": self.department,
+            "status": self.status,
+            "registered_from": _start_of_day(self.registered_from),
+            "registered_to": _start_of_day(registered_to),
+        }
+
+
+def parse_ids() -> List[int]:
+    """
+    Parse employee IDs of the batch lookup: `ids` query (comma separated) of GET, or JSON array body of POST.
+    Duplicated IDs are removed with keeping the order.
+    """
+    if request.method == "GET":
+        try:
+            employee_ids = [int(x) for x in request.args.get("ids", "").split(",") if x.strip()]
+        except ValueError:
+            raise ValueError("Invalid ids. Expected comma separated employee IDs (ex - 1,2,3).")
+    else:
+        employee_ids = request.get_json(silent=True)
+        if not isinstance(employee_ids, list) or \
+                not all(isinstance(x, int) and not isinstance(x, bool) for x in employee_ids):
+            raise ValueError("Invalid body. Expected a JSON array of employee IDs.")
+    if any(x < 0 for x in employee_ids):
+        raise ValueError("Employee ID must be a positive integer or 0")
+    return list(dict.fromkeys(employee_ids))
+
+
+# ==============================================================================================
+# Response cache shared by the workers (utils/shared_cache.py)
+# ==============================================================================================
+
+
+@search_bp.before_request
+def get_cached_response():
+    """
+    Serve the search response cached by any worker, unless an employee has been written since it was cached.
+    Conditional requests are answered by the view (conditional_get), which doesn't need the body.
+    Responses are cached per response format, which can be negotiated by the Accept header.
+    """
+    cache = get_response_cache()
+    if cache is None or request.method != "GET" or request.if_none_match or request.if_modified_since:
+        return None
+    try:
+        key = f"{negotiate_format()}:{request.full_path}"
+    except ValueError:  # answered by the view (400)
+        return None
+
+    value, version = cache.get(key)
+    if value is not None:
+        etag, last_modified, content_type, vary, body = bytes(value).split(b"\n", 4)
+        response = current_app.response_class(body, content_type=content_type.decode())
+        if etag:
+            response.headers["ETag"] = etag.decode()
+        if last_modified:
+            response.headers["Last-Modified"] = last_modified.decode()
+        if vary:
+            response.headers["Vary"] = vary.decode()
+        response.headers["X-Cache"] = "HIT"
+        return response
+    g.response_cache_key, g.response_cache_version = key, version
+    return None
+
+
+@search_bp.after_request
+def put_cached_response(response):
+    """
+    Cache the search response for the workers (only successful responses without database errors,
+    and not responses of per-worker data which is behind the other workers)
+    """
+    key, version = g.pop("response_cache_key", None), g.pop("response_cache_version", None)
+    if version is not None and response.status_code == 200 and not has_db_error() and not is_unversioned():
+        headers = [response.headers.get(name, "") for name in ("ETag", "Last-Modified", "Content-Type", "Vary")]
+        get_response_cache().put(key, "\n".join(headers).encode() + b"\n" + response.get_data(), version)
+        response.headers["X-Cache"] = "MISS"
+    return response
+
+
+# ==============================================================================================
+# Requests and responses of the APIs (shared by the views and their async variants)
+# ==============================================================================================
+
+
+def _with_id(fields: Optional[tuple]) -> Optional[tuple]:
+    """ Columns to read for the fields, with `id` which is needed to key the records or for the next cursor """
+    return fields if not fields or "id" in fields else ("id",) + fields
+
+
+def _make_employee_response(employee_data: Optional[dict], fields: Optional[tuple]):
+    """ Make the response of search_by_id """
+    logger.info("Employee data retrieved: %s", employee_data)
+    if not employee_data:  # no data found
+        return make_json_response(http_status=HTTP_404_NOT_FOUND)
+    try:
+        employee_response = make_partial_model(EmployeeSearchResponse, fields)(**employee_data)
+    except ValueError as e:
+        logger.error(f"Error occurred: {e}")
+        return make_json_response(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+    return make_json_response(data=employee_response.model_dump())
+
+
+def _parse_ids_query() -> Tuple[List[int], Optional[tuple]]:
+    """
+    Parse the request of search_by_ids
+    :return: (employee IDs, fields)
+    """
+    employee_ids = parse_ids()
+    fields = parse_fields(request.args.get("fields"), EmployeeSearchResponse)
+    if len(employee_ids) > IDS_SEARCH_MAX_ITEMS:
+        raise OverflowError(f"Too many IDs. Maximum is {IDS_SEARCH_MAX_ITEMS}.")
+    logger.info("Search by IDs received: %d IDs", len(employee_ids))
+    return employee_ids, fields
+
+
+def _make_ids_response(employee_ids: List[int], employee_data: Optional[List[dict]], fields: Optional[tuple]):
+    """ Make the response of search_by_ids """
+    if employee_data is None:  # database error
+        return make_json_response(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+
+    decoder = get_row_decoder(EmployeeSearchResponse, _with_id(fields) or EMPLOYEE_COLUMNS, fields)
+    employees = {str(row["id"]): record for row, record in zip(employee_data, decoder.decode_dicts(employee_data))}
+    missing = [x for x in employee_ids if str(x) not in employees]
+    return make_json_response(data={"employees": employees, "missing": missing})
+
+
+def _parse_group_query() -> Tuple[Optional[tuple], str]:
+    """
+    Parse the request of search_by_position and search_by_department
+    :return: (fields, response format)
+    """
+    return parse_fields(request.args.get("fields"), EmployeeSearchResponse), negotiate_format()
+
+
+def _make_group_response(employee_data: Optional[List[dict]], fields: Optional[tuple], response_format: str):
+    """ Make the response of search_by_position and search_by_department """
+    logger.info("Employee data retrieved: %s", employee_data)
+    # same values as /search/id with or without fields (ex - "sales" for department, ISO date for birth_date)
+    decoder = get_row_decoder(EmployeeSearchResponse, fields or EMPLOYEE_COLUMNS, fields)
+    return make_list_response(decoder.decode_dicts(employee_data or list()), decoder.order, "employees",
+                              response_format=response_format)
+
+
+def _parse_filters_query() -> Tuple[SearchEmployeesQuery, Optional[tuple], str, int]:
+    """
+    Parse the request of search_by_filters
+    :return: (query, fields, response format, last ID of the cursor)
+    """
+    logger.info(f"Search by filters received: {request.args.to_dict()}")
+    try:
+        query = SearchEmployeesQuery(**{name: request.args.get(name) for name in SearchEmployeesQuery.model_fields
+                                        if name in request.args})
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+    fields = parse_fields(request.args.get("fields"), EmployeeSearchResponse)
+    return query, fields, negotiate_format(), decode_cursor(request.args.get("cursor", ""))
+
+
+def _make_filters_response(result: Optional[Tuple[Tuple[str, ...], List[tuple]]], query: SearchEmployeesQuery,
+                           fields: Optional[tuple], response_format: str):
+    """ Make the response of search_by_filters from one more row than the limit """
+    if result is None:  # database error
+        return make_json_response(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
+
+    column_names, employees = result
+    show_next_button = len(employees) > query.limit
+    employees = employees[:query.limit]
+
+    decoder = get_row_decoder(EmployeeSearchResponse, column_names, fields)
+    next_cursor = encode_cursor(employees[-1][column_names.index("id")]) if show_next_button else None
+    extra = {"next_cursor": next_cursor, "show_next_button": show_next_button}
+    return make_list_response(decoder.decode_all(employees), decoder.order, "employees", extra, response_format)
+
 
 # ==============================================================================================
 # APIs
@@ -19,44 +252,72 @@ logger = logging.getLogger("app")
 
 
 @search_bp.route("/id/<int:employee_id>")
+@conditional_get(lambda employee_id: [employee_version_key(employee_id)])
 def search_by_id(employee_id: int):
     """
     Search API for a specific employee ID
 
     :param employee_id: The ID of the employee to search for
+    :query fields: comma separated fields to return (ex - id,first_name,department)
     :return: A JSON response with the search result
     """
     logger.info(f"Search by ID received: {employee_id}")
+    try:
+        fields = parse_fields(request.args.get("fields"), EmployeeSearchResponse)
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
 
+    # get employee data from database or data source
+    return _make_employee_response(get_employee(employee_id, fields), fields)
+
+
+@async_variant(search_by_id)
+async def search_by_id_async(employee_id: int):
+    logger.info(f"Search by ID received: {employee_id}")
     try:
-        # Here you would typically query your database or data source
-        # For demonstration, we will just return a mock response
-        if employee_id < 0:
-            raise ValueError("Employee ID must be a positive integer or 0")
-
-        # get employee data from database or data source
-        employee_data = get_employee(employee_id)
-        logger.info(f"Employee data retrieved: {employee_data}")
-
-        # make response form
-        if employee_data:
-            employee_response = EmployeeSearchResponse(**employee_data)
-        else:
-            employee_response = None
-
-        if employee_data:
-            resp, http_code = make_response_form(data=employee_response.model_dump())
-        else:  # no data found
-            resp, http_code = make_response_form(http_status=HTTP_404_NOT_FOUND)
-        return jsonify(resp), http_code
+        fields = parse_fields(request.args.get("fields"), EmployeeSearchResponse)
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
 
+    return _make_employee_response(await get_employee_async(employee_id, fields), fields)
+
+
+@search_bp.route("/ids", methods=["GET", "POST"])
+def search_by_ids():
+    """
+    Batch lookup API of employees by IDs (ex - the members of an org chart), instead of one request per employee.
+    The employees are read through the employee cache, and the misses with chunked `WHERE id IN (...)` queries.
+
+    :query ids: comma separated employee IDs for GET (ex - 1,2,3), or a JSON array of employee IDs as the POST body
+    :query fields: comma separated fields to return (ex - id,first_name,department)
+    :return: A JSON response with the found employees keyed by ID and the list of missing IDs
+    """
+    try:
+        employee_ids, fields = _parse_ids_query()
+    except OverflowError as e:
+        return make_json_response(http_status=HTTP_413_PAYLOAD_TOO_LARGE, description=str(e))
     except ValueError as e:
-        logger.error(f"Error occurred: {e}")
-        resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
-        return jsonify(resp), http_code
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    employee_data = get_employees_by_ids(employee_ids, _with_id(fields)) if employee_ids else list()
+    return _make_ids_response(employee_ids, employee_data, fields)
+
+
+@async_variant(search_by_ids)
+async def search_by_ids_async():
+    try:
+        employee_ids, fields = _parse_ids_query()
+    except OverflowError as e:
+        return make_json_response(http_status=HTTP_413_PAYLOAD_TOO_LARGE, description=str(e))
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    employee_data = await get_employees_by_ids_async(employee_ids, _with_id(fields)) if employee_ids else list()
+    return _make_ids_response(employee_ids, employee_data, fields)
 
 
 @search_bp.route("/position/<int:position_id>")
+@conditional_get(lambda position_id: [GROUP_VERSION_KEYS["position"]], variant=format_variant)
 def search_by_position(position_id: int):
     """
     Search API for a specific position ID
@@ -65,30 +326,33 @@ def search_by_position(position_id: int):
          - 0: Employee
          - 1: Manager
          - 2: Director
-    :return: A JSON response with the search result
+    :query fields: comma separated fields to return (ex - id,first_name,department)
+    :query format: json (default), columnar, msgpack or csv (or by the Accept header)
+    :return: A response with the search result
     """
     logger.info(f"Search by position received: {position_id}")
-
     try:
-        if position_id < 0:
-            raise ValueError("Position ID must be a positive integer or 0")
-
-        # get employee data from database or data source
-        employee_data = get_employees_by_position(position_id)
-        logger.info(f"Employee data retrieved: {employee_data}")
-        if employee_data:
-            resp, http_code = make_response_form(data={"employees": employee_data})
-        else:  # no data found
-            resp, http_code = make_response_form(data={"employees": list()})
-        return jsonify(resp), http_code
+        fields, response_format = _parse_group_query()
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    # get employee data from database or data source
+    return _make_group_response(get_employees_by_position(position_id, fields), fields, response_format)
 
+
+@async_variant(search_by_position)
+async def search_by_position_async(position_id: int):
+    logger.info(f"Search by position received: {position_id}")
+    try:
+        fields, response_format = _parse_group_query()
     except ValueError as e:
-        logger.error(f"Error occurred: {e}")
-        resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
-        return jsonify(resp), http_code
-    
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    return _make_group_response(await get_employees_by_position_async(position_id, fields), fields, response_format)
+
 
 @search_bp.route("/department/<int:department_id>")
+@conditional_get(lambda department_id: [GROUP_VERSION_KEYS["department"]], variant=format_variant)
 def search_by_department(department_id: int):
     """
     Search API for a specific department ID
@@ -97,24 +361,100 @@ def search_by_department(department_id: int):
          - 0: Sales
          - 1: IT
          - 2: HR
-    :return: A JSON response with the search result
+    :query fields: comma separated fields to return (ex - id,first_name,department)
+    :query format: json (default), columnar, msgpack or csv (or by the Accept header)
+    :return: A response with the search result
     """
     logger.info(f"Search by department received: {department_id}")
+    try:
+        fields, response_format = _parse_group_query()
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
 
+    # get employee data from database or data source
+    return _make_group_response(get_employees_by_department(department_id, fields), fields, response_format)
+
+
+@async_variant(search_by_department)
+async def search_by_department_async(department_id: int):
+    logger.info(f"Search by department received: {department_id}")
     try:
-        if department_id < 0:
-            raise ValueError("Department ID must be a positive integer or 0")
-
-        # get employee data from database or data source
-        employee_data = get_employees_by_department(department_id)
-        logger.info(f"Employee data retrieved: {employee_data}")
-        if employee_data:
-            resp, http_code = make_response_form(data={"employees": employee_data})
-        else:  # no data found
-            resp, http_code = make_response_form(data={"employees": list()})
-        return jsonify(resp), http_code
+        fields, response_format = _parse_group_query()
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
 
+    return _make_group_response(await get_employees_by_department_async(department_id, fields), fields,
+                                response_format)
+
+
+@search_bp.route("/employees")
+@conditional_get(lambda: [EMPLOYEE_LIST_VERSION_KEY], variant=format_variant)
+def search_by_filters():
+    """
+    Search API for the combination of filters, in ID order by keyset pagination
+
+    :query position: position ID or name (employee, manager, director)
+    :query department: department ID or name (hr, it, sales)
+    :query status: status ID or name (inactive, active)
+    :query registered_from: first registration date (YYYY-MM-DD)
+    :query registered_to: last registration date (YYYY-MM-DD, inclusive)
+    :query limit: rows per page (default 20, at most 100)
+    :query cursor: next_cursor of the previous page
+    :query fields: comma separated fields to return (ex - id,first_name,department)
+    :query format: json (default), columnar, msgpack or csv (or by the Accept header)
+    :return: A response with the search result
+    """
+    try:
+        query, fields, response_format, last_id = _parse_filters_query()
     except ValueError as e:
-        logger.error(f"Error occurred: {e}")
-        resp, http_code = make_response_form(http_status=HTTP_500_INTERNAL_SERVER_ERROR)
-        return jsonify(resp), http_code
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    # fetch one more row to know whether the next page exists
+    result = search_employees(query.filters(), last_id, query.limit + 1, _with_id(fields))
+    return _make_filters_response(result, query, fields, response_format)
+
+
+@async_variant(search_by_filters)
+async def search_by_filters_async():
+    try:
+        query, fields, response_format, last_id = _parse_filters_query()
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+
+    result = await search_employees_async(query.filters(), last_id, query.limit + 1, _with_id(fields))
+    return _make_filters_response(result, query, fields, response_format)
+
+
+@search_bp.route("/names")
+@loop_view
+@conditional_get(lambda: [EMPLOYEE_LIST_VERSION_KEY], variant=format_variant)
+def search_by_names():
+    """
+    Type-ahead search API by first_name, surname and email (served by the in-memory name index)
+
+    :query q: words to search (ex - "jo sm"), each word is a prefix of a name word or the email,
+              or a substring (3 or more characters) of a name word
+    :query limit: the maximum number of employees (default 10, at most 50)
+    :query include_inactive: include the inactive employees (true / false, default false)
+    :query format: json (default), columnar, msgpack or csv (or by the Accept header)
+    :return: A response with the matched employees (id, first_name, surname, email, position, department, status)
+    """
+    query = request.args.get("q", "").strip()
+    try:
+        limit = int(request.args.get("limit", NAME_SEARCH_DEFAULT_LIMIT))
+        if not 1 <= limit <= NAME_SEARCH_MAX_LIMIT:
+            raise ValueError(f"Invalid limit. Expected 1 to {NAME_SEARCH_MAX_LIMIT}.")
+        if not query:
+            raise ValueError("Query (q) is required.")
+        response_format = negotiate_format()
+    except ValueError as e:
+        return make_json_response(http_status=HTTP_400_BAD_REQUEST, description=str(e))
+    include_inactive = request.args.get("include_inactive", "false").lower() in ("true", "1")
+
+    result = search_names(query, limit, include_inactive)
+    if result is None:
+        return make_json_response(http_status=HTTP_503_SERVICE_UNAVAILABLE, description="Name index is not loaded")
+
+    column_names, employees = result
+    decoder = get_row_decoder(EmployeeSearchResponse, column_names, column_names)
+    return make_list_response(decoder.decode_all(employees), decoder.order, "employees", response_format=response_format)
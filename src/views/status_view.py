@@ -0,0 +1,144 @@
+""" APIs for server status """
+
+import logging
+
+from flask import Blueprint, current_app, jsonify
+from response_codes import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from db import (get_pool_stats, get_query_stats, get_db_pool_state, get_storage_backend, get_cache_stats,
+                get_group_index_stats, get_name_index_stats, get_headcount_index_stats)
+from config import get_logging_stats
+from utils import make_response_form, get_response_cache_stats, get_compression_stats, loop_view
+
+
+status_bp = Blueprint('status', __name__, url_prefix='/status')
+logger = logging.getLogger("app")
+
+
+# ==============================================================================================
+# APIs
+# ==============================================================================================
+
+
+@status_bp.route("/ready", methods=["GET"])
+@loop_view
+def readiness_status():
+    """
+    Readiness probe for traffic gating.
+    Returns 503 until the storage backend (database connection pool) of the worker which handles this request is ready.
+    """
+    if get_storage_backend().is_ready():
+        resp, http_code = make_response_form(data={"ready": True}, http_status=HTTP_200_OK)
+    else:
+        db_pool_state = get_db_pool_state()
+        description = (f"Database connection pool is {db_pool_state['status']} "
+                       f"(failed attempts: {db_pool_state['failed_attempts']}, last error: {db_pool_state['error']})")
+        resp, http_code = make_response_form(http_status=HTTP_503_SERVICE_UNAVAILABLE, description=description)
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/startup", methods=["GET"])
+@loop_view
+def startup_status():
+    """
+    Get the startup time breakdown of the worker which handles this request.
+    import, settings and app creation times of create_app, and the warmup time of the database pool.
+    """
+    startup_times = current_app.extensions.get("startup_times", {})
+    db_pool_state = get_db_pool_state()
+    resp, http_code = make_response_form(data={**startup_times,
+                                               "pool_warmup_ms": db_pool_state["warmup_ms"],
+                                               "pool_status": db_pool_state["status"]})
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/db_pool", methods=["GET"])
+@loop_view
+def db_pool_status():
+    """
+    Get database connection pool statistics of the worker process which handles this request.
+    Use this for sizing pools against MySQL `max_connections` (workers x pool_max_connections).
+    """
+    resp, http_code = make_response_form(data=get_pool_stats())
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/queries", methods=["GET"])
+@loop_view
+def query_status():
+    """
+    Get timing counters of the database functions in the worker process which handles this request.
+    Slow calls are written to logs/slow_query.log with their parameters and EXPLAIN plans.
+    """
+    resp, http_code = make_response_form(data=get_query_stats())
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/cache", methods=["GET"])
+@loop_view
+def cache_status():
+    """
+    Get hit, miss and eviction counters of the employee cache of the worker which handles this request.
+    """
+    resp, http_code = make_response_form(data=get_cache_stats())
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/response_cache", methods=["GET"])
+@loop_view
+def response_cache_status():
+    """
+    Get hit, miss and eviction counters of the search response cache shared by the workers of this host.
+    """
+    resp, http_code = make_response_form(data=get_response_cache_stats())
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/group_index", methods=["GET"])
+@loop_view
+def group_index_status():
+    """
+    Get size, load time and drift of the position / department / status index of the worker which handles this request.
+    """
+    resp, http_code = make_response_form(data=get_group_index_stats())
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/name_index", methods=["GET"])
+@loop_view
+def name_index_status():
+    """
+    Get the size, load time and query time of the name index of the worker which handles this request.
+    """
+    resp, http_code = make_response_form(data=get_name_index_stats())
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/headcount", methods=["GET"])
+@loop_view
+def headcount_status():
+    """
+    Get the size, load time and drift of the headcount counters of the worker which handles this request.
+    """
+    resp, http_code = make_response_form(data=get_headcount_index_stats())
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/compression", methods=["GET"])
+@loop_view
+def compression_status():
+    """
+    Get the compression ratio and CPU time per endpoint of the worker which handles this request.
+    """
+    resp, http_code = make_response_form(data=get_compression_stats())
+    return jsonify(resp), http_code
+
+
+@status_bp.route("/logging", methods=["GET"])
+@loop_view
+def logging_status():
+    """
+    Get the logging mode, and the queued, dropped and sampled out log records of the worker which handles this request.
+    """
+    resp, http_code = make_response_form(data=get_logging_stats())
+    return jsonify(resp), http_code
@@ -1,5 +1,7 @@
 import sys
 import os
+import datetime
+import random
 
 import unittest
 
@@ -10,15 +12,17 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../s
 
 from config.env import set_default_env
 from config.load_main import get_settings, set_settings
-from db.init_pool import set_db_pool
+from db import set_db_pool, init_request_session, make_storage_backend, set_storage_backend, create_employees
 from views.manage_view import manage_bp
 from views.search_view import search_bp
 from views.data_view import data_bp
+from views.status_view import status_bp
 
 # ============================================================================================
 # Set Environment Variable for test
 # ============================================================================================
 os.environ['APP_ENV_TYPE'] = 'dev'
+os.environ.setdefault('APP__STORAGE__BACKEND', 'memory')  # set 'mysql' to test with the database
 
 # ============================================================================================
 # Set Config
@@ -29,7 +33,13 @@ set_settings()
 # ===========================================================================================
 # Init Variables
 # ============================================================================================
-set_db_pool(get_settings())
+set_storage_backend(make_storage_backend(get_settings()))
+MYSQL_BACKEND = get_settings().storage.backend == "mysql"
+if MYSQL_BACKEND:
+    set_db_pool(get_settings())
+
+# (first_name, position, department, status) of the employees created by each test, on a registration date of its own
+SEED_EMPLOYEES = [("Seed0", 0, 1, 1), ("Seed1", 1, 1, 1), ("Seed2", 0, 2, 1), ("Seed3", 2, 1, 1), ("Seed4", 0, 1, 0)]
 
 # ===========================================================================================
 # Make TestCase
@@ -38,11 +48,23 @@ set_db_pool(get_settings())
 class APITestCase(unittest.TestCase):
     def setUp(self):
         app = Flask(__name__)
+        init_request_session(app)
         app.register_blueprint(manage_bp)
         app.register_blueprint(search_bp)
         app.register_blueprint(data_bp)
+        app.register_blueprint(status_bp)
         self.client = app.test_client()
 
+        # a random far date keeps the seeded employees apart from the other rows (of the database, or other tests)
+        self.seed_date = (datetime.date(2100, 1, 1) + datetime.timedelta(days=random.randrange(300000))).isoformat()
+        self.seed_ids = create_employees([
+            {"first_name": first_name, "surname": "Seeded", "position": position, "department": department,
+             "phone_number": "010-0000-0000", "email": f"{first_name.lower()}@example.com", "birth_date": "1990-01-01",
+             "status": status, "description": "", "register_time": f"{self.seed_date} 09:00:00"}
+            for first_name, position, department, status in SEED_EMPLOYEES
+        ])
+        self.assertEqual(len(self.seed_ids), len(SEED_EMPLOYEES))
+
     def test_create_employee_missing_fields(self):
         # Missing required fields
         response = self.client.post('/manage/create', data={})
@@ -62,6 +84,26 @@ class APITestCase(unittest.TestCase):
         # Accept 201 or 500 if DB is not mocked
         self.assertIn(response.status_code, [201, 500])
 
+    def test_create_employees_bulk(self):
+        employee = {
+            "first_name": "John",
+            "position": "employee",
+            "department": "sales",
+            "phone_number": "1234567890",
+            "email": "john@example.com"
+        }
+        response = self.client.post('/manage/create/bulk', json=[employee, {"first_name": "Jane"}])
+        # Accept 207 (one invalid item) or 500 if DB is not mocked
+        self.assertIn(response.status_code, [207, 500])
+        if response.status_code == 207:
+            results = response.get_json()['response']['results']
+            self.assertIsNotNone(results[0]['id'])
+            self.assertIn('error', results[1])
+
+    def test_create_employees_bulk_invalid_body(self):
+        response = self.client.post('/manage/create/bulk', json={"first_name": "John"})
+        self.assertEqual(response.status_code, 400)
+
     def test_inactivate_employee(self):
         # Example: inactivate employee with id 1
         response = self.client.post('/manage/inactivate/1')
@@ -77,6 +119,26 @@ class APITestCase(unittest.TestCase):
         response = self.client.post('/manage/department/1/it')
         self.assertIn(response.status_code, [200, 400, 500])
 
+    def test_reassign_employee(self):
+        # Change position and department of employee with id 1 in one transaction
+        response = self.client.post('/manage/reassign/1/manager/it')
+        self.assertIn(response.status_code, [200, 404, 500])
+
+    def test_reassign_employee_invalid_department(self):
+        response = self.client.post('/manage/reassign/1/manager/finance')
+        self.assertEqual(response.status_code, 400)
+
+    def test_department_transfer_bulk(self):
+        # Transfer employees with id 1 and 999999 to IT department
+        response = self.client.post('/manage/department/bulk/it', json=[1, 999999])
+        self.assertIn(response.status_code, [200, 500])
+        if response.status_code == 200:
+            self.assertIn(999999, response.get_json()['response']['not_found'])
+
+    def test_promote_employee_bulk_invalid_ids(self):
+        response = self.client.post('/manage/position/bulk/manager', json=["one"])
+        self.assertEqual(response.status_code, 400)
+
     def test_search_by_id_not_found(self):
         response = self.client.get('/search/id/999999')
         # Accept 404 or 500 if DB is not mocked
@@ -90,6 +152,72 @@ class APITestCase(unittest.TestCase):
         response = self.client.get('/search/department/0')
         self.assertEqual(response.status_code, 200)
 
+    def test_search_by_department_with_fields(self):
+        response = self.client.get('/search/department/0?fields=id,first_name,department')
+        self.assertEqual(response.status_code, 200)
+        for employee in response.get_json()['response']['employees']:
+            self.assertEqual(set(employee.keys()), {'id', 'first_name', 'department'})
+
+    def test_search_by_filters(self):
+        query = f'registered_from={self.seed_date}&registered_to={self.seed_date}&fields=id,department,status'
+        response = self.client.get(f'/search/employees?department=it&status=active&limit=2&{query}')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['response']
+        self.assertEqual(data['employees'], [{'id': self.seed_ids[x], 'department': 'it', 'status': 'active'}
+                                             for x in (0, 1)])
+        self.assertTrue(data['show_next_button'])
+
+        # the next page by the cursor
+        response = self.client.get(f'/search/employees?department=it&status=active&limit=2&{query}'
+                                   f'&cursor={data["next_cursor"]}')
+        data = response.get_json()['response']
+        self.assertEqual(data['employees'], [{'id': self.seed_ids[3], 'department': 'it', 'status': 'active'}])
+        self.assertEqual((data['show_next_button'], data['next_cursor']), (False, None))
+
+        response = self.client.get(f'/search/employees?position=employee&{query}')
+        self.assertEqual([x['id'] for x in response.get_json()['response']['employees']],
+                         [self.seed_ids[x] for x in (0, 2, 4)])
+        response = self.client.get(f'/search/employees?department=sales&status=inactive&{query}')
+        self.assertEqual(response.get_json()['response']['employees'], [])
+
+    def test_search_by_filters_invalid_query(self):
+        self.assertEqual(self.client.get('/search/employees?position=ceo').status_code, 400)
+        self.assertEqual(self.client.get('/search/employees?limit=1000').status_code, 400)
+        self.assertEqual(self.client.get('/search/employees?registered_from=2024-13-01').status_code, 400)
+
+    def test_search_by_names(self):
+        response = self.client.get('/search/names?q=jo&limit=5')
+        self.assertIn(response.status_code, [200, 503])  # 503 until the name index is loaded
+        self.assertEqual(self.client.get('/search/names?q=').status_code, 400)
+        self.assertEqual(self.client.get('/search/names?q=jo&limit=100').status_code, 400)
+
+    def test_search_by_ids(self):
+        missing_id = self.seed_ids[-1] + 1000000
+        response = self.client.post('/search/ids?fields=first_name',
+                                    json=[self.seed_ids[2], missing_id, self.seed_ids[0], self.seed_ids[2]])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['response'], {
+            "employees": {str(self.seed_ids[0]): {"first_name": "Seed0"}, str(self.seed_ids[2]): {"first_name": "Seed2"}},
+            "missing": [missing_id],
+        })
+
+        response = self.client.get(f'/search/ids?ids={self.seed_ids[1]},{missing_id}')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['response']
+        self.assertEqual(data['missing'], [missing_id])
+        self.assertEqual(list(data['employees']), [str(self.seed_ids[1])])
+        employee = data['employees'][str(self.seed_ids[1])]
+        self.assertEqual((employee['id'], employee['first_name'], employee['position'], employee['department'],
+                          employee['status'], employee['birth_date']),
+                         (self.seed_ids[1], 'Seed1', 'Manager', 'it', 'active', '1990-01-01'))
+        self.assertEqual(self.client.get('/search/ids?ids=0,a').status_code, 400)
+        self.assertEqual(self.client.post('/search/ids', json={"ids": [1]}).status_code, 400)
+        self.assertEqual(self.client.post('/search/ids', json=list(range(10001))).status_code, 413)
+
+    def test_search_by_id_invalid_fields(self):
+        response = self.client.get('/search/id/1?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+
     def test_get_employee_list(self):
         response = self.client.get('/data/employee/0')
         self.assertIn(response.status_code, [200, 500])
@@ -98,5 +226,45 @@ class APITestCase(unittest.TestCase):
         response = self.client.get('/data/documents/0')
         self.assertIn(response.status_code, [200, 500])
 
+    def test_get_employee_list_by_cursor(self):
+        response = self.client.get('/data/employee')
+        self.assertIn(response.status_code, [200, 500])
+        if response.status_code == 200:
+            self.assertIn('next_cursor', response.get_json()['response'])
+
+    def test_get_document_list_invalid_cursor(self):
+        response = self.client.get('/data/documents?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_employee_list(self):
+        response = self.client.get('/data/employee/export?format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data.startswith(b'id,first_name'))
+
+    def test_export_employee_list_invalid_format(self):
+        response = self.client.get('/data/employee/export?format=xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_headcount(self):
+        response = self.client.get('/data/headcount?by=department')
+        self.assertIn(response.status_code, [200, 503])  # 503 until the headcount index is loaded
+        if response.status_code == 200:
+            data = response.get_json()['response']
+            self.assertEqual(sum(x['count'] for x in data['headcount']), data['total'])
+        self.assertEqual(self.client.get('/data/headcount?by=first_name').status_code, 400)
+
+    @unittest.skipUnless(MYSQL_BACKEND, "needs the mysql storage backend")
+    def test_db_pool_status(self):
+        response = self.client.get('/status/db_pool')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('checkouts', response.get_json()['response'])
+
+    @unittest.skipUnless(MYSQL_BACKEND, "needs the mysql storage backend")
+    def test_query_status(self):
+        self.client.get('/search/id/1')
+        response = self.client.get('/status/queries')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db.employee.get_employee', response.get_json()['response'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
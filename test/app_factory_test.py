@@ -0,0 +1,66 @@
+import sys
+import os
+import tempfile
+import time
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.rdb import RDBSettings
+from config.storage import StorageSettings
+from config.cache import CacheSettings
+from app_factory import create_app
+from db.init_pool import start_db_pool, stop_db_pool
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class AppFactoryTestCase(unittest.TestCase):
+    def setUp(self):
+        # unreachable database - the app must be built without waiting for it
+        cache_settings = CacheSettings(response_path=os.path.join(tempfile.gettempdir(), "app_factory_test.responses"),
+                                       versions_path=os.path.join(tempfile.gettempdir(), "app_factory_test.versions"))
+        settings = Settings(rdb=RDBSettings(host="127.0.0.1", port=1), storage=StorageSettings(backend="mysql"),
+                            cache=cache_settings)
+        start_time = time.perf_counter()
+        self.app = create_app(settings, configure_logging=False)
+        self.elapsed = time.perf_counter() - start_time
+        self.client = self.app.test_client()
+
+    def test_create_app_without_database(self):
+        self.assertLess(self.elapsed, 5)
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+    def test_not_ready_without_database(self):
+        response = self.client.get('/status/ready')
+        self.assertEqual(response.status_code, 503)
+
+    def test_startup_times(self):
+        response = self.client.get('/status/startup')
+        self.assertEqual(response.status_code, 200)
+        startup_times = response.get_json()['response']
+        for key in ('import_ms', 'settings_ms', 'app_ms', 'pool_warmup_ms', 'pool_status'):
+            self.assertIn(key, startup_times)
+
+    def test_connecting_thread_stops(self):
+        # the connecting thread of an app created again (or stopped) doesn't retry forever
+        settings = Settings(rdb=RDBSettings(host="127.0.0.1", port=1), storage=StorageSettings(backend="mysql"))
+        first = start_db_pool(settings, retry_seconds=0.05)
+        second = start_db_pool(settings, retry_seconds=0.05)
+        first.join(2)
+        self.assertFalse(first.is_alive())
+        self.assertTrue(second.is_alive())
+        stop_db_pool()
+        second.join(2)
+        self.assertFalse(second.is_alive())
+
+    def test_api_without_database(self):
+        response = self.client.get('/search/id/1')
+        self.assertEqual(response.status_code, 500)
+
+if __name__ == '__main__':
+    unittest.main()
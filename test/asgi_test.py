@@ -0,0 +1,129 @@
+import sys
+import os
+import asyncio
+import gzip
+import json
+import tempfile
+
+import unittest
+from unittest import mock
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.cache import CacheSettings
+from config.compression import CompressionSettings
+from config.storage import StorageSettings
+from app_factory import create_app
+from db.async_employee import shutdown_db_executor
+from utils import shared_cache
+from utils.shared_cache import SharedResponseCache
+from views.async_view import make_async_app
+
+EMPLOYEE = {"first_name": "John", "position": "employee", "department": "sales",
+            "phone_number": "010-0000-0001", "email": "john@example.com"}
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class AsgiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        cache_settings = CacheSettings(versions_path=os.path.join(self.directory.name, "versions"))
+        self.flask_app = create_app(Settings(storage=StorageSettings(backend="memory"), cache=cache_settings,
+                                             compression=CompressionSettings(min_bytes=256)),
+                                    configure_logging=False)
+        self.app = make_async_app(self.flask_app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutdown_db_executor()
+        shared_cache.VERSIONS.close()
+        shared_cache.VERSIONS = None
+        self.directory.cleanup()
+
+    def request(self, method: str, path: str, **kwargs):
+        async def send():
+            response = await self.client.open(path, method=method, **kwargs)
+            return response, await response.get_data()
+        return asyncio.run(send())
+
+    def test_same_routes_as_flask(self):
+        response, data = self.request('POST', '/manage/create/bulk', json=[EMPLOYEE] * 20)
+        self.assertEqual(response.status_code, 201)
+        ids = [item['id'] for item in json.loads(data)['response']['results']]
+        self.assertEqual(len(ids), 20)
+
+        response, data = self.request('POST', f'/manage/reassign/{ids[0]}/manager/hr')
+        self.assertEqual(response.status_code, 200)
+        response, data = self.request('GET', '/search/ids', query_string={'ids': f'{ids[0]},999'})
+        body = json.loads(data)['response']
+        self.assertEqual([(x['id'], x['position'], x['department']) for x in body['employees'].values()],
+                         [(ids[0], 'Manager', 'hr')])
+        self.assertEqual(body['missing'], [999])
+
+        flask_client = self.flask_app.test_client()
+        for path in ('/search/names?q=jo', '/search/employees?department=sales', '/data/headcount', '/',
+                     f'/search/id/{ids[1]}?fields=id,email', '/search/position/0?format=csv', '/search/department/2',
+                     '/data/employee', '/data/employee/5', '/data/documents'):
+            response, data = self.request('GET', path)
+            self.assertEqual((response.status_code, data), (200, flask_client.get(path).data), path)
+        for path in ('/search/id/1?fields=bad', '/search/ids?ids=a', '/data/employee?cursor=bad', '/data/headcount?by=x'):
+            response, data = self.request('GET', path)
+            self.assertEqual((response.status_code, data), (400, flask_client.get(path).data), path)
+
+    def test_reads_await_database_functions(self):
+        self.request('POST', '/manage/create', form=EMPLOYEE)
+        # the sync database functions of the views aren't called on the event loop
+        with mock.patch('views.search_view.get_employee', side_effect=AssertionError), \
+                mock.patch('views.data_view.get_employees_after', side_effect=AssertionError):
+            response, data = self.request('GET', '/search/id/1')
+            self.assertEqual((response.status_code, json.loads(data)['response']['first_name']), (200, 'John'))
+            response, data = self.request('GET', '/data/employee')
+            self.assertEqual(len(json.loads(data)['response']['employees']), 1)
+
+    def test_without_database_executor(self):
+        self.request('POST', '/manage/create', form=EMPLOYEE)
+        response, _ = self.request('GET', '/search/id/1')
+        etag = response.headers['ETag']
+        shared_cache.RESPONSE_CACHE = SharedResponseCache(os.path.join(self.directory.name, "responses"),
+                                                          slots=64, slot_bytes=1024, ttl_seconds=60)
+        try:
+            response, _ = self.request('GET', '/search/position/0')
+            self.assertEqual(response.headers['X-Cache'], 'MISS')
+
+            # status APIs, cached responses and 304s don't wait behind the queries of the executor
+            with mock.patch('db.async_employee.get_db_executor', side_effect=AssertionError):
+                response, _ = self.request('GET', '/search/position/0')
+                self.assertEqual((response.status_code, response.headers['X-Cache']), (200, 'HIT'))
+                response, _ = self.request('GET', '/search/id/1', headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+                for path in ('/status/ready', '/status/db_pool', '/search/names?q=jo', '/'):
+                    response, _ = self.request('GET', path)
+                    self.assertEqual(response.status_code, 200, path)
+        finally:
+            shared_cache.RESPONSE_CACHE.close()
+            shared_cache.RESPONSE_CACHE = None
+
+    def test_not_modified_and_compressed(self):
+        self.request('POST', '/manage/create', form=EMPLOYEE)
+        response, _ = self.request('GET', '/search/id/1')
+        etag = response.headers['ETag']
+        response, data = self.request('GET', '/search/id/1', headers={'If-None-Match': etag})
+        self.assertEqual((response.status_code, data), (304, b''))
+
+        self.request('POST', '/manage/position/1/manager')  # the version is bumped by the teardown
+        response, _ = self.request('GET', '/search/id/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+        self.request('POST', '/manage/create/bulk', json=[EMPLOYEE] * 20)
+        _, plain = self.request('GET', '/data/employee/export')
+        response, data = self.request('GET', '/data/employee/export', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(data), plain)
+        self.assertEqual(len(plain.splitlines()), 21)
+
+if __name__ == '__main__':
+    unittest.main()
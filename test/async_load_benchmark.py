@@ -0,0 +1,214 @@
+"""
+Load comparison of the threaded sync(WSGI) and async(ASGI) serving modes with a simulated database latency.
+The sync server handles the requests in as many threads as the pool connections, like one uWSGI worker process
+with `--threads`, and the async server serves the same flask app on the event loop with the database calls in
+the executor of as many threads (views/async_view.py).
+While the searches are running, readiness probes (`/status/ready`) are sent to see whether they wait behind them.
+usage: python test/async_load_benchmark.py [requests] [concurrency] [latency_ms] [pool_size]
+"""
+import sys
+import os
+import asyncio
+import datetime
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from flask import Flask
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+import db.init_pool as init_pool
+from config import Settings
+from views.search_view import search_bp
+from views.status_view import status_bp
+from views.async_view import make_async_app
+
+SYNC_PORT = 18080
+ASYNC_PORT = 18081
+PROBE_INTERVAL = 0.01
+
+EMPLOYEE_ROW = {
+    "id": 1, "first_name": "John", "surname": "Doe", "position": 0, "department": 0,
+    "phone_number": "010-0000-0001", "email": "john.doe1@example.com", "birth_date": datetime.datetime(1990, 1, 1),
+    "status": 1, "description": "Sample employee 1", "register_time": datetime.datetime(2023, 1, 1, 9, 0, 0),
+}
+
+
+# ============================================================================================
+# Fake database with latency
+# ============================================================================================
+
+class FakeCursor:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+    def execute(self, query, params=None):
+        time.sleep(self.latency)
+
+    def fetchone(self):
+        return dict(EMPLOYEE_ROW)
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self.pool.latency)
+
+    def close(self):
+        self.pool.semaphore.release()
+
+
+class FakePool:
+    """ Blocking pool with limited connections like PooledDB(blocking=True) """
+
+    def __init__(self, size: int, latency: float):
+        self.semaphore = threading.BoundedSemaphore(size)
+        self.latency = latency
+
+    def connection(self):
+        self.semaphore.acquire()
+        return FakeConnection(self)
+
+
+# ============================================================================================
+# Servers
+# ============================================================================================
+
+class QuietHandler(WSGIRequestHandler):
+    def log(self, *args):
+        pass
+
+
+class ThreadPoolWSGIServer(BaseWSGIServer):
+    """ WSGI server which handles the requests in a fixed number of threads, like `uwsgi --threads` """
+
+    def __init__(self, host: str, port: int, app, threads: int):
+        super().__init__(host, port, app, handler=QuietHandler)
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def make_flask_app() -> Flask:
+    app = Flask(__name__)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(status_bp)
+    return app
+
+
+def start_sync_server(threads: int) -> object:
+    server = ThreadPoolWSGIServer("127.0.0.1", SYNC_PORT, make_flask_app(), threads)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_async_server() -> threading.Event:
+    app = make_async_app(make_flask_app())
+    config = Config()
+    config.bind = [f"127.0.0.1:{ASYNC_PORT}"]
+    config.accesslog = None
+    config.backlog = 1024
+    stop_event = threading.Event()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        await serve(app, config, shutdown_trigger=lambda: loop.run_in_executor(None, stop_event.wait))
+
+    threading.Thread(target=lambda: asyncio.run(run()), daemon=True).start()
+    return stop_event
+
+
+# ============================================================================================
+# Load generator
+# ============================================================================================
+
+def request_once(port: int, path: str = "/search/id/1") -> float:
+    start_time = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    assert response.status == 200, response.status
+    return time.perf_counter() - start_time
+
+
+def percentile(latencies: list, ratio: float) -> float:
+    return latencies[max(int(len(latencies) * ratio) - 1, 0)] * 1000
+
+
+def run_load(name: str, port: int, total: int, concurrency: int):
+    request_once(port)  # warm up
+    probes, done = list(), threading.Event()
+
+    def probe():
+        while not done.wait(PROBE_INTERVAL):
+            probes.append(request_once(port, "/status/ready"))
+
+    prober = threading.Thread(target=probe)
+    start_time = time.perf_counter()
+    prober.start()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(lambda _: request_once(port), range(total)))
+    elapsed = time.perf_counter() - start_time
+    done.set()
+    prober.join()
+    probes.sort()
+    print(f"{name:6s} | {total / elapsed:10.1f} req/s | p50 {statistics.median(latencies) * 1000:8.1f} ms"
+          f" | p99 {percentile(latencies, 0.99):8.1f} ms | total {elapsed:6.2f} s"
+          f" | ready p50 {statistics.median(probes) * 1000:7.1f} ms, p99 {percentile(probes, 0.99):7.1f} ms")
+
+
+def main(total: int, concurrency: int, latency_ms: float, pool_size: int):
+    settings = Settings()
+    settings.rdb.pool_max_connections = pool_size
+    fake_pool = FakePool(pool_size, latency_ms / 1000)
+    init_pool.make_db_pool = lambda _: fake_pool
+    init_pool.set_db_pool(settings)
+
+    sync_server = start_sync_server(pool_size)
+    stop_async_server = start_async_server()
+    time.sleep(1)
+
+    print(f"requests: {total}, concurrency: {concurrency}, db latency: {latency_ms} ms, "
+          f"pool size (sync threads, async executor workers): {pool_size}")
+    run_load("sync", SYNC_PORT, total, concurrency)
+    run_load("async", ASYNC_PORT, total, concurrency)
+
+    sync_server.shutdown()
+    stop_async_server.set()
+
+
+if __name__ == '__main__':
+    args = [float(x) for x in sys.argv[1:]]
+    main(int(args[0]) if len(args) > 0 else 500,
+         int(args[1]) if len(args) > 1 else 100,
+         args[2] if len(args) > 2 else 20.0,
+         int(args[3]) if len(args) > 3 else 32)
@@ -0,0 +1,107 @@
+import sys
+import os
+import gzip
+import tempfile
+import zlib
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.cache import CacheSettings
+from config.compression import CompressionSettings
+from config.storage import StorageSettings
+from app_factory import create_app
+from db import get_storage_backend
+from utils import shared_cache, get_compression_stats
+
+EMPLOYEE = {"first_name": "John", "position": "employee", "department": "sales",
+            "phone_number": "010-0000-0001", "email": "john@example.com"}
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class CompressionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        cache_settings = CacheSettings(versions_path=os.path.join(self.directory.name, "versions"))
+        self.app = create_app(Settings(storage=StorageSettings(backend="memory"), cache=cache_settings,
+                                       compression=CompressionSettings(min_bytes=256)),
+                              configure_logging=False)
+        self.client = self.app.test_client()
+        for _ in range(20):
+            self.client.post('/manage/create', data=EMPLOYEE)
+
+    def tearDown(self):
+        shared_cache.VERSIONS.close()
+        shared_cache.VERSIONS = None
+        self.directory.cleanup()
+
+    def test_negotiated_encoding(self):
+        plain = self.client.get('/data/employee')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertIn('Accept-Encoding', plain.headers['Vary'])
+
+        response = self.client.get('/data/employee', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertLess(len(response.data), len(plain.data))
+
+        response = self.client.get('/data/employee', headers={'Accept-Encoding': 'gzip;q=0.5, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(response.data), plain.data)
+
+        response = self.client.get('/data/employee', headers={'Accept-Encoding': 'br'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_stream_error_is_not_completed(self):
+        backend = get_storage_backend()
+        rows = next(backend.iter_employees(5))
+
+        def iter_employees(chunk_size, columns=None):
+            yield rows
+            raise ConnectionError("Lost connection to MySQL server during query")
+
+        backend.iter_employees = iter_employees
+        try:
+            with self.assertRaises(ConnectionError):  # no gzip trailer is written after the error
+                self.client.get('/data/employee/export', headers={'Accept-Encoding': 'gzip'}).get_data()
+        finally:
+            del backend.iter_employees
+
+    def test_small_response_not_compressed(self):
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.data, b'Hello, World!')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        stats = get_compression_stats()['hello_world']
+        self.assertGreaterEqual(stats['responses'], 1)
+        self.assertEqual(stats['compressed'], 0)
+
+    def test_streamed_export(self):
+        plain = self.client.get('/data/employee/export').data
+        response = self.client.get('/data/employee/export', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(gzip.decompress(response.data), plain)
+
+        stats = get_compression_stats()['data.export_employee_list']
+        self.assertGreaterEqual(stats['compressed'], 1)
+        self.assertLess(stats['ratio'], 1)
+
+    def test_not_modified_with_weak_etag(self):
+        response = self.client.get('/data/employee', headers={'Accept-Encoding': 'gzip'})
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+
+        response = self.client.get('/data/employee', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get('/status/compression')
+        self.assertIn('data.get_employee_list', response.get_json()['response'])
+
+
+if __name__ == '__main__':
+    unittest.main()
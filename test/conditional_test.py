@@ -0,0 +1,136 @@
+import sys
+import os
+import tempfile
+import time
+from email.utils import formatdate
+
+import unittest
+from unittest import mock
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.cache import CacheSettings
+from config.storage import StorageSettings
+from app_factory import create_app
+from db import get_storage_backend, init_pool
+from db.name_index import get_name_index
+from utils import shared_cache, employee_version_key, EMPLOYEE_LIST_VERSION_KEY
+
+EMPLOYEE = {"first_name": "John", "position": "employee", "department": "sales",
+            "phone_number": "010-0000-0001", "email": "john@example.com"}
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class ConditionalGetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        cache_settings = CacheSettings(versions_path=os.path.join(self.directory.name, "versions"))
+        self.app = create_app(Settings(storage=StorageSettings(backend="memory"), cache=cache_settings),
+                              configure_logging=False)
+        self.client = self.app.test_client()
+        self.client.post('/manage/create', data=EMPLOYEE)
+
+        # count the queries of the storage backend
+        self.queries = 0
+        backend = get_storage_backend()
+        get_employee = backend.get_employee
+
+        def counted_get_employee(*args, **kwargs):
+            self.queries += 1
+            return get_employee(*args, **kwargs)
+        backend.get_employee = counted_get_employee
+
+    def tearDown(self):
+        shared_cache.VERSIONS.close()
+        shared_cache.VERSIONS = None
+        self.directory.cleanup()
+
+    def test_not_modified_without_query(self):
+        with mock.patch("time.time", return_value=time.time() + 1):  # the second of the write has passed
+            response = self.client.get('/search/id/1')
+            self.assertEqual(response.status_code, 200)
+            etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+
+            response = self.client.get('/search/id/1', headers={'If-None-Match': etag})
+            self.assertEqual((response.status_code, response.data), (304, b''))
+            self.assertEqual(response.headers['ETag'], etag)
+            response = self.client.get('/search/id/1', headers={'If-Modified-Since': last_modified})
+            self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.queries, 1)
+
+        # another employee is not a change of this one
+        self.client.post('/manage/create', data=EMPLOYEE)
+        self.assertEqual(self.client.get('/search/id/1', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_modified_by_writes(self):
+        etag = self.client.get('/search/id/1').headers['ETag']
+        department_etag = self.client.get('/search/department/0').headers['ETag']
+        list_etag = self.client.get('/data/employee').headers['ETag']
+
+        self.client.post('/manage/position/1/manager')
+        response = self.client.get('/search/id/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.get_json()['response']['position'], 'Manager')
+        self.assertEqual(self.client.get('/search/department/0',
+                                         headers={'If-None-Match': department_etag}).status_code, 200)
+        self.assertEqual(self.client.get('/data/employee', headers={'If-None-Match': list_etag}).status_code, 200)
+
+    def test_errors_without_validators(self):
+        response = self.client.get('/search/id/999')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+        # a database error is served as an empty group, which must not be answered by 304 until the next write
+        def failed_get_employees_by_position(*args, **kwargs):
+            init_pool.mark_db_error()
+            return None
+        backend = get_storage_backend()
+        backend.get_employees_by_position = failed_get_employees_by_position
+        try:
+            response = self.client.get('/search/position/0')
+        finally:
+            del backend.get_employees_by_position
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+        self.assertNotIn('Last-Modified', response.headers)
+
+    def test_last_modified_after_its_second(self):
+        _, written = shared_cache.VERSIONS.get([employee_version_key(1)])
+        with mock.patch("time.time", return_value=written):  # in the second of the write
+            response = self.client.get('/search/id/1')
+            self.assertIn('ETag', response.headers)
+            self.assertNotIn('Last-Modified', response.headers)
+
+            # a date of the same second doesn't tell whether a write came after it
+            self.client.post('/manage/position/1/manager')
+            response = self.client.get('/search/id/1', headers={'If-Modified-Since': formatdate(written, usegmt=True)})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['response']['position'], 'Manager')
+
+    def test_per_worker_data_behind_other_workers(self):
+        index = get_name_index()
+        self.assertTrue(index.load(get_storage_backend().get_employees_after))
+        self.client.post('/manage/create', data=EMPLOYEE)  # written by this worker, applied to its index
+        response = self.client.get('/search/names?q=jo')
+        self.assertEqual(len(response.get_json()['response']['employees']), 2)
+        etag = response.headers['ETag']
+
+        # written by another worker: the index can't tell what is written, so the new version isn't sent with it
+        shared_cache.VERSIONS.bump([EMPLOYEE_LIST_VERSION_KEY])
+        index.wakeup.clear()
+        response = self.client.get('/search/names?q=jo', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+        self.assertTrue(index.wakeup.is_set())  # reloaded by the reconcile thread
+
+        self.assertTrue(index.load(get_storage_backend().get_employees_after))
+        response = self.client.get('/search/names?q=jo')
+        self.assertNotIn(response.headers['ETag'], (None, etag))
+
+if __name__ == '__main__':
+    unittest.main()
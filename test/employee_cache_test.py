@@ -0,0 +1,124 @@
+import sys
+import os
+import time
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from db import backend, cache
+from db.cache import EmployeeCache
+from db.init_pool import is_primary_pinned
+from db.memory_backend import MemoryBackend
+
+ROWS = {x: {"id": x, "first_name": f"name{x}", "department": x % 3} for x in range(1, 6)}
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class EmployeeCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+        self.cache = EmployeeCache(max_entries=3, max_bytes=1024 * 1024, ttl_seconds=60)
+
+    def load(self, employee_id):
+        self.loads.append(employee_id)
+        return ROWS.get(employee_id)
+
+    def test_read_through(self):
+        self.assertEqual(self.cache.get(1, self.load), ROWS[1])
+        self.assertEqual(self.cache.get(1, self.load, ("id", "department")), {"id": 1, "department": 1})
+        self.assertIsNone(self.cache.get(999, self.load))
+        self.assertIsNone(self.cache.get(999, self.load))
+        self.assertEqual(self.loads, [1, 999, 999])
+
+        stats = self.cache.to_dict()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 3, 1))
+
+    def test_lru_eviction_and_ttl(self):
+        for employee_id in (1, 2, 3):
+            self.cache.get(employee_id, self.load)
+        self.cache.get(1, self.load)  # 2 is the least recently used
+        self.cache.get(4, self.load)
+        self.assertEqual(self.cache.to_dict()["evictions"], 1)
+        self.cache.get(2, self.load)
+        self.assertEqual(self.loads, [1, 2, 3, 4, 2])
+
+        self.cache.ttl_seconds = 0.01
+        self.cache.clear()
+        self.cache.get(5, self.load)
+        time.sleep(0.02)
+        self.cache.get(5, self.load)
+        self.assertEqual(self.cache.to_dict()["expirations"], 1)
+
+    def test_invalidation(self):
+        self.cache.get(1, self.load)
+        self.cache.invalidate([1, 2])
+        self.cache.get(1, self.load)
+        self.assertEqual(self.loads, [1, 1])
+        self.assertEqual(self.cache.to_dict()["invalidations"], 1)
+
+        # a row read while the employee is written is not cached
+        def load_during_write(employee_id):
+            self.cache.invalidate([employee_id])
+            return self.load(employee_id)
+        self.cache.invalidate([3])
+        self.cache.get(3, load_during_write)
+        self.cache.get(3, self.load)
+        self.assertEqual(self.loads, [1, 1, 3, 3])
+
+    def test_written_by_other_workers(self):
+        self.cache.get(1, self.load, shared_version="a-1")
+        self.cache.get(1, self.load, shared_version="a-1")
+        self.cache.get(1, self.load, shared_version="a-2")  # the shared version has moved
+        self.cache.get_many([1, 2], lambda employee_ids: [self.load(x) for x in employee_ids],
+                            shared_versions={1: "a-2", 2: "a-1"})
+        self.assertEqual(self.loads, [1, 1, 2])
+        self.assertEqual(self.cache.to_dict()["stale"], 1)
+
+    def test_get_many(self):
+        def load_many(employee_ids):
+            self.loads.append(list(employee_ids))
+            return [ROWS[x] for x in employee_ids if x in ROWS]
+
+        self.cache.get(1, self.load)
+        found = self.cache.get_many([1, 2, 999, 2], load_many, ("id", "department"))
+        self.assertEqual(found, {1: {"id": 1, "department": 1}, 2: {"id": 2, "department": 2}})
+        self.assertEqual(self.loads, [1, [2, 999]])  # one load for all the misses
+        self.assertEqual(self.cache.get_many([1, 2], load_many), {1: ROWS[1], 2: ROWS[2]})
+        self.assertEqual(len(self.loads), 2)
+        self.assertIsNone(self.cache.get_many([3], lambda employee_ids: None))  # database error
+
+    def test_fill_reads_primary(self):
+        pinned = []
+
+        class ReplicatedBackend(MemoryBackend):
+            in_process = False  # read through the employee cache like MySQLBackend
+
+            def get_employee(self, employee_id, columns=None):
+                pinned.append(is_primary_pinned())
+                return super().get_employee(employee_id, columns)
+
+            def get_employees_by_ids(self, employee_ids, columns=None):
+                pinned.append(is_primary_pinned())
+                return super().get_employees_by_ids(employee_ids, columns)
+
+        previous = backend.get_storage_backend()
+        backend.set_storage_backend(ReplicatedBackend([{"id": 1, "first_name": "John", "position": 0, "department": 0,
+                                                    "phone_number": "010-0000-0001", "email": "john@example.com",
+                                                    "status": 1}]))
+        cache.set_employee_cache(Settings())
+        try:
+            self.assertEqual(backend.get_employee(1, ("id",)), {"id": 1})
+            self.assertEqual(backend.get_employees_by_ids([1, 2], ("id",)), [{"id": 1}])
+            self.assertEqual(pinned, [True, True])  # the misses were read from the primary
+            self.assertFalse(is_primary_pinned())
+        finally:
+            backend.set_storage_backend(previous)
+            cache.EMPLOYEE_CACHE = None
+
+if __name__ == '__main__':
+    unittest.main()
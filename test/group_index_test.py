@@ -0,0 +1,118 @@
+import sys
+import os
+import tempfile
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.storage import StorageSettings
+from db import backend, group_index
+from db.memory_backend import MemoryBackend
+from utils import shared_cache, GROUP_VERSION_KEYS
+from utils.shared_cache import SharedVersions
+
+EMPLOYEES = [
+    {"first_name": f"name{x}", "surname": "", "position": x % 3, "department": x % 2, "phone_number": "010-0000-0000",
+     "email": f"name{x}@example.com", "birth_date": None, "status": 1, "description": "",
+     "register_time": "2023-01-01 09:00:00"}
+    for x in range(1, 11)
+]
+
+
+class DatabaseBackend(MemoryBackend):
+    """ Memory backend in place of MySQL, with the group index in front of it """
+    in_process = False
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class GroupIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.database = DatabaseBackend(EMPLOYEES)
+        self.previous_backend = backend.get_storage_backend()
+        backend.set_storage_backend(self.database)
+        self.index = group_index.set_group_index(Settings(storage=StorageSettings(backend="mysql")))
+        self.assertTrue(self.index.load(self.database.get_employees_after))
+
+    def tearDown(self):
+        group_index.GROUP_INDEX = None
+        backend.set_storage_backend(self.previous_backend)
+
+    def test_served_like_the_database(self):
+        for position in range(3):
+            self.assertEqual(backend.get_employees_by_position(position),
+                             self.database.get_employees_by_position(position))
+        self.assertEqual(backend.get_employees_by_department(1, ("id", "department")),
+                         [{"id": x, "department": 1} for x in (1, 3, 5, 7, 9)])
+        self.assertEqual(backend.get_employees_by_department(5), [])
+        with self.assertRaises(ValueError):
+            backend.get_employees_by_department(1, ("password",))
+        self.assertEqual(self.index.to_dict()["hits"], 5)
+
+    def test_served_without_queries(self):
+        for name in ("get_employee", "get_employees_by_ids", "get_employees_by_position", "get_employees_by_department"):
+            setattr(self.database, name, None)  # any query of a group fails
+        self.assertEqual([x["id"] for x in backend.get_employees_by_position(2, ("id",))], [2, 5, 8])
+        self.assertEqual(len(backend.get_employees_by_department(0)), 5)
+
+    def test_updated_by_writes(self):
+        backend.promote_employee(1, 2)
+        backend.transfer_employees([2, 4, 999], 1)
+        backend.create_employees(EMPLOYEES[:3])
+        with self.assertRaises(RuntimeError):
+            with backend.unit_of_work():
+                backend.inactivate_employee(3)
+                backend.inactivate_employees([5, 6])
+                raise RuntimeError("rollback")
+        with backend.unit_of_work():
+            backend.inactivate_employees([7, 8])
+
+        for department in range(2):
+            self.assertEqual(self.index.get_group("department", department),
+                             self.database.get_employees_by_department(department))
+            self.assertEqual(backend.get_employees_by_department(department),
+                             self.database.get_employees_by_department(department))
+        self.assertEqual([x["id"] for x in self.index.get_group("status", 0, ("id",))], [7, 8])
+
+    def test_reconcile_drift(self):
+        self.database.promote_employee(1, 2)  # written by another worker
+        self.assertNotIn(1, [x["id"] for x in backend.get_employees_by_position(2)])
+
+        self.assertFalse(self.index.load(lambda *args: None))  # database error keeps the index
+        self.assertEqual(self.index.to_dict()["rows"], 10)
+        self.assertTrue(self.index.load(self.database.get_employees_after))
+        self.assertIn(1, [x["id"] for x in backend.get_employees_by_position(2)])
+        self.assertEqual(self.index.to_dict()["drifted_rows"], 1)
+
+    def test_written_by_other_workers(self):
+        directory = tempfile.TemporaryDirectory()
+        shared_cache.VERSIONS = SharedVersions(os.path.join(directory.name, "versions"), 64)
+        try:
+            self.assertTrue(self.index.load(self.database.get_employees_after))
+            backend.promote_employee(1, 2)  # written by this worker, applied to its index
+            self.assertTrue(self.index.to_dict()["current"])
+            hits = self.index.to_dict()["hits"]
+            self.assertIn(1, [x["id"] for x in backend.get_employees_by_position(2)])
+            self.assertEqual(self.index.to_dict()["hits"], hits + 1)
+
+            # written by another worker, the groups are read from the database until the index is reloaded
+            self.database.promote_employee(2, 2)
+            shared_cache.VERSIONS.bump(GROUP_VERSION_KEYS.values())
+            self.assertEqual(backend.get_employees_by_position(2), self.database.get_employees_by_position(2))
+            self.assertEqual(self.index.to_dict()["hits"], hits + 1)
+            self.assertTrue(self.index.wakeup.is_set())
+
+            self.assertTrue(self.index.load(self.database.get_employees_after))
+            self.assertEqual(backend.get_employees_by_position(2), self.database.get_employees_by_position(2))
+            self.assertEqual(self.index.to_dict()["hits"], hits + 2)
+        finally:
+            shared_cache.VERSIONS.close()
+            shared_cache.VERSIONS = None
+            directory.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
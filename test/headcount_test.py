@@ -0,0 +1,96 @@
+import sys
+import os
+import tempfile
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.storage import StorageSettings
+from db import backend, headcount
+from db.memory_backend import MemoryBackend
+from utils import shared_cache, EMPLOYEE_LIST_VERSION_KEY
+from utils.shared_cache import SharedVersions
+
+GROUPS = [(0, 0), (0, 1), (1, 0), (2, 0)]  # (position, department)
+EMPLOYEES = [
+    {"first_name": f"name{x}", "surname": "", "position": position, "department": department,
+     "phone_number": "010-0000-0000", "email": f"name{x}@example.com", "birth_date": None, "status": 1,
+     "description": "", "register_time": "2023-01-01 09:00:00"}
+    for x, (position, department) in enumerate(GROUPS)
+]
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class HeadcountTestCase(unittest.TestCase):
+    def setUp(self):
+        self.database = MemoryBackend(EMPLOYEES)
+        self.previous_backend = backend.get_storage_backend()
+        backend.set_storage_backend(self.database)
+        self.index = headcount.set_headcount_index(Settings(storage=StorageSettings(backend="memory")))
+        self.assertTrue(self.index.load(self.database.get_employees_after))
+
+    def tearDown(self):
+        headcount.HEADCOUNT_INDEX = None
+        backend.set_storage_backend(self.previous_backend)
+
+    def test_counts_and_grouping(self):
+        rows, total = backend.get_headcounts()
+        # (department, position, status, count)
+        self.assertEqual((rows, total), ([(0, 0, 1, 1), (0, 1, 1, 1), (0, 2, 1, 1), (1, 0, 1, 1)], 4))
+        self.assertEqual(backend.get_headcounts(("position",)), ([(0, 2), (1, 1), (2, 1)], 4))
+
+    def test_updated_by_writes(self):
+        backend.create_employee(EMPLOYEES[0])
+        backend.promote_employee(1, 2)
+        backend.transfer_employees([2, 999], 2)
+        backend.inactivate_employee(3)
+        self.assertEqual(backend.get_headcounts(("department", "status")), ([(0, 0, 1), (0, 1, 3), (2, 1, 1)], 5))
+
+        # other writers are reconciled by the next load
+        self.database.promote_employee(4, 0)
+        self.assertEqual(backend.get_headcounts(("position",))[0], [(0, 2), (1, 1), (2, 2)])
+        self.assertTrue(self.index.load(self.database.get_employees_after))
+        self.assertEqual(backend.get_headcounts(("position",))[0], [(0, 3), (1, 1), (2, 1)])
+        self.assertEqual(self.index.to_dict()["drifted_count"], 2)
+
+    def test_written_by_other_workers(self):
+        class DatabaseBackend(MemoryBackend):
+            in_process = False
+
+        directory = tempfile.TemporaryDirectory()
+        shared_cache.VERSIONS = SharedVersions(os.path.join(directory.name, "versions"), 64)
+        backend.set_storage_backend(DatabaseBackend(EMPLOYEES))
+        try:
+            self.assertTrue(self.index.load(backend.get_storage_backend().get_employees_after))
+            backend.promote_employee(1, 2)  # written by this worker, applied to its counters
+            self.assertTrue(self.index.to_dict()["current"])
+            self.assertEqual(backend.get_headcounts(("position",))[0], [(0, 1), (1, 1), (2, 2)])
+
+            # written by another worker, counted by the database until the counters are reloaded
+            backend.get_storage_backend().promote_employee(2, 2)
+            shared_cache.VERSIONS.bump([EMPLOYEE_LIST_VERSION_KEY])
+            hits = self.index.to_dict()["hits"]
+            self.assertEqual(backend.get_headcounts(("position",)), ([(1, 1), (2, 3)], 4))
+            self.assertEqual(self.index.to_dict()["hits"], hits)
+            self.assertTrue(self.index.wakeup.is_set())
+
+            self.assertTrue(self.index.load(backend.get_storage_backend().get_employees_after))
+            self.assertEqual(backend.get_headcounts(("position",)), ([(1, 1), (2, 3)], 4))
+            self.assertEqual(self.index.to_dict()["hits"], hits + 1)
+        finally:
+            shared_cache.VERSIONS.close()
+            shared_cache.VERSIONS = None
+            directory.cleanup()
+
+    def test_not_loaded(self):
+        headcount.set_headcount_index(Settings(storage=StorageSettings(backend="memory")))
+        self.assertIsNone(backend.get_headcounts())
+        self.assertTrue(headcount.get_headcount_index_stats()["enabled"])
+
+if __name__ == '__main__':
+    unittest.main()
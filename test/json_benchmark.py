@@ -0,0 +1,63 @@
+"""
+Benchmark of the JSON response path against make_response_form + jsonify.
+ - current : model_dump() per row, make_response_form and jsonify with the default JSON provider of Flask
+ - fast    : row decoder and make_json_response (orjson, the response form is written straight to bytes)
+usage: python test/json_benchmark.py [rows ...]
+"""
+import sys
+import os
+import datetime
+import timeit
+
+from flask import Flask, jsonify
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from utils import EmployeeSearchResponse, OrjsonProvider, get_row_decoder, make_json_response, make_response_form
+
+COLUMNS = ("id", "first_name", "surname", "position", "department", "phone_number", "email",
+           "birth_date", "status", "description", "register_time")
+
+
+def make_rows(count: int) -> list:
+    return [
+        {"id": i, "first_name": f"First{i}", "surname": f"Surname{i}", "position": i % 3, "department": (i // 3) % 3,
+         "phone_number": f"010-0000-{i % 10000:04d}", "email": f"user{i}@example.com",
+         "birth_date": datetime.date(1980 + i % 30, 1 + i % 12, 1 + i % 28), "status": i % 2,
+         "description": f"Sample employee {i}", "register_time": datetime.datetime(2023, 1 + i % 12, 1 + i % 28, 9)}
+        for i in range(count)
+    ]
+
+
+def main(counts):
+    default_app = Flask(__name__)
+    fast_app = Flask(__name__)
+    fast_app.json = OrjsonProvider(fast_app)
+    decoder = get_row_decoder(EmployeeSearchResponse, COLUMNS)
+
+    def current_path(rows):
+        employees = [EmployeeSearchResponse(**x).model_dump() for x in rows]
+        resp, http_code = make_response_form(data={"employees": employees})
+        return jsonify(resp).get_data()
+
+    def fast_path(rows):
+        resp, http_code = make_json_response(data={"employees": decoder.decode_dicts(rows)})
+        return resp.get_data()
+
+    print(f"{'rows':>8} {'current (ms)':>14} {'fast (ms)':>12} {'speedup':>9} {'body (KiB)':>11}")
+    for count in counts:
+        rows = make_rows(count)
+        number = max(1, 20000 // count)
+        with default_app.app_context():
+            body = current_path(rows)
+            current_time = min(timeit.repeat(lambda: current_path(rows), number=number, repeat=3)) / number
+        with fast_app.app_context():
+            assert fast_app.json.loads(fast_path(rows)) == default_app.json.loads(body)
+            fast_time = min(timeit.repeat(lambda: fast_path(rows), number=number, repeat=3)) / number
+        print(f"{count:>8} {current_time * 1000:>14.3f} {fast_time * 1000:>12.3f} {current_time / fast_time:>8.2f}x"
+              f" {len(body) / 1024:>11.1f}")
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [10, 1000, 100000])
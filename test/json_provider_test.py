@@ -0,0 +1,60 @@
+import sys
+import os
+import datetime
+import json
+
+import unittest
+
+from flask import Flask, jsonify
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from response_codes import HTTP_201_CREATED, HTTP_404_NOT_FOUND
+
+from utils import OrjsonProvider, make_json_response, make_response_form, EmployeeSearchResponse, get_row_decoder
+
+ROWS = [
+    {"id": 1, "first_name": "Jöhn", "surname": "Doe", "position": 0, "department": 2, "phone_number": "010-0000-0001",
+     "email": "john@example.com", "birth_date": datetime.date(1990, 1, 2), "status": 1, "description": "",
+     "register_time": datetime.datetime(2023, 1, 2, 9, 30)},
+    {"id": 2, "first_name": "Jane", "surname": "", "position": 1, "department": 0, "phone_number": "010-0000-0002",
+     "email": "jane@example.com", "birth_date": None, "status": 0, "description": "", "register_time": None},
+]
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class JSONProviderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.default_app = Flask(__name__)
+        self.app = Flask(__name__)
+        self.app.json = OrjsonProvider(self.app)
+
+    def test_same_as_default_provider(self):
+        data = {"employees": ROWS, "groups": {2: 1, 0: 1}, "next_cursor": None}
+        with self.default_app.app_context():
+            expected = jsonify(make_response_form(data=data)[0]).get_data()
+        with self.app.app_context():
+            self.assertEqual(json.loads(jsonify(make_response_form(data=data)[0]).get_data()), json.loads(expected))
+            response, http_code = make_json_response(data=data, http_status=HTTP_201_CREATED)
+            self.assertEqual(http_code, 201)
+            self.assertEqual(response.get_json(), {**json.loads(expected), "status": 201})
+            self.assertIn(b'"register_time":"Mon, 02 Jan 2023 09:30:00 GMT"', response.get_data())
+
+    def test_error_response(self):
+        with self.app.app_context():
+            response, http_code = make_json_response(http_status=HTTP_404_NOT_FOUND, description="no employee")
+        self.assertEqual(http_code, 404)
+        self.assertEqual(response.get_json(), make_response_form(http_status=HTTP_404_NOT_FOUND, description="no employee")[0])
+
+    def test_decode_dict_rows(self):
+        fields = ("id", "position", "birth_date")
+        expected = [EmployeeSearchResponse(**x).model_dump(include=set(fields)) for x in ROWS]
+        self.assertEqual(get_row_decoder(EmployeeSearchResponse, fields, fields).decode_dicts(ROWS), expected)
+        self.assertEqual(get_row_decoder(EmployeeSearchResponse, tuple(ROWS[0])).decode_dicts(ROWS),
+                         [EmployeeSearchResponse(**x).model_dump() for x in ROWS])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Benchmark of logging a result set on the request thread, in the sync mode (FileHandler formats and writes it)
+and in the queue mode (LazyQueueHandler puts a shortened record to the queue for the writer thread).
+usage: python test/logging_benchmark.py [rows ...]
+"""
+import sys
+import os
+import logging
+import logging.handlers
+import queue
+import tempfile
+import timeit
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config.log import LazyQueueHandler, TruncateFilter
+
+
+def make_rows(count: int) -> list:
+    return [{"id": x, "first_name": f"name{x}", "surname": "Smith", "email": f"user{x}@example.com",
+             "position": "Employee", "department": "sales", "status": "active"} for x in range(count)]
+
+
+def time_logging(logger: logging.Logger, rows: list) -> float:
+    number = max(1, 10000 // len(rows))
+    return min(timeit.repeat(lambda: logger.info("Employee data retrieved: %s", rows), number=number, repeat=3)) / number
+
+
+def main(counts):
+    directory = tempfile.TemporaryDirectory()
+    file_handler = logging.FileHandler(os.path.join(directory.name, "app.log"))
+    file_handler.setFormatter(logging.Formatter('[%(asctime)s][%(name)s][%(levelname)s] %(message)s'))
+
+    sync_logger = logging.getLogger("benchmark.sync")
+    sync_logger.addHandler(file_handler)
+
+    queue_logger = logging.getLogger("benchmark.queue")
+    queue_handler = LazyQueueHandler(queue.Queue(100000), max_arg_chars=1000)
+    queue_logger.addHandler(queue_handler)
+    file_handler_of_queue = logging.FileHandler(os.path.join(directory.name, "queue.log"))
+    file_handler_of_queue.addFilter(TruncateFilter(4000))
+    listener = logging.handlers.QueueListener(queue_handler.queue, file_handler_of_queue)
+    listener.start()
+
+    for logger in (sync_logger, queue_logger):
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    print(f"{'rows':>10} {'sync (us)':>12} {'queue (us)':>12}   (request thread time per log call)")
+    for count in counts:
+        rows = make_rows(count)
+        sync_seconds, queue_seconds = time_logging(sync_logger, rows), time_logging(queue_logger, rows)
+        print(f"{count:>10} {sync_seconds * 1e6:>12.1f} {queue_seconds * 1e6:>12.1f}")
+
+    listener.stop()
+    file_handler.close()
+    file_handler_of_queue.close()
+    directory.cleanup()
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [10, 1000, 100000])
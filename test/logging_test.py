@@ -0,0 +1,100 @@
+import sys
+import os
+import logging
+import logging.handlers
+import queue
+import tempfile
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import LogSettings, set_logging, get_logging_stats
+from config.log import LazyQueueHandler, SamplingFilter, TruncateFilter, stop_log_listeners
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = list()
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class QueueLoggingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.output = ListHandler()
+        self.output.addFilter(TruncateFilter(60))
+        self.handler = LazyQueueHandler(queue.Queue(3), max_arg_chars=40)
+        self.listener = logging.handlers.QueueListener(self.handler.queue, self.output)
+        self.logger = logging.getLogger("app.test_queue")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_lazy_and_truncated(self):
+        rows = [{"id": x, "first_name": f"name{x}"} for x in range(100000)]
+        self.logger.info("Employee data retrieved: %s", rows)
+        rows.clear()  # the record keeps the shortened argument, not the list
+        self.logger.info("Employee created: (employee id: %d) %r", 1, "x" * 100)
+        self.listener.start()
+        self.listener.stop()
+
+        self.assertTrue(self.output.messages[0].startswith("Employee data retrieved: [{'id': 0, "))
+        self.assertLessEqual(len(self.output.messages[0]), 60 + len("... (999 more characters)"))
+        self.assertTrue(self.output.messages[1].startswith("Employee created: (employee id: 1) " + "x" * 25))
+
+    def test_full_queue_drops(self):
+        for x in range(5):
+            self.logger.info("record %d", x)
+        self.assertEqual((self.handler.queued, self.handler.dropped), (3, 2))
+
+    def test_sampling(self):
+        sampling_filter = SamplingFilter(0.5, {"always %d": 1.0})
+        self.handler.addFilter(sampling_filter)
+        self.listener.start()
+        for x in range(4):
+            self.logger.info("sampled %d", x)
+            self.logger.info("always %d", x)
+            self.listener.queue.join()
+        self.logger.warning("warning %d", 1)
+        self.listener.stop()
+
+        self.assertEqual([x for x in self.output.messages if x.startswith("sampled")], ["sampled 0", "sampled 2"])
+        self.assertEqual(len([x for x in self.output.messages if x.startswith("always")]), 4)
+        self.assertIn("warning 1", self.output.messages)
+        self.assertEqual(sampling_filter.sampled_out, 2)
+
+    def test_set_logging(self):
+        loggers = [logging.getLogger(name) for name in ("app", "app.slow_query")]
+        saved_handlers = [list(x.handlers) for x in loggers]
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            os.mkdir("logs")
+            try:
+                set_logging(LogSettings(mode="queue"))
+                logging.getLogger("app").info("Employee data retrieved: %s", list(range(1000)))
+                stats = get_logging_stats()
+                self.assertEqual((stats["mode"], stats["loggers"]["app"]["queued"]), ("queue", 1))
+                stop_log_listeners()
+                with open("logs/app.log") as f:
+                    self.assertIn("Employee data retrieved: [0, 1, 2,", f.read())
+                self.assertEqual(get_logging_stats(), {"mode": "sync"})
+            finally:
+                os.chdir(cwd)
+                for logger, handlers in zip(loggers, saved_handlers):
+                    for handler in logger.handlers:
+                        handler.close()
+                    logger.handlers = handlers
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import datetime
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from db.memory_backend import MemoryBackend
+
+EMPLOYEES = [
+    {"first_name": "John", "surname": "Doe", "position": 0, "department": 0, "phone_number": "010-0000-0001",
+     "email": "john.doe1@example.com", "birth_date": "1990-01-01", "status": 1, "description": "",
+     "register_time": "2023-01-01 09:00:00"},
+    {"first_name": "Jane", "surname": "Smith", "position": 1, "department": 1, "phone_number": "010-0000-0002",
+     "email": "jane.smith2@example.com", "birth_date": None, "status": 1, "description": "",
+     "register_time": "2023-01-02T09:00:00+00:00"},
+    {"first_name": "Alice", "surname": "Johnson", "position": 2, "department": 1, "phone_number": "010-0000-0003",
+     "email": "alice.johnson3@example.com", "birth_date": "1991-03-03", "status": 1, "description": "",
+     "register_time": "2023-01-03 09:00:00"},
+]
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class MemoryBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.backend = MemoryBackend(EMPLOYEES)
+
+    def test_indexes_follow_updates(self):
+        self.backend.transfer_employee(1, 1)
+        self.assertEqual([x["id"] for x in self.backend.get_employees_by_department(1)], [1, 2, 3])
+        self.assertEqual(self.backend.get_employees_by_department(0), [])
+
+        self.assertEqual(self.backend.inactivate_employees([3, 2, 999]), [2, 3])
+        self.assertEqual([x["id"] for x in self.backend.get_employees_by_status(0)], [2, 3])
+
+    def test_projection_and_pagination(self):
+        self.assertEqual(self.backend.get_employee(2, ("id", "first_name")), {"id": 2, "first_name": "Jane"})
+        self.assertIsNone(self.backend.get_employee(999))
+        self.assertEqual(self.backend.get_employees_by_ids([3, 999, 2, 3], ("id",)), [{"id": 2}, {"id": 3}])
+        columns, rows = self.backend.get_employees_after(1, 10, ("id",))
+        self.assertEqual((columns, rows), (("id",), [(2,), (3,)]))
+        with self.assertRaises(ValueError):
+            self.backend.get_employee(1, ("password",))
+
+    def test_search_employees(self):
+        columns, rows = self.backend.search_employees({"department": 1, "status": 1}, 0, 10, ("id",))
+        self.assertEqual(rows, [(2,), (3,)])
+        self.assertEqual(self.backend.search_employees({"department": 1, "position": 1}, 0, 10, ("id",))[1], [(2,)])
+        self.assertEqual(self.backend.search_employees({"department": 1}, 2, 10, ("id",))[1], [(3,)])
+        self.assertEqual(self.backend.search_employees({}, 0, 2, ("id",))[1], [(1,), (2,)])
+
+        registered = {"registered_from": datetime.datetime(2023, 1, 2), "registered_to": datetime.datetime(2023, 1, 3)}
+        self.assertEqual(self.backend.search_employees(registered, 0, 10, ("id",))[1], [(2,)])
+
+    def test_unit_of_work_rollback(self):
+        with self.assertRaises(RuntimeError):
+            with self.backend.unit_of_work():
+                self.backend.promote_employee(1, 2)
+                self.backend.create_employee(EMPLOYEES[0])
+                raise RuntimeError("rollback")
+        self.assertEqual(self.backend.get_employee(1)["position"], 0)
+        self.assertEqual([x["id"] for x in self.backend.get_employees_by_position(2)], [3])
+        self.assertEqual(len(self.backend.get_employees(0, 10)[1]), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Benchmark of the type-ahead queries of the name index.
+Employees get random first names, surnames and emails, and top-10 queries are timed for prefixes of different
+lengths, two-word prefixes and substrings.
+usage: python test/name_index_benchmark.py [employees ...]
+"""
+import sys
+import os
+import random
+import string
+import time
+import timeit
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from db.name_index import NameIndex, NameTable
+
+QUERIES = ["a", "jo", "mar", "kel", "jo sm", "ann", "user12"]
+
+
+def make_rows(count: int) -> dict:
+    rng = random.Random(0)
+    first_names = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))).capitalize() for _ in range(5000)]
+    first_names += ["John", "Mary", "Mark", "Anna", "Kelly", "Joseph"]
+    surnames = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))).capitalize() for _ in range(20000)]
+    surnames += ["Smith", "Johnson", "Smithers", "Annable"]
+    return {
+        i: (i, rng.choice(first_names), rng.choice(surnames), f"user{i}@example.com", i % 3, (i // 3) % 3, i % 2)
+        for i in range(1, count + 1)
+    }
+
+
+def main(counts):
+    print(f"{'employees':>10} {'build (s)':>10} " + " ".join(f"{q!r:>10}" for q in QUERIES) + "   (us per top-10 query)")
+    for count in counts:
+        rows = make_rows(count)
+        start_time = time.perf_counter()
+        index = NameIndex()
+        index._table, index.ready = NameTable(rows), True
+        build_seconds = time.perf_counter() - start_time
+
+        times = list()
+        for query in QUERIES:
+            index.search(query, 10)  # fill the sorted ID cache of the words
+            number = 2000
+            times.append(min(timeit.repeat(lambda: index.search(query, 10), number=number, repeat=3)) / number)
+        print(f"{count:>10} {build_seconds:>10.2f} " + " ".join(f"{x * 1e6:>10.1f}" for x in times))
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [10000, 100000, 1000000])
@@ -0,0 +1,85 @@
+import sys
+import os
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.storage import StorageSettings
+from db import backend, name_index
+from db.memory_backend import MemoryBackend
+
+NAMES = [("John", "Smith"), ("Johanna", "Doe"), ("Mary Ann", "Johnson"), ("Bob", "Smithers"), ("Alice", "Jones")]
+EMPLOYEES = [
+    {"first_name": first_name, "surname": surname, "position": 0, "department": 0, "phone_number": "010-0000-0000",
+     "email": f"{first_name.split()[0].lower()}.{surname.lower()}@example.com", "birth_date": None, "status": 1,
+     "description": "", "register_time": "2023-01-01 09:00:00"}
+    for first_name, surname in NAMES
+]
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class NameIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.database = MemoryBackend(EMPLOYEES)
+        self.previous_backend = backend.get_storage_backend()
+        backend.set_storage_backend(self.database)
+        self.index = name_index.set_name_index(Settings(storage=StorageSettings(backend="memory")))
+        self.assertTrue(self.index.load(self.database.get_employees_after))
+
+    def tearDown(self):
+        name_index.NAME_INDEX = None
+        backend.set_storage_backend(self.previous_backend)
+
+    def search_ids(self, query: str, limit: int = 10, include_inactive: bool = False) -> list:
+        return [x[0] for x in self.index.search(query, limit, include_inactive)]
+
+    def test_prefix_and_substring(self):
+        self.assertEqual(self.search_ids("jo"), [2, 1, 3, 5])  # johanna, john, johnson, jones
+        self.assertEqual(self.search_ids("JO", limit=2), [2, 1])
+        self.assertEqual(self.search_ids("smith"), [1, 4])
+        self.assertEqual(self.search_ids("ann"), [3, 2])  # prefix of "ann", then substring of "johanna"
+        self.assertEqual(self.search_ids("bob.sm"), [4])  # prefix of the email
+        self.assertEqual(self.search_ids("jo sm"), [1])
+        self.assertEqual(self.search_ids("mary johnson"), [3])
+        self.assertEqual(self.search_ids("zz"), [])
+        self.assertEqual(self.search_ids("  "), [])
+
+    def test_updated_by_writes(self):
+        new_id = backend.create_employee({**EMPLOYEES[0], "first_name": "Joan", "email": "joan@example.com"})
+        self.assertEqual(self.search_ids("joa"), [new_id])
+
+        backend.inactivate_employee(1)
+        self.assertEqual(self.search_ids("john"), [3])
+        self.assertEqual(self.search_ids("john", include_inactive=True), [1, 3])
+
+        backend.promote_employees([2, 999], 2)
+        backend.transfer_employee(2, 1)
+        columns, rows = backend.search_names("johanna", 10)
+        row = dict(zip(columns, rows[0]))
+        self.assertEqual((row["position"], row["department"]), (2, 1))
+
+        with self.assertRaises(RuntimeError):
+            with backend.unit_of_work():
+                backend.inactivate_employee(5)
+                raise RuntimeError("rollback")
+        self.assertEqual(self.search_ids("alice"), [5])
+
+    def test_reconcile_drift(self):
+        self.database._update_employee(4, first_name="Robert")  # written directly in the database
+        self.assertEqual(self.search_ids("robert"), [])
+
+        self.assertFalse(self.index.load(lambda *args: None))  # database error keeps the index
+        self.assertEqual(self.search_ids("bob"), [4])
+        self.assertTrue(self.index.load(self.database.get_employees_after))
+        self.assertEqual(self.search_ids("robert"), [4])
+        self.assertEqual(self.search_ids("bob"), [4])  # still the prefix of the email
+        self.assertEqual(self.index.to_dict()["drifted_rows"], 1)
+        self.assertEqual(self.index.to_dict()["words"], len(self.index._table.postings))
+
+if __name__ == '__main__':
+    unittest.main()
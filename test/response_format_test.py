@@ -0,0 +1,104 @@
+import sys
+import os
+import csv
+import io
+import tempfile
+
+import unittest
+
+import msgpack
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.cache import CacheSettings
+from config.storage import StorageSettings
+from app_factory import create_app
+from utils import shared_cache
+from utils.response_formats import to_columnar
+
+EMPLOYEE = {"first_name": "John", "position": "employee", "department": "sales",
+            "phone_number": "010-0000-0001", "email": "john@example.com"}
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class ResponseFormatTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        cache_settings = CacheSettings(versions_path=os.path.join(self.directory.name, "versions"))
+        self.app = create_app(Settings(storage=StorageSettings(backend="memory"), cache=cache_settings),
+                              configure_logging=False)
+        self.client = self.app.test_client()
+        for _ in range(12):
+            self.client.post('/manage/create', data=EMPLOYEE)
+
+    def tearDown(self):
+        shared_cache.VERSIONS.close()
+        shared_cache.VERSIONS = None
+        self.directory.cleanup()
+
+    def test_to_columnar(self):
+        rows = [{"id": 1, "first_name": "John"}, {"id": 2, "first_name": "Jane"}]
+        self.assertEqual(to_columnar(rows, ("id", "first_name")), {"id": [1, 2], "first_name": ["John", "Jane"]})
+        self.assertEqual(to_columnar(rows, ("id",)), {"id": [1, 2]})
+        self.assertEqual(to_columnar([], ("id",)), {"id": []})
+
+    def test_columnar(self):
+        rows = self.client.get('/data/employee?fields=id,first_name').get_json()['response']
+
+        response = self.client.get('/data/employee?fields=id,first_name&format=columnar')
+        self.assertEqual(response.mimetype, 'application/vnd.columnar+json')
+        data = response.get_json(force=True)['response']
+        self.assertEqual(data['employees'], {"id": [x['id'] for x in rows['employees']],
+                                             "first_name": [x['first_name'] for x in rows['employees']]})
+        self.assertEqual(data['next_cursor'], rows['next_cursor'])
+
+        response = self.client.get('/search/position/0?format=columnar')
+        self.assertEqual(len(response.get_json(force=True)['response']['employees']['id']), 12)
+
+    def test_values_with_and_without_fields(self):
+        employee = self.client.get('/search/id/1').get_json()['response']
+        for path in ('/search/position/0', '/search/department/2'):  # sales is 2
+            rows = self.client.get(path).get_json()['response']['employees']
+            self.assertEqual(rows[0], employee)
+            self.assertEqual(rows[0]['department'], 'sales')
+            rows = self.client.get(path + '?fields=id,department,register_time').get_json()['response']['employees']
+            self.assertEqual(rows[0], {key: employee[key] for key in ('id', 'department', 'register_time')})
+
+    def test_msgpack_by_accept(self):
+        rows = self.client.get('/data/employee/0').get_json()
+        response = self.client.get('/data/employee/0', headers={'Accept': 'application/msgpack'})
+        self.assertEqual(response.mimetype, 'application/msgpack')
+        self.assertIn('Accept', response.headers['Vary'])
+        self.assertEqual(msgpack.unpackb(response.data), rows)
+
+    def test_csv(self):
+        response = self.client.get('/data/employee?fields=id,first_name&format=csv')
+        self.assertEqual(response.mimetype, 'text/csv')
+        lines = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(lines[0], ['id', 'first_name'])
+        self.assertEqual(lines[1], ['1', 'John'])
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(response.headers['X-Show-Next-Button'], 'true')
+        self.assertIn('X-Next-Cursor', response.headers)
+
+    def test_invalid_format(self):
+        response = self.client.get('/search/department/0?format=xml')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/data/documents?format=xml').status_code, 400)
+
+    def test_etag_per_format(self):
+        etag = self.client.get('/data/employee').headers['ETag']
+        csv_etag = self.client.get('/data/employee', headers={'Accept': 'text/csv'}).headers['ETag']
+        self.assertNotEqual(etag, csv_etag)
+        response = self.client.get('/data/employee', headers={'Accept': 'text/csv', 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/data/employee', headers={'Accept': 'text/csv', 'If-None-Match': csv_etag})
+        self.assertEqual(response.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
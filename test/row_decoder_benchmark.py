@@ -0,0 +1,48 @@
+"""
+Benchmark of the read-side row decoder against pydantic response models.
+usage: python test/row_decoder_benchmark.py [rows]
+"""
+import sys
+import os
+import datetime
+import timeit
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from utils.validation_model import EmployeeSearchResponse
+from utils.row_decoder import get_row_decoder
+
+COLUMNS = ("id", "first_name", "surname", "position", "department", "phone_number", "email",
+           "birth_date", "status", "description", "register_time")
+
+
+def make_rows(count: int) -> list:
+    return [
+        (i, f"First{i}", f"Surname{i}", i % 3, (i // 3) % 3, f"010-0000-{i % 10000:04d}", f"user{i}@example.com",
+         datetime.datetime(1980 + i % 30, 1 + i % 12, 1 + i % 28), i % 2, f"Sample employee {i}",
+         datetime.datetime(2023, 1 + i % 12, 1 + i % 28, 9, i % 60, i % 60))
+        for i in range(count)
+    ]
+
+
+def main(count: int):
+    tuple_rows = make_rows(count)
+    dict_rows = [dict(zip(COLUMNS, row)) for row in tuple_rows]
+    decoder = get_row_decoder(EmployeeSearchResponse, COLUMNS)
+
+    assert decoder.decode_all(tuple_rows) == [EmployeeSearchResponse(**x).model_dump() for x in dict_rows]
+
+    number = max(1, 100000 // count)
+    pydantic_time = min(timeit.repeat(lambda: [EmployeeSearchResponse(**x).model_dump() for x in dict_rows],
+                                      number=number, repeat=5)) / number
+    decoder_time = min(timeit.repeat(lambda: decoder.decode_all(tuple_rows), number=number, repeat=5)) / number
+
+    print(f"rows: {count}")
+    print(f"pydantic model_dump : {pydantic_time * 1000:10.3f} ms ({pydantic_time / count * 1e6:.2f} us/row)")
+    print(f"row decoder         : {decoder_time * 1000:10.3f} ms ({decoder_time / count * 1e6:.2f} us/row)")
+    print(f"speedup             : {pydantic_time / decoder_time:10.2f} x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,107 @@
+import sys
+import os
+import datetime
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from pydantic import ValidationError
+
+from utils.validation_model import EmployeeSearchResponse, DocumentApprovalResponse, make_partial_model
+from utils.row_decoder import get_row_decoder
+
+# ===========================================================================================
+# Sample Rows
+# ============================================================================================
+
+EMPLOYEE_COLUMNS = ("id", "first_name", "surname", "position", "department", "phone_number", "email",
+                    "birth_date", "status", "description", "register_time")
+
+EMPLOYEE_ROWS = [
+    (1, "John", "Doe", 0, 0, "010-0000-0001", "john.doe1@example.com",
+     datetime.datetime(1990, 1, 1), 1, "Sample employee 1", datetime.datetime(2023, 1, 1, 9, 0, 0)),
+    (2, "Jane", "", 1, 1, "010-0000-0002", "jane@example.com",
+     datetime.date(1989, 2, 2), 0, "", datetime.datetime(2023, 1, 2, 9, 30, 15, 123456)),
+    (3, "Alice", "Johnson", 2, 2, "010-0000-0003", "alice@example.com",
+     "1991-03-03", 1, "string dates", "2023-01-03 09:00:00"),
+    (4, "Bob", "Williams", "Manager", "IT", "010-0000-0004", "bob@example.com",
+     datetime.datetime(1992, 4, 4, 23, 59, 59), "Active", "names instead of codes", datetime.date(2023, 1, 4)),
+]
+
+DOCUMENT_COLUMNS = ("id", "issuer", "assignee", "status", "dayoff_start_date", "dayoff_end_date", "reason",
+                    "created_at", "updated_at")
+
+DOCUMENT_ROWS = [
+    (1, 1, 2, 0, datetime.date(2023, 5, 1), datetime.date(2023, 5, 2), "Vacation",
+     datetime.datetime(2023, 4, 1, 10, 0, 0), datetime.datetime(2023, 4, 2, 11, 30, 0)),
+    (2, 2, 1, "approved", "2023-05-03", "2023-05-03", "",
+     "2023-04-01", datetime.date(2023, 4, 2)),
+]
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class RowDecoderTestCase(unittest.TestCase):
+    def test_employee_rows_same_as_model(self):
+        decoder = get_row_decoder(EmployeeSearchResponse, EMPLOYEE_COLUMNS)
+        for row in EMPLOYEE_ROWS:
+            expected = EmployeeSearchResponse(**dict(zip(EMPLOYEE_COLUMNS, row))).model_dump()
+            self.assertEqual(list(decoder.decode(row).items()), list(expected.items()))
+
+    def test_employee_decode_all(self):
+        decoder = get_row_decoder(EmployeeSearchResponse, EMPLOYEE_COLUMNS)
+        expected = [EmployeeSearchResponse(**dict(zip(EMPLOYEE_COLUMNS, row))).model_dump() for row in EMPLOYEE_ROWS]
+        self.assertEqual(decoder.decode_all(EMPLOYEE_ROWS), expected)
+
+    def test_employee_projection_same_as_partial_model(self):
+        fields = ("id", "first_name", "department", "register_time")
+        columns = ("register_time", "first_name", "id", "department")  # order of the columns differs from fields
+        decoder = get_row_decoder(EmployeeSearchResponse, columns, fields)
+        partial_model = make_partial_model(EmployeeSearchResponse, fields)
+        for row in EMPLOYEE_ROWS:
+            values = dict(zip(EMPLOYEE_COLUMNS, row))
+            projected_row = tuple(values[x] for x in columns)
+            expected = partial_model(**{x: values[x] for x in columns}).model_dump()
+            self.assertEqual(list(decoder.decode(projected_row).items()), list(expected.items()))
+
+    def test_employee_missing_optional_columns(self):
+        columns = tuple(x for x in EMPLOYEE_COLUMNS if x not in ("surname", "description"))
+        decoder = get_row_decoder(EmployeeSearchResponse, columns)
+        values = dict(zip(EMPLOYEE_COLUMNS, EMPLOYEE_ROWS[0]))
+        row = tuple(values[x] for x in columns)
+        expected = EmployeeSearchResponse(**{x: values[x] for x in columns}).model_dump()
+        self.assertEqual(list(decoder.decode(row).items()), list(expected.items()))
+
+    def test_employee_missing_required_column(self):
+        with self.assertRaises(ValueError):
+            get_row_decoder(EmployeeSearchResponse, ("id", "first_name"))
+
+    def test_employee_invalid_values(self):
+        decoder = get_row_decoder(EmployeeSearchResponse, EMPLOYEE_COLUMNS)
+        for index, value in ((3, 9), (4, "finance"), (7, "1990/01/01"), (8, 5), (10, "2023/01/01")):
+            row = list(EMPLOYEE_ROWS[0])
+            row[index] = value
+            with self.assertRaises(ValidationError):
+                EmployeeSearchResponse(**dict(zip(EMPLOYEE_COLUMNS, row)))
+            with self.assertRaises(ValueError):
+                decoder.decode(tuple(row))
+
+    def test_employee_null_dates(self):
+        decoder = get_row_decoder(EmployeeSearchResponse, EMPLOYEE_COLUMNS)
+        row = list(EMPLOYEE_ROWS[0])
+        row[7], row[10] = None, None
+        expected = EmployeeSearchResponse(**dict(zip(EMPLOYEE_COLUMNS, row))).model_dump()
+        self.assertEqual(decoder.decode(tuple(row)), expected)
+        self.assertIsNone(expected["birth_date"])
+
+    def test_document_rows_same_as_model(self):
+        decoder = get_row_decoder(DocumentApprovalResponse, DOCUMENT_COLUMNS)
+        for row in DOCUMENT_ROWS:
+            expected = DocumentApprovalResponse(**dict(zip(DOCUMENT_COLUMNS, row))).model_dump()
+            self.assertEqual(list(decoder.decode(row).items()), list(expected.items()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import sys
+import os
+import multiprocessing
+import tempfile
+
+import unittest
+
+# Change the context
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Settings
+from config.cache import CacheSettings
+from config.rdb import RDBSettings
+from config.storage import StorageSettings
+from app_factory import create_app
+from utils import shared_cache
+from utils.conditional import SyncedVersions
+from utils.shared_cache import SharedFile, SharedResponseCache, SharedVersions, default_cache_path
+
+
+def put_in_worker(path: str, key: str, value: bytes):
+    cache = SharedResponseCache(path, slots=64, slot_bytes=1024, ttl_seconds=60)
+    _, version = cache.get(key)
+    cache.put(key, value, version)
+    cache.close()
+
+# ===========================================================================================
+# Make TestCase
+# ============================================================================================
+
+class SharedResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "responses")
+        self.cache = SharedResponseCache(self.path, slots=64, slot_bytes=1024, ttl_seconds=60)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_version_invalidation(self):
+        body, version = self.cache.get("/search/id/1")
+        self.assertIsNone(body)
+        self.assertTrue(self.cache.put("/search/id/1", b'{"id": 1}', version))
+        self.assertEqual(self.cache.get("/search/id/1")[0], b'{"id": 1}')
+
+        self.cache.bump_version()
+        body, new_version = self.cache.get("/search/id/1")
+        self.assertIsNone(body)
+        # a response made before the write is not stored
+        self.assertFalse(self.cache.put("/search/id/1", b'{"id": 1}', version))
+        self.assertFalse(self.cache.put("/search/id/2", bytes(1024), new_version))  # larger than a slot
+
+        stats = self.cache.to_dict()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stores"]), (1, 2, 1))
+
+    def test_default_path_per_database(self):
+        staging = Settings(rdb=RDBSettings(host="db.example.com", database="staging"))
+        self.assertEqual(default_cache_path(staging), default_cache_path(staging.model_copy()))
+        self.assertNotEqual(default_cache_path(staging),
+                            default_cache_path(Settings(rdb=RDBSettings(host="db.example.com", database="prod"))))
+        self.assertNotEqual(default_cache_path(staging),
+                            default_cache_path(Settings(rdb=RDBSettings(host="db.example.com", port=3307, database="staging"))))
+        self.assertNotEqual(default_cache_path(staging), default_cache_path(staging, "versions"))
+
+    def test_shared_between_processes(self):
+        worker = multiprocessing.get_context("fork").Process(
+            target=put_in_worker, args=(self.path, "/search/department/1", b'{"employees": []}'))
+        worker.start()
+        worker.join()
+        self.assertEqual(self.cache.get("/search/department/1")[0], b'{"employees": []}')
+
+        # a cache of other geometry replaces the file instead of resizing it under this one
+        other = SharedResponseCache(self.path, slots=32, slot_bytes=1024, ttl_seconds=60)
+        self.assertIsNone(other.get("/search/department/1")[0])
+        other.close()
+        self.assertEqual(self.cache.get("/search/department/1")[0], b'{"employees": []}')
+
+    def test_search_and_manage_routes(self):
+        cache_settings = CacheSettings(versions_path=os.path.join(self.directory.name, "versions"))
+        app = create_app(Settings(storage=StorageSettings(backend="memory"), cache=cache_settings),
+                         configure_logging=False)
+        client = app.test_client()
+        shared_cache.RESPONSE_CACHE = self.cache
+        try:
+            response = client.post('/manage/create', data={
+                "first_name": "John", "position": "employee", "department": "sales",
+                "phone_number": "010-0000-0001", "email": "john@example.com"})
+            self.assertEqual(response.status_code, 201)
+            employee_id = 1  # the first employee of the empty memory backend
+
+            response = client.get(f'/search/id/{employee_id}')
+            self.assertEqual(response.headers['X-Cache'], 'MISS')
+            cached_response = client.get(f'/search/id/{employee_id}')
+            self.assertEqual(cached_response.headers['X-Cache'], 'HIT')
+            self.assertEqual(cached_response.headers['ETag'], response.headers['ETag'])
+            self.assertEqual(cached_response.data, response.data)
+
+            # responses are cached per format negotiated by the Accept header
+            self.assertEqual(client.get('/search/position/0').headers['X-Cache'], 'MISS')
+            response = client.get('/search/position/0', headers={'Accept': 'text/csv'})
+            self.assertEqual((response.headers['X-Cache'], response.mimetype), ('MISS', 'text/csv'))
+            cached_response = client.get('/search/position/0', headers={'Accept': 'text/csv'})
+            self.assertEqual((cached_response.headers['X-Cache'], cached_response.mimetype), ('HIT', 'text/csv'))
+            self.assertIn('Accept', cached_response.headers['Vary'].split(', '))
+            self.assertEqual(cached_response.data, response.data)
+
+            client.post(f'/manage/position/{employee_id}/manager')
+            response = client.get(f'/search/id/{employee_id}')
+            self.assertEqual(response.headers['X-Cache'], 'MISS')
+            self.assertEqual(response.get_json()['response']['position'], 'Manager')
+        finally:
+            shared_cache.RESPONSE_CACHE = None
+            shared_cache.VERSIONS.close()
+            shared_cache.VERSIONS = None
+
+
+class SharedVersionsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        shared_cache.VERSIONS = self.versions = SharedVersions(os.path.join(self.directory.name, "versions"), 64)
+
+    def tearDown(self):
+        shared_cache.VERSIONS = None
+        self.versions.close()
+        self.directory.cleanup()
+
+    def test_abstract_shared_file(self):
+        with self.assertRaises(TypeError):
+            SharedFile(os.path.join(self.directory.name, "other"), 1024)
+
+    def test_bump(self):
+        before = self.versions.get_each(["position", "department"])
+        bumps = self.versions.bump(["position"])
+        self.assertEqual(bumps, {"position": (before[0], self.versions.get_each(["position"])[0])})
+        self.assertEqual(self.versions.get_each(["department"]), before[1:])
+
+    def test_synced_versions(self):
+        synced = SyncedVersions(["position"])
+        self.assertFalse(synced.is_current())  # not loaded yet
+
+        versions = synced.start_load()
+        synced.advance([self.versions.bump(["position"])])  # written by this worker while loading
+        synced.finish_load(versions)
+        self.assertTrue(synced.is_current())
+
+        synced.advance([self.versions.bump(["position"]), self.versions.bump(["position"])])
+        self.assertTrue(synced.is_current())
+
+        # a write of another worker isn't followed, even with a write of this worker after it
+        self.versions.bump(["position"])
+        synced.advance([self.versions.bump(["position"])])
+        self.assertFalse(synced.is_current())
+
+        synced.finish_load(synced.start_load())
+        self.assertTrue(synced.is_current())
+
+if __name__ == '__main__':
+    unittest.main()